@@ -1,10 +1,19 @@
 import streamlit as st
-from constants import DEFAULT_TICKERS, DATA_CACHE_TTL
-from data_services import get_stock_data, calculate_volatility
+from constants import (
+    DEFAULT_TICKERS, USE_PRICE_STORE, USE_PREFETCH, PREFETCH_REFRESH_SECONDS
+)
+from data_services import series_cache
+from dataset_registry import DatasetRegistry
+from prefetcher import Prefetcher, snapshot_key
+from price_store import PriceStore
+import shared_snapshot
+from volatility_engine import OHLC_ESTIMATORS
 from ui_components import (
     load_css,
-    create_sidebar
+    create_sidebar,
+    create_debug_panel
 )
+import instrumentation
 from page_contents import render_page
 
 # Sayfa konfigürasyonu
@@ -18,51 +27,86 @@ st.set_page_config(
 # CSS stillerini yükle
 load_css()
 
-# Session state ile değerleri takip et
-if 'prev_data_days' not in st.session_state:
-    st.session_state.prev_data_days = 40
+# Sidebar arayüzünü oluştur
+data_days, window_size, top_n, selected_tickers, refresh_btn, page, interval, estimator, ewma_lambda = create_sidebar(DEFAULT_TICKERS)
 
-if 'prev_window_size' not in st.session_state:
-    st.session_state.prev_window_size = 20
+# Veri yükleme fonksiyonları
+@st.cache_resource
+def get_price_store():
+    """Tüm oturumlarca paylaşılan yerel fiyat deposunu döndür"""
+    return PriceStore() if USE_PRICE_STORE else None
 
-# Sidebar arayüzünü oluştur
-data_days, window_size, top_n, selected_tickers, refresh_btn, page = create_sidebar(DEFAULT_TICKERS)
+@st.cache_resource
+def get_prefetcher():
+    """Tüm oturumlarca paylaşılan ön yükleyiciyi döndür (açıksa arka planda çalışır)
+    
+    Hisse bazındaki series_cache'i de yenilediğinden farklı evrenlerde ortak
+    olan hisseler yeniden indirilmez. Paylaşım açıksa anlık görüntüler aynı
+    makinedeki diğer Streamlit süreçleriyle memmap dosyaları üzerinden paylaşılır.
+    """
+    shared = shared_snapshot.SharedSnapshotStore() if shared_snapshot.is_enabled() else None
+    prefetcher = Prefetcher(store=get_price_store(), cache=series_cache, shared=shared)
+    return prefetcher.start() if USE_PREFETCH else prefetcher
 
-# Slider değerleri değiştiğinde veriyi yenileme
-if st.session_state.prev_data_days != data_days:
-    st.session_state.refresh_data = True
-    st.session_state.prev_data_days = data_days
+@st.cache_resource
+def get_dataset_registry():
+    """Oturumların kullandığı anlık görüntü sürümlerinin kaydını döndür"""
+    return DatasetRegistry()
 
-if st.session_state.prev_window_size != window_size:
-    st.session_state.refresh_data = True
-    st.session_state.prev_window_size = window_size
+# Veri yükleme işlemi: son anlık görüntü ağ beklemeden sunulur,
+# eskimişse arka planda yenilenir. Parametre değişikliği yeni bir anahtardır.
+prefetcher = get_prefetcher()
+snapshot = None if refresh_btn else prefetcher.get(selected_tickers, data_days, interval)
+# Ön yükleme kapalıysa eskiyen anlık görüntü bu istekte yenilenir
+if snapshot is not None and not USE_PREFETCH and snapshot.age_seconds >= PREFETCH_REFRESH_SECONDS:
+    snapshot = None
 
-# Veri yenileme butonu
-if refresh_btn:
-    st.session_state.refresh_data = True
+# OHLC yöntemi ilk kez seçildiğinde barlar bir kez indirilir, sonra arka planda yenilenir
+if snapshot is not None and not snapshot.has_estimator(estimator):
+    snapshot = None
 
-# Veri yükleme fonksiyonları
-@st.cache_data(ttl=DATA_CACHE_TTL)  # 1 saat cache
-def fetch_stock_data(tickers, days):
-    """Hisse senedi verilerini yükle"""
+if snapshot is None:
     with st.spinner('Hisse senedi fiyat verileri yükleniyor... Lütfen bekleyin'):
-        return get_stock_data(tickers, days)
+        snapshot = prefetcher.load(
+            selected_tickers, data_days, interval, force=refresh_btn, estimators=estimator in OHLC_ESTIMATORS
+        )
+    st.caption(
+        f"📦 Önbellekten: {len(snapshot.report.cache_hits)} hisse · "
+        f"İndirilen: {len(snapshot.report.cache_misses)} hisse"
+    )
+    if refresh_btn:
+        st.success("✅ Veriler başarıyla güncellendi!")
 
-@st.cache_data(ttl=DATA_CACHE_TTL)  # 1 saat cache
-def compute_volatility(data, window):
-    """Varyasyon katsayısını hesapla"""
-    with st.spinner('Oynaklık hesaplanıyor... Lütfen bekleyin'):
-        return calculate_volatility(data, window=window)
+# Oturumda veri değil yalnızca sürüm handle'ı tutulur; sürüm kayıtta tek kopyadır ve
+# onu kullanan son oturum yeni sürüme geçince (veya kapanınca) bellekten çıkar
+dataset_handle, data_updated = get_dataset_registry().checkout(
+    snapshot_key(selected_tickers, data_days, interval), snapshot, st.session_state.get("dataset_handle")
+)
+st.session_state.dataset_handle = dataset_handle
+snapshot = dataset_handle.snapshot
+if data_updated and not refresh_btn:
+    st.toast("🔄 Veriler arka planda güncellendi")
 
-# Veri yükleme işlemi
-if 'data' not in st.session_state or 'refresh_data' in st.session_state:
-    # Veri yüklemesini iki aşamaya bölerek önbellekleme etkinliğini artır
-    st.session_state.data = fetch_stock_data(selected_tickers, data_days)
-    st.session_state.vol_data = compute_volatility(st.session_state.data, window_size)
-    
-    if 'refresh_data' in st.session_state:
-        del st.session_state.refresh_data
-        st.success("✅ Veriler başarıyla güncellendi!")
+# Alınamayan hisseleri sessizce düşürmek yerine kullanıcıya bildir
+failed_tickers = snapshot.report.failed()
+if estimator in OHLC_ESTIMATORS and snapshot.ohlc_report is not None:
+    failed_tickers = list(dict.fromkeys(failed_tickers + snapshot.ohlc_report.failed()))
+if failed_tickers:
+    st.warning(f"⚠️ Verisi alınamayan hisseler: {', '.join(failed_tickers)}")
+
+# Pencere değişikliği yeniden hesaplama gerektirmez, yalnızca küpten seçilir.
+# EWMA durumu yenilemeler arasında korunur ve yalnızca yeni barlarla ilerletilir.
+if estimator == "ewma":
+    vol_data = prefetcher.ewma_volatility(selected_tickers, data_days, interval, snapshot, ewma_lambda)
+else:
+    vol_data = snapshot.volatility(estimator, window_size)
 
 # Ana uygulama içeriğini görüntüle
-render_page(page, st.session_state.data, st.session_state.vol_data, window_size, top_n) 
\ No newline at end of file
+with instrumentation.span("render_page"):
+    render_page(
+        page, snapshot.data, vol_data, window_size, top_n, snapshot.age_seconds, estimator, snapshot.benchmark
+    )
+
+# Ölçüm açıksa performans paneli ve Prometheus dosyası
+create_debug_panel(prefetcher, get_dataset_registry())
+instrumentation.write_prometheus() 
\ No newline at end of file
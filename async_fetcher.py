@@ -0,0 +1,211 @@
+import asyncio
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from curl_cffi.requests import AsyncSession
+from chart_decoder import loads
+from constants import (
+    FETCH_CONCURRENCY, FETCH_RATE_LIMIT, FETCH_MAX_RETRIES,
+    FETCH_BACKOFF_BASE, FETCH_BACKOFF_MAX, FETCH_TIMEOUT
+)
+
+# Tekrar denenmesi anlamlı olan HTTP durum kodları
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+@dataclass
+class FetchOutcome:
+    """Tek bir isteğin (hisse veya toplu istek) sonucunu tanımlar
+
+    status değerleri:
+        "ok": İlk denemede başarılı
+        "retried": Tekrar denemeler sonunda başarılı
+        "failed": Tüm denemeler başarısız
+    """
+    key: str
+    status: str
+    attempts: int
+    latency: float
+    error: str = None
+
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "status": self.status,
+            "attempts": self.attempts,
+            "latency": round(self.latency, 4),
+            "error": self.error
+        }
+
+@dataclass
+class FetchReport:
+    """get_stock_data çağrısının hisse bazındaki indirme raporu"""
+    outcomes: dict = field(default_factory=dict)
+    total_seconds: float = 0.0
+    assembly_seconds: float = 0.0
+    # Hisse bazında önbellekten gelen ve indirilmesi gereken hisseler
+    cache_hits: list = field(default_factory=list)
+    cache_misses: list = field(default_factory=list)
+
+    def failed(self):
+        """Verisi alınamayan hisse kodları"""
+        return [key for key, outcome in self.outcomes.items() if outcome.status == "failed"]
+
+    def retried(self):
+        """Tekrar denemeyle alınan hisse kodları"""
+        return [key for key, outcome in self.outcomes.items() if outcome.status == "retried"]
+
+    def summary(self):
+        """Durum başına hisse sayıları"""
+        counts = {"ok": 0, "retried": 0, "failed": 0}
+        for outcome in self.outcomes.values():
+            counts[outcome.status] += 1
+        return counts
+
+    def to_dict(self):
+        """JSON olarak yazılabilir sözlük (from_dict ile geri okunur)"""
+        return {
+            "outcomes": [outcome.to_dict() for outcome in self.outcomes.values()],
+            "total_seconds": self.total_seconds,
+            "assembly_seconds": self.assembly_seconds,
+            "cache_hits": list(self.cache_hits),
+            "cache_misses": list(self.cache_misses)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """to_dict çıktısından raporu yeniden oluşturur"""
+        return cls(
+            outcomes={outcome["key"]: FetchOutcome(**outcome) for outcome in data["outcomes"]},
+            total_seconds=data["total_seconds"],
+            assembly_seconds=data["assembly_seconds"],
+            cache_hits=data["cache_hits"],
+            cache_misses=data["cache_misses"]
+        )
+
+class TokenBucket:
+    """Saniyede belirli sayıda isteğe izin veren token kovası hız sınırlayıcısı"""
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate: Saniyede eklenen token (istek) sayısı; None veya 0 ise sınırsız
+            capacity: Kovanın alabileceği en fazla token (ani yük), varsayılan rate
+        """
+        self.rate = rate
+        self.capacity = capacity or rate or 1
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Bir token alınana kadar bekler"""
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncFetcher:
+    """curl_cffi AsyncSession üzerinde sınırlı eşzamanlılıkla JSON indirici
+
+    Eşzamanlı istek sayısı bir semafor, saniyedeki istek sayısı bir token
+    kovasıyla sınırlanır. 429/5xx yanıtları ve bağlantı hataları üstel geri
+    çekilmeyle tekrar denenir.
+    """
+
+    def __init__(self, concurrency=FETCH_CONCURRENCY, rate_limit=FETCH_RATE_LIMIT,
+                 max_retries=FETCH_MAX_RETRIES, backoff_base=FETCH_BACKOFF_BASE,
+                 timeout=FETCH_TIMEOUT, backoff_max=FETCH_BACKOFF_MAX):
+        """
+        Args:
+            concurrency: Aynı anda açık olabilecek en fazla istek
+            rate_limit: Saniyedeki en fazla istek (None ise sınırsız)
+            max_retries: İlk denemeden sonraki en fazla tekrar sayısı
+            backoff_base: Üstel geri çekilmenin ilk bekleme süresi (saniye)
+            timeout: İstek zaman aşımı (saniye)
+            backoff_max: Tek bir beklemenin üst sınırı (saniye)
+        """
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.backoff_max = backoff_max
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Deneme numarasına göre bekleme süresi (rastgele sapmalı)
+
+        Sunucunun Retry-After değeri [0, backoff_max] aralığına sınırlanır;
+        sayı değilse üstel geri çekilme kullanılır.
+        """
+        if retry_after is not None:
+            try:
+                seconds = float(retry_after)
+            except (TypeError, ValueError):
+                seconds = math.nan
+            if math.isfinite(seconds):
+                return min(max(seconds, 0.0), self.backoff_max)
+        delay = self.backoff_base * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        return min(delay, self.backoff_max)
+
+    async def _get_json(self, session, semaphore, bucket, key, url):
+        start = time.perf_counter()
+        error = None
+        for attempt in range(1, self.max_retries + 2):
+            retry_after = None
+            await bucket.acquire()
+            async with semaphore:
+                try:
+                    resp = await session.get(url, timeout=self.timeout)
+                    if resp.status_code == 200:
+                        status = "ok" if attempt == 1 else "retried"
+                        return loads(resp.content), FetchOutcome(key, status, attempt, time.perf_counter() - start)
+                    error = f"HTTP {resp.status_code}"
+                    if resp.status_code not in RETRY_STATUS_CODES:
+                        break
+                    retry_after = resp.headers.get("Retry-After")
+                except Exception as e:
+                    error = str(e)
+            if attempt <= self.max_retries:
+                await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+        return None, FetchOutcome(key, "failed", attempt, time.perf_counter() - start, error)
+
+    async def fetch_all(self, jobs):
+        """Tüm işleri eşzamanlı olarak indirir
+
+        Args:
+            jobs: (anahtar, url) ikilileri listesi
+
+        Returns:
+            Anahtar -> (JSON veya None, FetchOutcome) sözlüğü
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(self.rate_limit)
+        async with AsyncSession(impersonate="chrome") as session:
+            results = await asyncio.gather(*[
+                self._get_json(session, semaphore, bucket, key, url) for key, url in jobs
+            ])
+        return {key: result for (key, _), result in zip(jobs, results)}
+
+    def run(self, jobs):
+        """fetch_all'ı senkron koddan çağırmak için yardımcı
+
+        Çalışan bir olay döngüsü varsa (ör. Jupyter) işlem ayrı bir iş
+        parçacığında yürütülür.
+        """
+        if not jobs:
+            return {}
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_all(jobs))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.fetch_all(jobs)).result()
@@ -0,0 +1,309 @@
+"""Veri katmanı ve grafik fonksiyonları için performans ölçüm paketi
+
+Sentetik fiyat panelleri (hisse × gün) üzerinde sıcak yolların süresini ve
+en yüksek bellek kullanımını ölçer, sonuçları JSON olarak yazar ve istenirse
+kayıtlı bir referans sonuçla karşılaştırır. Örnekler:
+
+    python benchmarks.py --output bench.json
+    python benchmarks.py --quick --baseline bench.json --threshold 0.2
+
+Referansa göre eşikten fazla yavaşlayan veya fazla bellek kullanan bir
+ölçüm varsa çıkış kodu 1 olur.
+"""
+import argparse
+import functools
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from async_fetcher import AsyncFetcher, FetchReport
+from data_services import (
+    get_stock_data, calculate_volatility, calculate_percent_change, calculate_drawdown
+)
+from compact_panel import CompactPanel
+from correlation_engine import calculate_correlation
+from drawdown_engine import calculate_drawdown_matrix
+from prefetcher import Snapshot
+from shared_snapshot import SharedSnapshotStore
+from volatility_engine import EwmaVolatility, calculate_estimator_cubes, calculate_volatility_cube
+from mock_yahoo_server import start_mock_server
+from visualization_helpers import figure_cache
+from visualizations_basic import (
+    plot_top_volatile_stocks, plot_volatility_heatmap, plot_last_day_volatility
+)
+from visualizations_advanced import (
+    plot_return_analysis, plot_volatility_vs_return, plot_sharpe_ratio, plot_price_drawdown,
+    plot_deepest_drawdowns, plot_correlation_heatmap, plot_beta
+)
+
+TICKER_COUNTS = (30, 500, 5000)
+DAY_COUNTS = (40, 180, 2520)
+QUICK_TICKER_COUNTS = (30, 500)
+QUICK_DAY_COUNTS = (40, 180)
+WINDOW = 20
+DEFAULT_THRESHOLD = 0.2
+# Karşılaştırılan ölçümler (süre için en iyi tekrar); bu değerlerin altı gürültüye açık olduğundan atlanır
+MIN_COMPARE = {"min_seconds": 0.005, "peak_bytes": 1024 * 1024}
+# Korelasyon senaryoları pencere başına (hisse × hisse) matrisler tutar; 5000 hissede
+# bunlar GB mertebesine çıktığından yalnızca bu sayıya kadar ölçülür
+CORRELATION_MAX_TICKERS = 500
+CORRELATION_CASES = ("calculate_correlation", "plot_correlation_heatmap", "plot_beta")
+# Paylaşılan anlık görüntü ölçümlerinin dosyaları; çıkışta silinir
+_shared_dir = tempfile.TemporaryDirectory(prefix="bist-shared-")
+
+def synthetic_tickers(n_tickers):
+    """Sentetik panelin hisse kodları"""
+    return [f"SYN{i:04d}.IS" for i in range(n_tickers)]
+
+def synthetic_panel(n_tickers, n_days, seed=0):
+    """İş günü indeksli rastgele yürüyüş fiyat paneli üretir"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    returns = rng.normal(0, 0.02, (n_days, n_tickers))
+    prices = rng.uniform(10, 500, n_tickers) * np.exp(returns.cumsum(axis=0))
+    return pd.DataFrame(prices, index=index, columns=synthetic_tickers(n_tickers))
+
+def synthetic_ohlc(data, seed=0):
+    """Kapanış panelinden açılış/en yüksek/en düşük panelleri türetir"""
+    rng = np.random.default_rng(seed)
+    close = data.to_numpy()
+    opens = np.vstack([close[:1], close[:-1]]) * np.exp(rng.normal(0, 0.005, close.shape))
+    highs = np.maximum(opens, close) * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))
+    lows = np.minimum(opens, close) * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))
+    return {
+        name: pd.DataFrame(values, index=data.index, columns=data.columns)
+        for name, values in (("Open", opens), ("High", highs), ("Low", lows), ("Close", close))
+    }
+
+def _uncached(func):
+    """cache_figure katmanını atlayarak grafiğin her seferinde yeniden çizilmesini sağlar"""
+    return getattr(func, "uncached", func)
+
+def build_cases(n_tickers, n_days, base_url):
+    """Bir panel boyutu için (ad, hazırlık, kurucu) listesi
+
+    Kurucu çağrıldığında senaryonun girdilerini oluşturur ve ölçülecek
+    fonksiyonu döndürür. Paneller ve türetilmiş veriler ilk gereken
+    senaryoda bir kez üretilir; --filter ile dışlanan senaryolar için veri
+    oluşturulmaz. Hazırlık fonksiyonu ölçüm dışında çalışır ve önbellekleri
+    temizler; böylece her tekrar soğuk yolu ölçer. Korelasyon senaryoları
+    (hisse × hisse matrisler) CORRELATION_MAX_TICKERS üzerindeki panellerde atlanır.
+    """
+    data = functools.cache(lambda: synthetic_panel(n_tickers, n_days))
+    cv_data = functools.cache(lambda: calculate_volatility(data(), WINDOW))
+    ohlc = functools.cache(lambda: synthetic_ohlc(data()))
+    compact = functools.cache(lambda: CompactPanel.from_frame(data()))
+    # Endeks yerine panelin ortalama fiyatı kullanılır
+    benchmark = functools.cache(lambda: data().mean(axis=1))
+    # Son barın yeniden hesaplanması; bar başına güncellemenin maliyeti
+    ewma = functools.cache(lambda: EwmaVolatility(data()))
+    tickers = synthetic_tickers(n_tickers)
+    ticker = tickers[0]
+    # Gün sayısı işlem günü; takvim gününe çevir
+    calendar_days = n_days * 7 // 5 + 1
+    fetcher = AsyncFetcher(rate_limit=None)
+
+    def clear_caches():
+        calculate_percent_change.cache_clear()
+        calculate_drawdown_matrix.cache_clear()
+        calculate_correlation.cache_clear()
+        figure_cache.clear()
+
+    @functools.cache
+    def shared():
+        """Paylaşılan anlık görüntünün yazılması ve başka bir süreçteki gibi eşlenmesi"""
+        store = SharedSnapshotStore(os.path.join(_shared_dir.name, f"{n_tickers}x{n_days}"))
+        key = (tuple(tickers), n_days, "1d")
+        snapshot = Snapshot(
+            compact().to_frame(), calculate_volatility_cube(compact(), range(10, 31)), FetchReport(),
+            time.time(), 0, benchmark=benchmark(), panel=compact()
+        )
+        store.publish(key, snapshot)
+        return store, key, snapshot
+
+    def release_shared():
+        store, key, _ = shared()
+        store.release(key)
+
+    cases = [
+        ("get_stock_data", None, lambda: functools.partial(
+            get_stock_data, tickers, calendar_days, batch=True, base_url=base_url, fetcher=fetcher)),
+        ("calculate_volatility", None, lambda: functools.partial(calculate_volatility, data(), WINDOW)),
+        ("calculate_percent_change", clear_caches, lambda: functools.partial(calculate_percent_change, data())),
+        ("calculate_drawdown", None,
+         lambda: functools.partial(calculate_drawdown, data()[[ticker]], price_col=ticker)),
+        ("calculate_drawdown_matrix", clear_caches, lambda: functools.partial(calculate_drawdown_matrix, data())),
+        ("calculate_drawdown_matrix.compact", clear_caches,
+         lambda: functools.partial(calculate_drawdown_matrix, compact())),
+        ("CompactPanel.from_frame", None, lambda: functools.partial(CompactPanel.from_frame, data())),
+        ("calculate_estimator_cubes", None,
+         lambda: functools.partial(calculate_estimator_cubes, ohlc(), range(10, 31))),
+        ("calculate_correlation", clear_caches,
+         lambda: functools.partial(calculate_correlation, data(), WINDOW, benchmark())),
+        ("EwmaVolatility", None, lambda: functools.partial(EwmaVolatility, data())),
+        ("EwmaVolatility.update", None,
+         lambda: functools.partial(ewma().update, data().iloc[-1], replace_last=True)),
+        ("SharedSnapshotStore.publish", None, lambda: functools.partial(shared()[0].publish, *shared()[1:])),
+        ("SharedSnapshotStore.read", release_shared, lambda: functools.partial(shared()[0].read, shared()[1])),
+    ]
+
+    plots = [
+        ("plot_top_volatile_stocks", lambda: functools.partial(_uncached(plot_top_volatile_stocks), cv_data(), 5)),
+        ("plot_volatility_heatmap", lambda: functools.partial(_uncached(plot_volatility_heatmap), cv_data())),
+        ("plot_last_day_volatility",
+         lambda: functools.partial(_uncached(plot_last_day_volatility), cv_data(), WINDOW)),
+        ("plot_return_analysis", lambda: functools.partial(_uncached(plot_return_analysis), data(), WINDOW)),
+        ("plot_volatility_vs_return",
+         lambda: functools.partial(_uncached(plot_volatility_vs_return), cv_data(), data(), WINDOW)),
+        ("plot_sharpe_ratio", lambda: functools.partial(_uncached(plot_sharpe_ratio), cv_data(), data(), WINDOW)),
+        ("plot_price_drawdown", lambda: functools.partial(_uncached(plot_price_drawdown), data(), ticker)),
+        ("plot_deepest_drawdowns", lambda: functools.partial(_uncached(plot_deepest_drawdowns), data(), 10)),
+        ("plot_correlation_heatmap",
+         lambda: functools.partial(_uncached(plot_correlation_heatmap), data(), WINDOW, benchmark())),
+        ("plot_beta", lambda: functools.partial(_uncached(plot_beta), data(), benchmark(), WINDOW)),
+    ]
+    for name, make in plots:
+        cases.append((name, clear_caches, make))
+        # Figür JSON'a çevrilmesi ayrıca ölçülür (tarayıcıya gönderilen yük)
+        cases.append((f"{name}.to_json", None, lambda make=make: make()()[0].to_json))
+
+    if n_tickers > CORRELATION_MAX_TICKERS:
+        cases = [case for case in cases if not case[0].startswith(CORRELATION_CASES)]
+    return cases
+
+def measure(setup, func, repeat):
+    """Fonksiyonun süresini ve en yüksek bellek kullanımını ölçer
+
+    Süre tracemalloc kapalıyken `repeat` kez ölçülür; bellek ayrı bir
+    çalıştırmada tracemalloc ile ölçülür.
+
+    Returns:
+        Ölçüm sonuçları sözlüğü
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "min_seconds": min(times),
+        "median_seconds": statistics.median(times),
+        "peak_bytes": peak,
+        "repeat": repeat
+    }
+
+def run_benchmarks(ticker_counts, day_counts, repeat=3, name_filter=None):
+    """Tüm panel boyutları ve ölçüm senaryoları için sonuçları toplar
+
+    Returns:
+        "senaryo[hisse x gün]" -> ölçüm sözlüğü
+    """
+    server, base_url = start_mock_server()
+    results = {}
+    try:
+        for n_tickers in ticker_counts:
+            for n_days in day_counts:
+                for name, setup, make in build_cases(n_tickers, n_days, base_url):
+                    if name_filter and name_filter not in name:
+                        continue
+                    key = f"{name}[{n_tickers}x{n_days}]"
+                    results[key] = dict(measure(setup, make(), repeat), tickers=n_tickers, days=n_days)
+                    print(f"{key:<60} {results[key]['median_seconds'] * 1000:10.1f} ms "
+                          f"{results[key]['peak_bytes'] / 2**20:9.1f} MB")
+    finally:
+        server.shutdown()
+    return results
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Sonuçları referansla karşılaştırır
+
+    Args:
+        results: run_benchmarks çıktısı
+        baseline: Daha önce kaydedilmiş sonuçlar ("results" sözlüğü)
+        threshold: İzin verilen oransal artış (0.2 = %20)
+
+    Returns:
+        Eşiği aşan ölçümlerin listesi
+    """
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric, floor in MIN_COMPARE.items():
+            if max(reference[metric], current[metric]) < floor:
+                continue
+            ratio = current[metric] / reference[metric]
+            if ratio > 1 + threshold:
+                regressions.append({
+                    "case": key,
+                    "metric": metric,
+                    "baseline": reference[metric],
+                    "current": current[metric],
+                    "ratio": round(ratio, 3)
+                })
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Veri ve grafik sıcak yolları için performans ölçümü")
+    parser.add_argument("--quick", action="store_true", help="Yalnızca küçük paneller (30/500 hisse × 40/180 gün)")
+    parser.add_argument("--repeat", type=int, default=3, help="Süre ölçümü tekrar sayısı")
+    parser.add_argument("--filter", help="Yalnızca adında bu metin geçen senaryolar")
+    parser.add_argument("--output", default="benchmark_results.json", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--baseline", help="Karşılaştırılacak referans JSON dosyası")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Gerileme sayılacak oransal artış (0.2 = %%20)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    ticker_counts = QUICK_TICKER_COUNTS if args.quick else TICKER_COUNTS
+    day_counts = QUICK_DAY_COUNTS if args.quick else DAY_COUNTS
+
+    results = run_benchmarks(ticker_counts, day_counts, args.repeat, args.filter)
+    payload = {
+        "created_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"Sonuçlar yazıldı: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for item in regressions:
+            print(f"GERİLEME {item['case']} {item['metric']}: "
+                  f"{item['baseline']:.4g} -> {item['current']:.4g} (x{item['ratio']})")
+        if regressions:
+            return 1
+        print(f"Referansa göre %{args.threshold * 100:.0f} üzerinde gerileme yok")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Yahoo chart/spark yanıtlarını doğrudan NumPy dizilerine çeviren çözücü
+
+Zaman damgaları ve OHLCV dizileri öğe başına Python nesnesi üretilmeden
+tek seferde int64/float dizilerine dönüştürülür. orjson kuruluysa JSON
+çözümleme için o kullanılır, değilse standart json modülüne düşülür.
+"""
+import json
+from dataclasses import dataclass, fields
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DAY_SECONDS = 86400
+# Yahoo "quote" nesnesindeki alanlar ve BarSeries'teki karşılıkları
+QUOTE_FIELDS = {"open": "opens", "high": "highs", "low": "lows", "close": "closes", "volume": "volumes"}
+
+def loads(payload):
+    """JSON metnini veya baytlarını çözer (orjson varsa onunla)"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+@dataclass
+class BarSeries:
+    """Tek hissenin barlarını Python datetime nesneleri yerine NumPy dizilerinde tutar
+
+    timestamps: Borsanın yerel saatine kaydırılmış epoch saniye (int64)
+    closes/opens/highs/lows: Fiyatlar (gün içi aralıklarda float32), eksik bar NaN
+    volumes: İşlem hacmi (float64), eksik bar NaN
+    """
+    ticker: str
+    timestamps: np.ndarray
+    closes: np.ndarray
+    opens: np.ndarray = None
+    highs: np.ndarray = None
+    lows: np.ndarray = None
+    volumes: np.ndarray = None
+
+    @property
+    def nbytes(self):
+        """Dizilerin toplam bayt boyutu"""
+        return sum(
+            getattr(self, field.name).nbytes for field in fields(self)[1:]
+            if getattr(self, field.name) is not None
+        )
+
+    def index_values(self, daily=True):
+        """Barların datetime64[ns] dizisi; daily=True ise gün başına yuvarlanır"""
+        timestamps = self.timestamps - self.timestamps % DAY_SECONDS if daily else self.timestamps
+        return timestamps.astype("datetime64[s]").astype("datetime64[ns]")
+
+    def to_series(self, daily=True):
+        """Kapanış fiyatlarını tarih indeksli pandas serisine çevirir"""
+        return pd.Series(self.closes, index=pd.DatetimeIndex(self.index_values(daily)), name=self.ticker)
+
+    def to_frame(self, daily=True):
+        """Mevcut OHLCV alanlarını Open/High/Low/Close/Volume sütunlu DataFrame'e çevirir"""
+        columns = {
+            quote_field.capitalize(): getattr(self, name)
+            for quote_field, name in QUOTE_FIELDS.items()
+            if getattr(self, name) is not None
+        }
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(self.index_values(daily)))
+
+    @classmethod
+    def concat(cls, parts):
+        """Parçalı indirilen barları birleştirir; aynı zamanlı barlarda sonuncusu geçerlidir"""
+        timestamps = np.concatenate([part.timestamps for part in parts])
+        # Ters çevirip unique almak her zaman damgasının son kaydını seçer
+        _, last = np.unique(timestamps[::-1], return_index=True)
+        keep = len(timestamps) - 1 - last
+
+        arrays = {}
+        for field in fields(cls)[2:]:
+            values = [getattr(part, field.name) for part in parts]
+            # Bir parçada eksik olan alan birleşik seride de tutulmaz
+            if all(value is not None for value in values):
+                arrays[field.name] = np.concatenate(values)[keep]
+        return cls(parts[0].ticker, timestamps[keep], **arrays)
+
+def _quote_array(values, length, dtype, field):
+    """Yahoo quote listesini (null değerler dahil) float dizisine çevirir"""
+    if values is None:
+        return np.full(length, np.nan, dtype=dtype)
+    if len(values) != length:
+        raise ValueError(f"'{field}' uzunluğu ({len(values)}) zaman damgası sayısıyla ({length}) uyuşmuyor")
+    # None öğeler float dönüşümünde NaN olur
+    return np.array(values, dtype=np.float64).astype(dtype, copy=False)
+
+def decode_chart_result(result, ticker, price_dtype=np.float64, drop_empty=True):
+    """Chart/spark yanıtındaki tek bir sonucu BarSeries'e çevirir
+
+    Null değerler NaN olarak korunur. drop_empty=True ise fiyat alanlarının
+    tamamı null olan barlar (Yahoo'nun işlem olmayan dönemler için
+    döndürdüğü boş barlar) atılır.
+
+    Args:
+        result: Yanıttaki sonuç sözlüğü ("meta", "timestamp", "indicators")
+        ticker: Hisse kodu
+        price_dtype: Fiyat dizilerinin tipi (gün içi veride float32)
+        drop_empty: Tüm fiyatları null olan barların atılıp atılmayacağı
+
+    Returns:
+        BarSeries
+    """
+    gmtoffset = (result.get("meta") or {}).get("gmtoffset") or 0
+    timestamps = np.asarray(result.get("timestamp") or [], dtype=np.int64) + gmtoffset
+    length = len(timestamps)
+
+    quotes = (result.get("indicators") or {}).get("quote") or [{}]
+    quote = quotes[0] or {}
+    arrays = {
+        name: _quote_array(quote.get(field), length, np.float64 if field == "volume" else price_dtype, field)
+        for field, name in QUOTE_FIELDS.items()
+    }
+
+    if drop_empty and length:
+        has_price = ~np.isnan(np.stack([arrays[name] for name in ("opens", "highs", "lows", "closes")])).all(axis=0)
+        if not has_price.all():
+            timestamps = timestamps[has_price]
+            arrays = {name: values[has_price] for name, values in arrays.items()}
+
+    return BarSeries(ticker, timestamps, **arrays)
+
+def decode_chart(payload, ticker, price_dtype=np.float64):
+    """Ham chart yanıtını (bayt veya metin) çözer
+
+    Returns:
+        BarSeries
+    """
+    data = loads(payload)
+    return decode_chart_result(data["chart"]["result"][0], ticker, price_dtype)
@@ -0,0 +1,200 @@
+"""Streamlit olmadan tüm metrikleri hesaplayan komut satırı aracı
+
+Gece çalışan risk işleri için arayüzü açmadan bir veya daha fazla hisse
+evreninin oynaklık, getiri ve zirveden uzaklık metriklerini hesaplar ve
+Parquet/JSON olarak yazar. Örnek:
+
+    python cli.py --universe BIST-30 BIST-Tümü --days 90 --windows 10 20 30 --output out/
+
+Bu modül streamlit veya plotly içe aktarmaz; yalnızca veri katmanını kullanır.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from constants import (
+    UNIVERSES, DEFAULT_UNIVERSE, DEFAULT_WINDOW_SIZE, USE_BATCH_FETCH,
+    YAHOO_BASE_URL, INTERVAL_LIMITS, DEFAULT_INTERVAL
+)
+import instrumentation
+from data_services import (
+    get_stock_data, get_universe_tickers, calculate_volatility,
+    calculate_percent_change
+)
+from drawdown_engine import calculate_drawdown_matrix
+
+# Her işçi sürecine verilecek hisse sayısı
+DEFAULT_CHUNK_SIZE = 50
+
+def compute_metrics(data, windows):
+    """Fiyat panelinden hisse bazında metrik tablosu ve oynaklık serilerini hesaplar
+
+    Args:
+        data: Fiyat verileri DataFrame (satırlar tarih, sütunlar hisse)
+        windows: Varyasyon katsayısı pencere boyutları
+
+    Returns:
+        Tuple: (hisse indeksli metrik DataFrame'i, pencere -> varyasyon katsayısı DataFrame'i)
+    """
+    metrics = pd.DataFrame(index=data.columns)
+    metrics.index.name = "ticker"
+    metrics["last_close"] = data.ffill().iloc[-1]
+    metrics["change_pct"] = calculate_percent_change(data)
+
+    cv_by_window = {}
+    for window in windows:
+        cv_data = calculate_volatility(data, window)
+        cv_by_window[window] = cv_data
+        metrics[f"cv_{window}"] = cv_data.iloc[-1] if len(cv_data) else float("nan")
+
+    # Zirveden uzaklık tüm hisseler için tek geçişte hesaplanır (eksik günler atlanır)
+    drawdowns = calculate_drawdown_matrix(data).summary()
+    metrics["max_drawdown_pct"] = drawdowns["max_drawdown"]
+    metrics["drawdown_pct"] = drawdowns["current_drawdown"]
+    metrics["drawdown_bars"] = drawdowns["current_duration"]
+
+    return metrics, cv_by_window
+
+def _process_chunk(tickers, days, windows, interval, base_url):
+    """İşçi süreçte bir hisse grubunu indirir ve metriklerini hesaplar
+
+    Fiyat deposu süreçler arasında paylaşılamadığından (tek manifest dosyası)
+    burada kullanılmaz.
+
+    Returns:
+        Tuple: (metrik DataFrame'i, pencere -> varyasyon katsayısı sözlüğü, alınamayan hisseler)
+    """
+    data, report = get_stock_data(
+        tickers, days, batch=USE_BATCH_FETCH, base_url=base_url,
+        return_report=True, interval=interval
+    )
+    if data.empty:
+        return pd.DataFrame(), {}, report.failed()
+    metrics, cv_by_window = compute_metrics(data, windows)
+    return metrics, cv_by_window, report.failed()
+
+def run_universe(tickers, days, windows, interval=DEFAULT_INTERVAL, workers=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, base_url=YAHOO_BASE_URL):
+    """Hisse listesini gruplara bölüp süreç havuzunda işler
+
+    Args:
+        tickers: Hisse kodları listesi
+        days: Kaç günlük veri isteniyor
+        windows: Varyasyon katsayısı pencere boyutları
+        interval: Bar aralığı
+        workers: Süreç sayısı (None ise işlemci sayısı, 1 ise aynı süreçte çalışır)
+        chunk_size: Süreç başına hisse sayısı
+        base_url: Yahoo sunucu adresi
+
+    Returns:
+        Tuple: (metrik DataFrame'i, pencere -> varyasyon katsayısı DataFrame'i, alınamayan hisseler)
+    """
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    args = [(chunk, days, windows, interval, base_url) for chunk in chunks]
+
+    if workers == 1 or len(chunks) == 1:
+        results = [_process_chunk(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_process_chunk, *zip(*args)))
+
+    frames = [metrics for metrics, _, _ in results if not metrics.empty]
+    metrics = pd.concat(frames) if frames else pd.DataFrame()
+    cv_by_window = {
+        window: pd.concat([cv[window] for _, cv, _ in results if window in cv], axis=1)
+        for window in windows
+        if any(window in cv for _, cv, _ in results)
+    }
+    failed = [ticker for _, _, chunk_failed in results for ticker in chunk_failed]
+    return metrics, cv_by_window, failed
+
+def _safe_name(name):
+    """Evren adını dosya adına uygun hale getirir"""
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name)
+
+def write_results(output_dir, name, metrics, cv_by_window, meta, formats):
+    """Sonuçları Parquet ve/veya JSON olarak yazar
+
+    Returns:
+        Yazılan dosya yolları listesi
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, _safe_name(name))
+    paths = []
+
+    if "parquet" in formats:
+        metrics.to_parquet(f"{base}_metrics.parquet")
+        paths.append(f"{base}_metrics.parquet")
+        for window, cv_data in cv_by_window.items():
+            path = f"{base}_cv_{window}.parquet"
+            cv_data.to_parquet(path)
+            paths.append(path)
+
+    if "json" in formats:
+        path = f"{base}_metrics.json"
+        payload = dict(meta, metrics=json.loads(metrics.reset_index().to_json(orient="records")))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        paths.append(path)
+
+    return paths
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BIST oynaklık metriklerini arayüz olmadan hesaplar")
+    parser.add_argument("--universe", nargs="+", default=[DEFAULT_UNIVERSE], choices=list(UNIVERSES),
+                        help="Hesaplanacak hisse evrenleri")
+    parser.add_argument("--tickers", nargs="+", help="Evren yerine kullanılacak özel hisse kodları")
+    parser.add_argument("--days", type=int, default=40, help="Kaç günlük veri indirileceği")
+    parser.add_argument("--windows", type=int, nargs="+", default=[DEFAULT_WINDOW_SIZE],
+                        help="Varyasyon katsayısı pencere boyutları (bar)")
+    parser.add_argument("--interval", default=DEFAULT_INTERVAL, choices=list(INTERVAL_LIMITS),
+                        help="Bar aralığı")
+    parser.add_argument("--output", default="output", help="Sonuç klasörü")
+    parser.add_argument("--format", nargs="+", default=["parquet", "json"], choices=["parquet", "json"],
+                        help="Çıktı biçimleri")
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı (varsayılan işlemci sayısı)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Süreç başına hisse sayısı")
+    parser.add_argument("--base-url", default=YAHOO_BASE_URL, help="Yahoo sunucu adresi")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = {"custom": args.tickers} if args.tickers else {
+        universe: get_universe_tickers(universe) for universe in args.universe
+    }
+
+    exit_code = 0
+    for name, tickers in jobs.items():
+        start = time.perf_counter()
+        # İşçi süreçlerdeki ölçümler ana sürece taşınmaz; evren bazında toplam süre ölçülür
+        with instrumentation.span(f"cli.run_universe.{name}"):
+            metrics, cv_by_window, failed = run_universe(
+                tickers, args.days, args.windows, args.interval,
+                args.workers, args.chunk_size, args.base_url
+            )
+        if failed:
+            print(f"{name}: {len(failed)} hissenin verisi alınamadı: {', '.join(failed)}", file=sys.stderr)
+        if metrics.empty:
+            print(f"{name}: hiçbir hisse için veri alınamadı", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        meta = {
+            "universe": name,
+            "generated_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "days": args.days,
+            "interval": args.interval,
+            "windows": args.windows,
+            "failed": failed
+        }
+        paths = write_results(args.output, name, metrics, cv_by_window, meta, args.format)
+        print(f"{name}: {len(metrics)} hisse, {time.perf_counter() - start:.1f} sn -> {', '.join(paths)}")
+
+    instrumentation.write_prometheus()
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Fiyat panellerinin sıkı (float32) bellek gösterimi
+
+Değerler tek bir (tarih × hisse) float32 dizisinde, hisse kodları süreç
+genelinde paylaşılan tamsayı kodlarla, tarihler epoch gün (gün içi veride
+epoch saniye) olarak tutulur. to_frame() aynı tamponu kopyalamadan
+kullanan bir DataFrame döndürür; böylece mevcut hesap ve grafik
+fonksiyonları değişmeden çalışır.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from chart_decoder import DAY_SECONDS
+
+# Hisse kodu <-> tamsayı kod tablosu; kodlar süreç boyunca değişmez
+_ticker_codes = {}
+_ticker_names = []
+_ticker_lock = threading.Lock()
+
+def ticker_codes(tickers):
+    """Hisse kodlarının tamsayı kodları (ilk kez görülenlere yeni kod verilir)"""
+    with _ticker_lock:
+        for ticker in tickers:
+            if ticker not in _ticker_codes:
+                _ticker_codes[ticker] = len(_ticker_names)
+                _ticker_names.append(ticker)
+        return np.array([_ticker_codes[ticker] for ticker in tickers], dtype=np.int32)
+
+def ticker_names(codes):
+    """Tamsayı kodlardan hisse kodları listesi"""
+    with _ticker_lock:
+        return [_ticker_names[code] for code in codes]
+
+def encode_dates(index):
+    """Tarih indeksini tamsayı diziye çevirir
+
+    Returns:
+        (dates, intraday): Günlük veride epoch gün (int32), gün içi veride
+        epoch saniye (int64) dizisi ve hangisinin kullanıldığı
+    """
+    seconds = pd.DatetimeIndex(index).values.astype("datetime64[s]").astype(np.int64)
+    intraday = bool(len(seconds)) and bool((seconds % DAY_SECONDS).any())
+    return (seconds if intraday else (seconds // DAY_SECONDS).astype(np.int32)), intraday
+
+def decode_dates(dates, intraday):
+    """encode_dates çıktısından DatetimeIndex oluşturur"""
+    unit = "s" if intraday else "D"
+    return pd.DatetimeIndex(np.asarray(dates).astype(f"datetime64[{unit}]").astype("datetime64[ns]"))
+
+class CompactPanel:
+    """float32 değerli, tamsayı kodlu hisse ve epoch gün tarihli fiyat paneli
+
+    values: (tarih × hisse) fiyat dizisi, eksik fiyat NaN
+    codes: Sütunların hisse kodları (int32, ticker_codes tablosundan)
+    dates: Günlük veride epoch gün (int32), gün içi veride epoch saniye (int64)
+    intraday: dates'in saniye cinsinden olup olmadığı
+    """
+
+    def __init__(self, values, codes, dates, intraday=False):
+        self.values = values
+        self.codes = codes
+        self.dates = dates
+        self.intraday = intraday
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, data, dtype=np.float32):
+        """Fiyat DataFrame'inden sıkı panel oluşturur
+
+        Args:
+            data: Fiyat verileri DataFrame (satırlar tarih, sütunlar hisse)
+            dtype: Değer tipi (varsayılan float32)
+
+        Returns:
+            CompactPanel
+        """
+        if isinstance(data, cls):
+            return data
+        dates, intraday = encode_dates(data.index)
+        # Sütun öncelikli (F) düzen DataFrame bloklarıyla uyumludur; to_frame() kopya almaz
+        values = np.asfortranarray(data.to_numpy(dtype=dtype))
+        return cls(values, ticker_codes(list(data.columns)), dates, intraday)
+
+    @property
+    def index(self):
+        """Tarihlerin DatetimeIndex karşılığı"""
+        return decode_dates(self.dates, self.intraday)
+
+    @property
+    def columns(self):
+        """Hisse kodları indeksi"""
+        return pd.Index(ticker_names(self.codes))
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def empty(self):
+        return self.values.size == 0
+
+    @property
+    def nbytes(self):
+        """Dizilerin toplam bayt boyutu"""
+        return self.values.nbytes + self.codes.nbytes + self.dates.nbytes
+
+    def fingerprint_parts(self):
+        """Önbellek anahtarı (utils.fingerprint) için özetlenecek diziler"""
+        return self.values, self.codes, self.dates
+
+    def to_frame(self):
+        """Değer tamponunu kopyalamadan kullanan DataFrame (bir kez oluşturulur)"""
+        if self._frame is None:
+            self._frame = pd.DataFrame(self.values, index=self.index, columns=self.columns, copy=False)
+        return self._frame
+
+def as_frame(data):
+    """CompactPanel'i DataFrame görünümüne çevirir; DataFrame'i olduğu gibi döndürür"""
+    return data.to_frame() if isinstance(data, CompactPanel) else data
+
+def float_values(data):
+    """Panelin değer dizisi; float32 ve float64 tipleri kopya alınmadan korunur
+
+    Diğer tipler (ör. tamsayı) float64'e çevrilir.
+    """
+    values = data.values if isinstance(data, CompactPanel) else data.to_numpy()
+    if values.dtype in (np.float32, np.float64):
+        return values
+    return values.astype(float)
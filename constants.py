@@ -8,13 +8,154 @@ DEFAULT_TICKERS = [
     "THYAO.IS", "TOASO.IS", "TTKOM.IS", "TUPRS.IS", "ULKER.IS", "YKBNK.IS"
 ]
 
+# Analiz edilebilecek hisse evrenleri: liste veya hisse kodu dosyasının yolu
+UNIVERSES = {
+    "BIST-30": DEFAULT_TICKERS,
+    "BIST-Tümü": "static/universes/bist_all.txt"
+}
+DEFAULT_UNIVERSE = "BIST-30"
+
 # Uygulama sabitleri
 DEFAULT_DATA_DAYS = 40
 DEFAULT_WINDOW_SIZE = 20
+WINDOW_MIN = 10  # Pencere kaydırıcısının alt sınırı (bar; günlük veride gün)
+WINDOW_MAX = 30  # Pencere kaydırıcısının üst sınırı (bar; günlük veride gün)
 DEFAULT_TOP_N = 5
+LAZY_TABS = True  # Yalnızca seçili sekmenin grafiğini oluştur
+BAR_CHART_MAX_BARS = 40  # Bu sayıdan fazla hisse varsa en yüksek/en düşük K hisse gösterilir
+SCATTER_MAX_LABELS = 60  # Bu sayıdan fazla noktada hisse etiketleri gizlenir
+LINE_WEBGL_MIN_POINTS = 5000  # Bu sayıdan fazla noktalı çizgi grafikleri WebGL ile çizilir
 
 # Cache ayarları
 DATA_CACHE_TTL = 3600  # 1 saat (saniye cinsinden) 
+MEMO_CACHE_MAX_BYTES = 64 * 1024 * 1024  # memoize önbelleği başına bayt sınırı
+MEMO_CACHE_TTL = DATA_CACHE_TTL  # memoize sonuçlarının geçerlilik süresi (saniye)
+FIGURE_CACHE_MAX_BYTES = 128 * 1024 * 1024  # Oturumlar arası figür önbelleğinin bayt sınırı
+SERIES_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Hisse bazında fiyat serisi önbelleğinin bayt sınırı
+
+# Performans ölçümü (BIST_INSTRUMENTATION=1 ortam değişkeniyle de açılır)
+INSTRUMENTATION_ENABLED = False  # Açıkken kenar çubuğunda performans paneli gösterilir
+METRICS_LOG_JSON = True  # Her ölçümü JSON log satırı olarak yaz
+METRICS_PROM_FILE = "metrics.prom"  # Prometheus metin biçimindeki ölçüm dosyası
+METRICS_RECENT_CALLS = 200  # Panelde gösterilmek üzere saklanan son çağrı sayısı
+
+# Veri kaynağı ayarları
+YAHOO_BASE_URL = "https://query1.finance.yahoo.com"
+USE_BATCH_FETCH = True  # Hisseleri spark uç noktasıyla toplu indir
+BATCH_SIZE = 20  # Tek spark isteğindeki en fazla hisse sayısı
+FETCH_CONCURRENCY = 10  # Aynı anda açık en fazla istek
+FETCH_RATE_LIMIT = 20  # Saniyedeki en fazla istek (None ise sınırsız)
+FETCH_MAX_RETRIES = 3  # 429/5xx ve bağlantı hatalarında tekrar sayısı
+FETCH_BACKOFF_BASE = 0.5  # Üstel geri çekilmenin ilk bekleme süresi (saniye)
+FETCH_BACKOFF_MAX = 10  # Tek bir bekleme için üst sınır (saniye); Retry-After de bununla sınırlanır
+FETCH_TIMEOUT = 15  # İstek zaman aşımı (saniye)
+
+# Oynaklık motoru ayarları
+VOLATILITY_CUBE_MAX_CELLS = 20_000_000  # Aşılırsa pencereler istendikçe hesaplanır (gün içi veri)
+STREAMING_RESEED_INTERVAL = 250  # Akan toplamların tampondan yeniden hesaplanma sıklığı (bar)
+
+# Oynaklık tahmin yöntemleri: cv kapanış fiyatlarından, diğerleri OHLC barlarından hesaplanır.
+# axis_label grafik eksenlerinde, precision gösterilen ondalık sayısıdır; windowed=False olan
+# yöntemler pencere boyutu kullanmaz.
+VOLATILITY_ESTIMATORS = {
+    "cv": {
+        "label": "Varyasyon Katsayısı",
+        "axis_label": "Varyasyon Katsayısı",
+        "precision": 4,
+        "description": "Fiyatların standart sapmasının ortalamaya bölünmesiyle hesaplanır."
+    },
+    "ewma": {
+        "label": "EWMA (RiskMetrics)",
+        "axis_label": "EWMA Oynaklığı (%)",
+        "precision": 2,
+        "windowed": False,
+        "description": (
+            "Logaritmik getirilerin karesinin üstel ağırlıklı ortalamasıdır (%). Yeni barlara daha fazla "
+            "ağırlık verdiğinden rejim değişikliklerine hızlı tepki verir; pencere boyutu kullanılmaz."
+        )
+    },
+    "close_to_close": {
+        "label": "Kapanış-Kapanış",
+        "axis_label": "Kapanış-Kapanış Oynaklığı (%)",
+        "precision": 2,
+        "description": "Logaritmik kapanış getirilerinin bar başına standart sapmasıdır (%)."
+    },
+    "parkinson": {
+        "label": "Parkinson",
+        "axis_label": "Parkinson Oynaklığı (%)",
+        "precision": 2,
+        "description": (
+            "Bar içi en yüksek/en düşük fiyat aralığından hesaplanır (%). Kapanış yöntemine göre "
+            "aynı doğruluğa çok daha kısa pencerede ulaşır."
+        )
+    },
+    "garman_klass": {
+        "label": "Garman-Klass",
+        "axis_label": "Garman-Klass Oynaklığı (%)",
+        "precision": 2,
+        "description": (
+            "Açılış, en yüksek, en düşük ve kapanış fiyatlarını birlikte kullanır (%). "
+            "Fiyat eğilimi (drift) olmadığını varsayar."
+        )
+    },
+    "rogers_satchell": {
+        "label": "Rogers-Satchell",
+        "axis_label": "Rogers-Satchell Oynaklığı (%)",
+        "precision": 2,
+        "description": "OHLC fiyatlarından hesaplanır ve fiyat eğiliminden (drift) etkilenmez (%)."
+    },
+    "yang_zhang": {
+        "label": "Yang-Zhang",
+        "axis_label": "Yang-Zhang Oynaklığı (%)",
+        "precision": 2,
+        "description": (
+            "Gece boşluğu (önceki kapanış-açılış), açılış-kapanış ve Rogers-Satchell bileşenlerini "
+            "birleştirir (%). Açılış boşluklarına ve eğilime dayanıklıdır."
+        )
+    }
+}
+DEFAULT_ESTIMATOR = "cv"
+
+# EWMA (RiskMetrics) oynaklığı: σ²ₜ = λ·σ²ₜ₋₁ + (1 - λ)·rₜ²
+EWMA_LAMBDA = 0.94  # RiskMetrics günlük değeri (yarı ömür ≈ 11 bar)
+EWMA_LAMBDA_OPTIONS = [0.90, 0.92, 0.94, 0.96, 0.97, 0.98, 0.99]  # Kenar çubuğunda seçilebilen λ değerleri
+EWMA_MIN_PERIODS = 10  # Bu kadar getiri birikmeden değer gösterilmez
+
+# Korelasyon ve beta: hisseler bu endekse göre değerlendirilir
+BENCHMARK_TICKER = "XU100.IS"  # BIST 100 endeksi
+CORRELATION_HEATMAP_MAX_TICKERS = 40  # Korelasyon ısı haritasında gösterilecek en fazla hisse
+CORRELATION_TOP_PAIRS = 20  # Tabloda gösterilecek en yüksek korelasyonlu çift sayısı
+CORRELATION_MAX_POINTS = 500  # Ortalama korelasyon serisinde hesaplanacak en fazla bar (gün içi veri)
+
+# Bar aralıkları: Yahoo'nun tek istekte izin verdiği dilim ve en fazla geçmiş (gün)
+INTERVAL_LIMITS = {
+    "1d": {"label": "Günlük", "chunk_days": None, "max_days": None},
+    "1h": {"label": "1 Saat", "chunk_days": 180, "max_days": 730},
+    "15m": {"label": "15 Dakika", "chunk_days": 30, "max_days": 60},
+    "5m": {"label": "5 Dakika", "chunk_days": 30, "max_days": 60},
+    "1m": {"label": "1 Dakika", "chunk_days": 7, "max_days": 30}
+}
+DEFAULT_INTERVAL = "1d"
+
+# Yerel fiyat deposu ayarları
+USE_PRICE_STORE = True  # Yenilemede yalnızca yeni barları indir
+PRICE_STORE_DIR = "data_store"  # Hisse başına Parquet dosyalarının klasörü
+
+# Arka planda ön yükleme (bayat veri sunulurken arka planda yenilenir)
+USE_PREFETCH = True  # Veri ve oynaklık küpü arka plan iş parçacığında yenilenir
+PREFETCH_JOBS = [(DEFAULT_UNIVERSE, DEFAULT_DATA_DAYS, DEFAULT_INTERVAL)]  # (evren, gün, bar aralığı)
+PREFETCH_REFRESH_SECONDS = 900  # Anlık görüntü bu süreden eskiyse yenilenir
+PREFETCH_MAX_KEYS = 16  # Kullanıcı isteğiyle eklenen en fazla anlık görüntü sayısı
+PREFETCH_IDLE_SECONDS = 6 * 3600  # Bu süre istenmeyen (yapılandırma dışı) anlık görüntüler silinir
+
+# Sıkı bellek gösterimi: anlık görüntülerdeki fiyat paneli ve oynaklık küpü float32 tutulur
+USE_COMPACT_PANELS = True
+
+# Süreçler arası paylaşım: birden fazla Streamlit süreci aynı makinede çalışırken anlık
+# görüntüler bir kez hesaplanıp memmap dosyalarından okunur (BIST_SHARED_SNAPSHOTS=1 ile de açılır)
+USE_SHARED_SNAPSHOTS = False
+SHARED_SNAPSHOT_DIR = "data_store/shared"  # Tüm süreçlerin eriştiği klasör
+SHARED_SNAPSHOT_KEEP_VERSIONS = 2  # Anahtar başına diskte tutulan sürüm sayısı (en az 2)
 
 # GÖRSEL TEMA SABİTLERİ
 # ----------------------------------------------------
@@ -45,5 +186,7 @@ HOVER_TEXT_COLOR = "#333"
 LINE_WIDTH = 2
 GRAPH_HEIGHT = 550
 HEATMAP_HEIGHT = 650
+HEATMAP_MAX_CELLS = 20000  # Isı haritasında tarayıcıya gönderilecek en fazla hücre
+HEATMAP_MAX_ROWS = 120  # Bu sayıdan fazla hisse varsa satırlar gruplanır
 BAR_TEXT_FORMAT = '{:.2f}'
 PERCENTAGE_FORMAT = '{:.2f}%' 
\ No newline at end of file
@@ -0,0 +1,291 @@
+import numpy as np
+import pandas as pd
+from constants import STREAMING_RESEED_INTERVAL, CORRELATION_MAX_POINTS
+from instrumentation import timed
+from utils import memoize
+
+def log_returns(prices):
+    """Fiyat dizisinden logaritmik getiriler
+
+    Getiri son geçerli fiyata göre hesaplanır; eksik fiyatlı barlarda ve ilk
+    geçerli fiyatta getiri NaN olur.
+
+    Args:
+        prices: (tarih × hisse) NumPy dizisi
+
+    Returns:
+        Aynı boyutlu getiri dizisi
+    """
+    log_prices = np.log(prices)
+    previous = pd.DataFrame(log_prices).ffill().shift(1).to_numpy()
+    return log_prices - previous
+
+class RollingCorrelation:
+    """Kayan penceredeki ikili korelasyonu artımlı güncelleyen motor
+
+    Her hisse çifti için yalnızca ikisinin de getirisi olan barlar kullanılır.
+    (hisse × hisse) boyutlu dört toplam tutulur: ortak gözlem sayısı, Σx, Σx²
+    ve Σxy. Yeni bar eklenirken pencereden çıkan bar toplamlardan çıkarılır;
+    adım maliyeti pencere uzunluğundan bağımsızdır. Kayan nokta hatalarının
+    birikmemesi için toplamlar belirli aralıklarla tampondan yeniden hesaplanır.
+    """
+
+    def __init__(self, n_columns, window, reseed_interval=STREAMING_RESEED_INTERVAL):
+        """
+        Args:
+            n_columns: Hisse sayısı
+            window: Pencere uzunluğu (bar)
+            reseed_interval: Toplamların tampondan yeniden hesaplanma sıklığı (bar)
+        """
+        self.window = window
+        self.reseed_interval = reseed_interval
+        # Son window barın getirileri (halka tampon)
+        self._buffer = np.full((window, n_columns), np.nan)
+        self._pos = 0
+        self._filled = 0
+        self._steps = 0
+        self._count = np.zeros((n_columns, n_columns))
+        self._sum = np.zeros((n_columns, n_columns))
+        self._sumsq = np.zeros((n_columns, n_columns))
+        self._cross = np.zeros((n_columns, n_columns))
+        # Her adımda yeni (hisse × hisse) dizi ayırmamak için ara sonuç tamponları
+        self._scratch = np.empty((n_columns, n_columns))
+        self._variance = np.empty((n_columns, n_columns))
+        self._denominator = np.empty((n_columns, n_columns))
+
+    @staticmethod
+    def _factors(rows, signs):
+        """Barların toplamlara katkısını veren (sol, sağ) çarpan çiftleri
+
+        Her toplamın katkısı sol.T @ sağ matris çarpımıdır; signs ile eklenen
+        (1) ve çıkarılan (-1) barlar ayrılır. _sum[i, j], j'nin de getirisi
+        olan barlarda i'nin getiri toplamıdır.
+        """
+        valid = ~np.isnan(rows)
+        x = np.where(valid, rows, 0.0)
+        m = valid.astype(float)
+        signed_x = x * signs[:, None]
+        return (m * signs[:, None], m), (signed_x, m), (signed_x * x, m), (signed_x, x)
+
+    def _reseed(self):
+        """Toplamları tampondaki getirilerden yeniden hesaplar"""
+        rows = self._buffer[:self._filled]
+        self._count, self._sum, self._sumsq, self._cross = (
+            left.T @ right for left, right in self._factors(rows, np.ones(len(rows)))
+        )
+
+    def update(self, rows):
+        """Yeni barların getirilerini pencereye ekler, pencereden çıkan barları çıkarır
+
+        Giren ve çıkan barlar tek bir matris çarpımıyla işlenir; birkaç barı
+        birlikte vermek (ör. gün içi veride) çarpımları daha verimli kılar.
+
+        Args:
+            rows: Hisse sırasına göre getiri dizisi veya (bar × hisse) dizisi
+                (en fazla window bar, eksik getiri NaN)
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        slots = (self._pos + np.arange(len(rows))) % self.window
+        # Dolu yuvalardaki (en eski) barlar pencereden çıkar
+        leaving = self._buffer[slots[slots < self._filled]]
+        signs = np.concatenate([np.ones(len(rows)), -np.ones(len(leaving))])
+
+        totals = (self._count, self._sum, self._sumsq, self._cross)
+        for total, (left, right) in zip(totals, self._factors(np.vstack([rows, leaving]), signs)):
+            np.matmul(left.T, right, out=self._scratch)
+            total += self._scratch
+        self._buffer[slots] = rows
+        self._pos = (self._pos + len(rows)) % self.window
+        self._filled = min(self._filled + len(rows), self.window)
+
+        previous_steps = self._steps
+        self._steps += len(rows)
+        if self._steps // self.reseed_interval > previous_steps // self.reseed_interval:
+            self._reseed()
+
+    def correlation(self, min_periods=None):
+        """Penceredeki (hisse × hisse) korelasyon matrisi
+
+        Args:
+            min_periods: Bir çift için gereken en az ortak gözlem (None ise pencere)
+
+        Returns:
+            Korelasyon matrisi; yeterli gözlemi veya değişkenliği olmayan çiftler NaN
+        """
+        min_periods = self.window if min_periods is None else min_periods
+        n = self._count
+        var, denominator = self._variance, self._denominator
+        cov = n * self._cross
+        cov -= np.multiply(self._sum, self._sum.T, out=self._scratch)
+        np.multiply(n, self._sumsq, out=var)
+        var -= np.multiply(self._sum, self._sum, out=self._scratch)
+        np.multiply(var, var.T, out=denominator)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.sqrt(denominator, out=denominator)
+            corr = np.divide(cov, denominator, out=cov)
+        np.copyto(corr, np.nan, where=(n < max(min_periods, 2)) | ~(denominator > 0))
+        return np.clip(corr, -1.0, 1.0, out=corr)
+
+class CorrelationMatrix:
+    """Evrenin son korelasyon matrisi, ortalama korelasyon serisi ve endeks betaları
+
+    latest: Son bardaki (hisse × hisse) korelasyon matrisi
+    average: Her bar için hisse çiftlerinin ortalama korelasyonu (uzun serilerde
+        yalnızca örneklenen barlarda dolu, diğerleri NaN)
+    beta: (tarih × hisse) kayan beta matrisi (endeks verisi yoksa None)
+    market_corr: (tarih × hisse) endeksle kayan korelasyon (endeks yoksa None)
+    """
+
+    def __init__(self, latest, average, beta, market_corr, index, columns, window):
+        self.latest = latest
+        self.average = average
+        self.beta = beta
+        self.market_corr = market_corr
+        self.index = index
+        self.columns = columns
+        self.window = window
+        self._summary = None
+
+    @property
+    def nbytes(self):
+        """Dizilerin toplam bayt boyutu"""
+        arrays = (self.latest, self.average, self.beta, self.market_corr)
+        return sum(arr.nbytes for arr in arrays if arr is not None)
+
+    @property
+    def has_benchmark(self):
+        """Endekse göre beta hesaplanıp hesaplanmadığı"""
+        return self.beta is not None
+
+    def frame(self, tickers=None):
+        """Son korelasyon matrisi DataFrame'i (tickers verilirse yalnızca o hisseler)"""
+        matrix = pd.DataFrame(self.latest, index=self.columns, columns=self.columns)
+        return matrix if tickers is None else matrix.loc[tickers, tickers]
+
+    def average_series(self):
+        """Ortalama ikili korelasyonun tarih indeksli serisi (hesaplanan barlar)"""
+        return pd.Series(self.average, index=self.index, name="Ortalama Korelasyon").dropna()
+
+    def summary(self):
+        """Hisse bazında son değerler
+
+        Sütunlar: beta, market_corr (endeksle korelasyon), mean_corr (diğer
+        hisselerle ortalama korelasyon)
+        """
+        if self._summary is None:
+            off_diagonal = self.latest.copy()
+            np.fill_diagonal(off_diagonal, np.nan)
+            counts = (~np.isnan(off_diagonal)).sum(axis=0)
+            sums = np.nansum(off_diagonal, axis=0)
+            mean_corr = np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0)
+            empty = np.full(len(self.columns), np.nan)
+            self._summary = pd.DataFrame({
+                "beta": self.beta[-1] if self.has_benchmark and len(self.index) else empty,
+                "market_corr": self.market_corr[-1] if self.has_benchmark and len(self.index) else empty,
+                "mean_corr": mean_corr
+            }, index=self.columns)
+        return self._summary
+
+    def central(self, n):
+        """Diğer hisselerle ortalama korelasyonu en yüksek n hisse"""
+        return self.summary()["mean_corr"].dropna().nlargest(n).index
+
+    def top_pairs(self, n):
+        """Son korelasyonu en yüksek n hisse çifti (first, second, correlation sütunlu)"""
+        rows, cols = np.triu_indices(len(self.columns), k=1)
+        values = self.latest[rows, cols]
+        valid = ~np.isnan(values)
+        rows, cols, values = rows[valid], cols[valid], values[valid]
+        # Tüm çiftleri sıralamak yerine yalnızca en yüksek n tanesi seçilir
+        if len(values) > n:
+            top = np.argpartition(values, -n)[-n:]
+            rows, cols, values = rows[top], cols[top], values[top]
+        order = np.argsort(values)[::-1]
+        return pd.DataFrame({
+            "first": self.columns[rows[order]],
+            "second": self.columns[cols[order]],
+            "correlation": values[order]
+        })
+
+def _rolling_beta(returns, market, window, min_periods):
+    """Her hissenin endekse göre kayan beta ve korelasyonu
+
+    Pencere toplamları birikimli toplamların farkıyla (pencereye giren bar
+    eklenip çıkan bar çıkarılarak) tek geçişte hesaplanır; yalnızca hisse
+    ve endeksin ikisinin de getirisi olan barlar kullanılır.
+    """
+    both = ~np.isnan(returns) & ~np.isnan(market)[:, None]
+    x = np.where(both, returns, 0.0)
+    y = np.where(both, market[:, None], 0.0)
+
+    end = np.arange(1, len(returns) + 1)
+    start = np.maximum(end - window, 0)
+
+    def window_sum(values):
+        cumulative = np.zeros((len(values) + 1, values.shape[1]))
+        np.cumsum(values, axis=0, out=cumulative[1:])
+        return cumulative[end] - cumulative[start]
+
+    n = window_sum(both.astype(float))
+    sum_x, sum_y = window_sum(x), window_sum(y)
+    cov = n * window_sum(x * y) - sum_x * sum_y
+    var_x = n * window_sum(x * x) - sum_x ** 2
+    var_y = n * window_sum(y * y) - sum_y ** 2
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = cov / var_y
+        market_corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+    insufficient = n < max(min_periods, 2)
+    beta[insufficient | ~(var_y > 0)] = np.nan
+    market_corr[insufficient | ~(var_x * var_y > 0)] = np.nan
+    return beta, market_corr
+
+@timed
+@memoize
+def calculate_correlation(data, window, benchmark=None, min_periods=None):
+    """Evrenin kayan korelasyonunu ve endekse göre betasını hesaplar
+
+    pandas rolling().corr() her tarih için (hisse × hisse) MultiIndex çerçeve
+    üretir; burada yalnızca son matris ve tarih başına ortalama korelasyon
+    tutulur, pencere toplamları her bar için artımlı güncellenir. Sonuç
+    fiyat panelinin içeriğine göre önbelleğe alınır.
+
+    Args:
+        data: Fiyat verileri DataFrame (satırlar tarih, sütunlar hisse)
+        window: Pencere uzunluğu (bar)
+        benchmark: Endeks fiyat serisi (ör. XU100.IS), None ise beta hesaplanmaz
+        min_periods: Gereken en az ortak getiri sayısı (None ise pencere)
+
+    Returns:
+        CorrelationMatrix
+    """
+    min_periods = window if min_periods is None else min_periods
+    returns = log_returns(data.to_numpy(dtype=float))
+    n_rows, n_cols = returns.shape
+
+    engine = RollingCorrelation(n_cols, window)
+    average = np.full(n_rows, np.nan)
+    latest = np.full((n_cols, n_cols), np.nan)
+    # Uzun (gün içi) serilerde barlar gruplar halinde işlenir ve ortalama korelasyon
+    # yalnızca grup sonlarında hesaplanır; son grup her zaman son barda biter
+    step = max(1, min(window, -(-n_rows // CORRELATION_MAX_POINTS)))
+    ends = np.arange(n_rows, 0, -step)[::-1]
+    for start, end in zip(np.concatenate([[0], ends[:-1]]), ends):
+        engine.update(returns[start:end])
+        # İlk min_periods getiriye kadar hiçbir çiftin yeterli gözlemi olmaz
+        if end <= min_periods:
+            continue
+        latest = engine.correlation(min_periods)
+        # Köşegen (hissenin kendisiyle korelasyonu) ortalamadan çıkarılır
+        valid = ~np.isnan(latest)
+        diagonal = np.diagonal(latest)
+        count = valid.sum() - np.count_nonzero(~np.isnan(diagonal))
+        if count:
+            average[end - 1] = (latest.sum(where=valid) - np.nansum(diagonal)) / count
+
+    beta, market_corr = None, None
+    if benchmark is not None:
+        market = log_returns(benchmark.reindex(data.index).to_numpy(dtype=float)[:, None])[:, 0]
+        beta, market_corr = _rolling_beta(returns, market, window, min_periods)
+
+    return CorrelationMatrix(latest, average, beta, market_corr, data.index, data.columns, window)
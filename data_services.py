@@ -1,86 +1,570 @@
-from curl_cffi import requests
+import numpy as np
 import pandas as pd
-import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils import memoize
+import time
+from async_fetcher import AsyncFetcher, FetchOutcome, FetchReport
+from chart_decoder import BarSeries, DAY_SECONDS, decode_chart_result
+from compact_panel import as_frame
+from constants import (
+    YAHOO_BASE_URL, BATCH_SIZE, UNIVERSES, INTERVAL_LIMITS, DEFAULT_INTERVAL,
+    SERIES_CACHE_MAX_BYTES, DATA_CACHE_TTL
+)
+from utils import memoize, estimate_size, LRUCache
+from instrumentation import timed, span
 
-# Tarayıcı gibi davranan session oluştur
-session = requests.Session(impersonate="chrome")
+# Oturumlar ve hisse evrenleri arasında paylaşılan hisse bazında seri önbelleği
+series_cache = LRUCache(max_bytes=SERIES_CACHE_MAX_BYTES, ttl=DATA_CACHE_TTL, name="series")
+
+def is_intraday(interval):
+    """Aralığın gün içi olup olmadığı"""
+    return interval != "1d"
+
+def split_range(period1, period2, interval=DEFAULT_INTERVAL):
+    """Tarih aralığını Yahoo'nun aralık başına izin verdiği dilimlere böler
+    
+    Returns:
+        (başlangıç, bitiş) timestamp ikilileri listesi
+    """
+    chunk_days = INTERVAL_LIMITS[interval]["chunk_days"]
+    if not chunk_days:
+        return [(period1, period2)]
+    step = chunk_days * DAY_SECONDS
+    return [(start, min(start + step, period2)) for start in range(period1, period2, step)]
+
+def chart_url(ticker, period1, period2, base_url=YAHOO_BASE_URL, interval=DEFAULT_INTERVAL):
+    """Tek hisse için chart uç noktası adresi"""
+    return f"{base_url}/v8/finance/chart/{ticker}?period1={period1}&period2={period2}&interval={interval}"
+
+def spark_url(tickers, period1, period2, base_url=YAHOO_BASE_URL, interval=DEFAULT_INTERVAL):
+    """Birden fazla hisse için spark uç noktası adresi"""
+    symbols = ",".join(tickers)
+    return f"{base_url}/v7/finance/spark?symbols={symbols}&period1={period1}&period2={period2}&interval={interval}"
+
+def parse_chart_result(result, ticker, interval=DEFAULT_INTERVAL):
+    """Yahoo chart yanıtındaki tek bir sonucu BarSeries'e çevirir
+    
+    Args:
+        result: chart/spark yanıtındaki sonuç sözlüğü
+        ticker: Hisse kodu
+        interval: Bar aralığı; gün içi aralıklarda fiyatlar float32 tutulur
+    
+    Returns:
+        OHLCV dizilerini içeren BarSeries
+    """
+    return decode_chart_result(result, ticker, np.float32 if is_intraday(interval) else np.float64)
+
+def parse_spark_response(json_data, interval=DEFAULT_INTERVAL):
+    """Spark yanıtını hisse bazında BarSeries'lere ayırır
+    
+    Returns:
+        Hisse kodu -> BarSeries sözlüğü; çözümlenemeyen hisseler sözlükte yer almaz
+    """
+    results = {}
+    # Bozuk tek bir sonuç diğerlerini etkilemesin
+    for item in json_data['spark']['result'] or []:
+        ticker = item.get('symbol')
+        try:
+            results[ticker] = parse_chart_result(item['response'][0], ticker, interval)
+        except Exception as e:
+            print(f"{ticker} toplu yanıtta çözümlenemedi: {e}")
+    return results
+
+def _merge_outcomes(ticker, outcomes):
+    """Bir hissenin dilim sonuçlarını tek bir FetchOutcome'da birleştirir"""
+    statuses = {outcome.status for outcome in outcomes}
+    status = "failed" if "failed" in statuses else "retried" if "retried" in statuses else "ok"
+    errors = [outcome.error for outcome in outcomes if outcome.error]
+    return FetchOutcome(
+        ticker, status,
+        sum(outcome.attempts for outcome in outcomes),
+        max(outcome.latency for outcome in outcomes),
+        errors[0] if errors else None
+    )
+
+def _fetched_size(result):
+    """(hisse -> seri sözlüğü, ...) döndüren fonksiyonlar için indirilen verinin boyutu"""
+    return estimate_size(result[0])
+
+@timed(payload=_fetched_size)
+def fetch_series(tickers, start_periods, period2, batch=False, base_url=YAHOO_BASE_URL, fetcher=None,
+                 interval=DEFAULT_INTERVAL):
+    """Hisse barlarını asenkron indirir ve hisse bazında sonuç raporu üretir
+    
+    Aralık Yahoo'nun izin verdiği dilimlerden uzunsa her dilim ayrı bir istek
+    olarak paralel indirilir ve sonuçlar hisse bazında birleştirilir.
+    
+    Args:
+        tickers: Hisse kodları listesi
+        start_periods: Hisse kodu -> başlangıç timestamp sözlüğü
+        period2: Bitiş tarihi timestamp
+        batch: True ise önce BATCH_SIZE'lık spark istekleri denenir
+        base_url: Yahoo sunucu adresi (test için yerel sunucu verilebilir)
+        fetcher: Kullanılacak AsyncFetcher, None ise varsayılan ayarlarla oluşturulur
+        interval: Bar aralığı ("1d", "1h", "15m", "5m", "1m")
+    
+    Returns:
+        Tuple: (hisse kodu -> BarSeries sözlüğü, FetchReport)
+    """
+    fetcher = fetcher or AsyncFetcher()
+    start_time = time.perf_counter()
+    chunks = {ticker: split_range(start_periods[ticker], period2, interval) for ticker in tickers}
+    parts = {ticker: [] for ticker in tickers}
+    outcomes = {ticker: [] for ticker in tickers}
+    report = FetchReport()
+    
+    if batch:
+        # Aynı başlangıç zamanına sahip hisseleri gruplayarak toplu iste
+        groups = {}
+        for ticker in tickers:
+            groups.setdefault(start_periods[ticker], []).append(ticker)
+        jobs, members = [], {}
+        for start, group in groups.items():
+            for chunk_start, chunk_end in split_range(start, period2, interval):
+                for i in range(0, len(group), BATCH_SIZE):
+                    members_chunk = group[i:i + BATCH_SIZE]
+                    key = f"spark:{chunk_start}:{i}"
+                    jobs.append((key, spark_url(members_chunk, chunk_start, chunk_end, base_url, interval)))
+                    members[key] = members_chunk
+        with span("fetch_series.download"):
+            responses = fetcher.run(jobs)
+        with span("fetch_series.parse"):
+            for key, (json_data, outcome) in responses.items():
+                if json_data is None:
+                    continue
+                try:
+                    series_by_ticker = parse_spark_response(json_data, interval)
+                except Exception as e:
+                    print(f"Toplu yanıt çözümlenemedi: {e}")
+                    continue
+                for ticker in members[key]:
+                    if ticker in series_by_ticker:
+                        parts[ticker].append(series_by_ticker[ticker])
+                        outcomes[ticker].append(outcome)
+        
+        # Tüm dilimleri toplu yanıtlarda gelmeyen hisseler baştan tek tek indirilir
+        for ticker in tickers:
+            if len(parts[ticker]) < len(chunks[ticker]):
+                parts[ticker], outcomes[ticker] = [], []
+    
+    # Toplu yanıtta eksik kalanlar için hisse başına yola geri dön
+    missing = [ticker for ticker in tickers if not parts[ticker]]
+    jobs = [
+        (f"{ticker}|{i}", chart_url(ticker, chunk_start, chunk_end, base_url, interval))
+        for ticker in missing
+        for i, (chunk_start, chunk_end) in enumerate(chunks[ticker])
+    ]
+    # JSON çözümleme indirme aşamasında, dizilere dönüştürme ayrı ölçülür
+    with span("fetch_series.download"):
+        responses = fetcher.run(jobs)
+    with span("fetch_series.parse"):
+        for key, (json_data, outcome) in responses.items():
+            ticker = key.rsplit("|", 1)[0]
+            if json_data is not None:
+                try:
+                    parts[ticker].append(parse_chart_result(json_data['chart']['result'][0], ticker, interval))
+                except Exception as e:
+                    outcome = FetchOutcome(key, "failed", outcome.attempts, outcome.latency, f"Çözümleme hatası: {e}")
+            outcomes[ticker].append(outcome)
+    
+    fetched = {}
+    for ticker in tickers:
+        report.outcomes[ticker] = _merge_outcomes(ticker, outcomes[ticker])
+        if report.outcomes[ticker].status != "failed" and parts[ticker]:
+            fetched[ticker] = BarSeries.concat(parts[ticker])
+    
+    report.total_seconds = time.perf_counter() - start_time
+    failed = report.failed()
+    if failed:
+        print(f"{len(failed)} hissenin verisi alınamadı: {', '.join(failed)}")
+    return fetched, report
 
 # Veri çekme fonksiyonu
-def fetch_data(ticker, period1, period2):
+def fetch_data(ticker, period1, period2, base_url=YAHOO_BASE_URL, fetcher=None, interval=DEFAULT_INTERVAL):
     """Yahoo Finance'den hisse senedi verilerini çeker
     
     Args:
         ticker: Hisse kodu (örn. "THYAO.IS")
         period1: Başlangıç tarihi timestamp
         period2: Bitiş tarihi timestamp
+        base_url: Yahoo sunucu adresi (test için yerel sunucu verilebilir)
+        fetcher: Kullanılacak AsyncFetcher, None ise varsayılan ayarlarla oluşturulur
+        interval: Bar aralığı
     
     Returns:
         Fiyat serisi veya hata durumunda None
     """
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?period1={period1}&period2={period2}&interval=1d"
-    try:
-        resp = session.get(url)
-        resp.raise_for_status()
-        json_data = resp.json()
-        timestamps = json_data['chart']['result'][0]['timestamp']
-        closes = json_data['chart']['result'][0]['indicators']['quote'][0]['close']
-        dates = [datetime.datetime.fromtimestamp(ts).date() for ts in timestamps]
-        return pd.Series(closes, index=pd.to_datetime(dates), name=ticker)
-    except Exception as e:
-        print(f"{ticker} verisi alınamadı: {e}")
+    fetched, _ = fetch_series([ticker], {ticker: period1}, period2, base_url=base_url,
+                              fetcher=fetcher, interval=interval)
+    if ticker not in fetched:
         return None
+    return fetched[ticker].to_series(daily=not is_intraday(interval))
 
-def get_stock_data(tickers, days=40):
-    """Birden fazla hisse senedi için verileri paralel olarak çeker
+def fetch_batch(tickers, period1, period2, base_url=YAHOO_BASE_URL, fetcher=None, interval=DEFAULT_INTERVAL):
+    """Birden fazla hissenin verisini tek bir spark isteğiyle çeker
     
     Args:
-        tickers: Hisse kodları listesi
-        days: Kaç günlük veri isteniyor
+        tickers: Hisse kodları listesi (en fazla BATCH_SIZE önerilir)
+        period1: Başlangıç tarihi timestamp
+        period2: Bitiş tarihi timestamp
+        base_url: Yahoo sunucu adresi (test için yerel sunucu verilebilir)
+        fetcher: Kullanılacak AsyncFetcher, None ise varsayılan ayarlarla oluşturulur
+        interval: Bar aralığı
     
     Returns:
-        Tüm hisse senetlerinin fiyat verilerini içeren DataFrame
+        Hisse kodu -> fiyat serisi sözlüğü; yanıtta bulunmayan hisseler sözlükte yer almaz
+    """
+    fetcher = fetcher or AsyncFetcher()
+    url = spark_url(tickers, period1, period2, base_url, interval)
+    json_data, outcome = fetcher.run([("spark", url)])["spark"]
+    if json_data is None:
+        print(f"Toplu veri alınamadı ({len(tickers)} hisse): {outcome.error}")
+        return {}
+    return {
+        ticker: bars.to_series(daily=not is_intraday(interval))
+        for ticker, bars in parse_spark_response(json_data, interval).items()
+    }
+
+def _panel_layout(series_by_ticker, tickers, daily=True):
+    """Panel sütunlarını, ortak tarih indeksini ve her sütunun satır konumlarını hesaplar
+    
+    Returns:
+        Tuple: (sütunlar, DatetimeIndex, sütun başına satır indeksleri listesi)
+    """
+    columns = [ticker for ticker in tickers if series_by_ticker.get(ticker) is not None]
+    index_values = []
+    for ticker in columns:
+        item = series_by_ticker[ticker]
+        if isinstance(item, BarSeries):
+            index_values.append(item.index_values(daily))
+        else:
+            index_values.append(item.index.values.astype("datetime64[ns]"))
+    
+    # Ortak tarih indeksi (sıralı ve tekil)
+    index = pd.DatetimeIndex(np.unique(np.concatenate(index_values))) if columns else pd.DatetimeIndex([])
+    rows = [index.searchsorted(values) for values in index_values]
+    return columns, index, rows
+
+def assemble_panel(series_by_ticker, tickers, daily=True):
+    """Hisse serilerini tek seferde ortak tarih indeksli bir DataFrame'e dönüştürür
+    
+    Tüm tarihlerin birleşimi bir kez hesaplanır, değerler önceden ayrılmış
+    tek bir float dizisine yazılır. Sütun sırası giriş listesindeki sırayla aynıdır.
+    
+    Args:
+        series_by_ticker: Hisse kodu -> fiyat serisi veya BarSeries sözlüğü (None değerler atlanır)
+        tickers: Sütun sırasını belirleyen hisse kodları listesi
+        daily: BarSeries zaman damgalarının gün başına yuvarlanıp yuvarlanmayacağı
+    
+    Returns:
+        Fiyat verilerini içeren DataFrame (BarSeries girişlerinde fiyat tipi korunur)
+    """
+    columns, index, rows = _panel_layout(series_by_ticker, tickers, daily)
+    if not columns:
+        return pd.DataFrame()
+    
+    value_arrays = [
+        item.closes if isinstance(item, BarSeries) else item.to_numpy(dtype=float)
+        for item in (series_by_ticker[ticker] for ticker in columns)
+    ]
+    dtype = np.result_type(*value_arrays)
+    
+    values = np.full((len(index), len(columns)), np.nan, dtype=dtype)
+    for j in range(len(columns)):
+        values[rows[j], j] = value_arrays[j]
+    
+    return pd.DataFrame(values, index=index, columns=columns)
+
+def assemble_ohlc_panels(bars_by_ticker, tickers, daily=True):
+    """BarSeries'lerden ortak indeksli Open/High/Low/Close panelleri oluşturur
+    
+    Tarih indeksi ve satır konumları dört panel için bir kez hesaplanır.
+    Bir hissede eksik olan alan NaN olarak kalır.
+    
+    Args:
+        bars_by_ticker: Hisse kodu -> BarSeries sözlüğü (None değerler atlanır)
+        tickers: Sütun sırasını belirleyen hisse kodları listesi
+        daily: Zaman damgalarının gün başına yuvarlanıp yuvarlanmayacağı
+    
+    Returns:
+        "Open", "High", "Low", "Close" -> DataFrame sözlüğü (boşsa boş DataFrame'ler)
+    """
+    fields = {"Open": "opens", "High": "highs", "Low": "lows", "Close": "closes"}
+    columns, index, rows = _panel_layout(bars_by_ticker, tickers, daily)
+    if not columns:
+        return {name: pd.DataFrame() for name in fields}
+    
+    bars = [bars_by_ticker[ticker] for ticker in columns]
+    dtype = np.result_type(*(item.closes for item in bars))
+    panels = {}
+    for name, field in fields.items():
+        values = np.full((len(index), len(columns)), np.nan, dtype=dtype)
+        for j, item in enumerate(bars):
+            field_values = getattr(item, field)
+            if field_values is not None:
+                values[rows[j], j] = field_values
+        panels[name] = pd.DataFrame(values, index=index, columns=columns)
+    return panels
+
+def _slice_from(item, start_date, daily=True):
+    """Fiyat serisinin veya BarSeries'in start_date ve sonrasını döndürür"""
+    if isinstance(item, BarSeries):
+        keep = item.index_values(daily) >= start_date.to_datetime64()
+        return BarSeries(item.ticker, item.timestamps[keep], *(
+            getattr(item, name)[keep] if getattr(item, name) is not None else None
+            for name in ("closes", "opens", "highs", "lows", "volumes")
+        ))
+    return item[item.index >= start_date]
+
+@timed(payload=_fetched_size)
+def _load_bars(tickers, days, store=None, batch=False, base_url=YAHOO_BASE_URL, fetcher=None,
+               interval=DEFAULT_INTERVAL, cache=None, refresh_cache=False, cache_tag=""):
+    """get_stock_data ve get_ohlc_data için ortak yükleme adımı
+    
+    Önbellekteki seriler kullanılır, eksikler (varsa depodaki son bardan
+    sonrası) indirilir ve önbelleğe yazılır. Parametreler get_stock_data ile
+    aynıdır; cache_tag aynı hissenin farklı biçimdeki kayıtlarını ayırır.
+    
+    Returns:
+        Tuple: (hisse kodu -> BarSeries/fiyat serisi sözlüğü, FetchReport, gün içi mi)
     """
+    intraday = is_intraday(interval)
+    max_days = INTERVAL_LIMITS[interval]["max_days"]
+    if max_days:
+        days = min(days, max_days)
+    if intraday:
+        store = None
+    
     # Tarih aralığı
     today = pd.Timestamp.today().normalize()
     now = pd.Timestamp.now()
-    start_date = today - pd.Timedelta(days=days)
+    start_date = (now if intraday else today) - pd.Timedelta(days=days)
     period1 = int(start_date.timestamp())
     period2 = int(now.timestamp())
     
-    # Paralel Veri İndirme
-    all_data = pd.DataFrame()
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_ticker = {executor.submit(fetch_data, ticker, period1, period2): ticker for ticker in tickers}
-        for future in as_completed(future_to_ticker):
-            ticker = future_to_ticker[future]
-            result = future.result()
-            if result is not None:
-                all_data = pd.concat([all_data, result], axis=1)
-                
+    # Önbellekte istenen aralığı kapsayan seriler kullanılır
+    cached = {}
+    if cache is not None and not refresh_cache:
+        for ticker in dict.fromkeys(tickers):
+            hit, value = cache.get(f"{ticker}|{interval}{cache_tag}")
+            if hit and value[0] <= period1:
+                cached[ticker] = _slice_from(value[1], start_date, not intraday)
+    missing = [ticker for ticker in dict.fromkeys(tickers) if ticker not in cached]
+    
+    # Depo varsa her hisse için yalnızca eksik kısmı iste
+    start_periods = {
+        ticker: store.delta_start(ticker, period1) if store is not None else period1
+        for ticker in missing
+    }
+    
+    # Asenkron Veri İndirme
+    fetched, report = fetch_series(missing, start_periods, period2, batch, base_url, fetcher, interval)
+    
+    if store is not None:
+        with span("get_stock_data.store"):
+            for ticker in missing:
+                result = fetched.get(ticker)
+                if result is not None:
+                    result = store.append(ticker, result.to_series(), start_periods[ticker])
+                else:
+                    # İndirme başarısız olsa bile depodaki son veriyi kullan
+                    result = store.load(ticker)
+                if result is not None:
+                    result = result[result.index >= start_date]
+                fetched[ticker] = result
+    
+    if cache is not None:
+        failed = set(report.failed())
+        for ticker in missing:
+            if fetched.get(ticker) is not None and ticker not in failed:
+                cache.put(f"{ticker}|{interval}{cache_tag}", (period1, fetched[ticker]))
+    report.cache_hits = list(cached)
+    report.cache_misses = missing
+    fetched.update(cached)
+    return fetched, report, intraday
+
+@timed(payload=estimate_size)
+def get_stock_data(tickers, days=40, store=None, batch=False, base_url=YAHOO_BASE_URL,
+                   fetcher=None, return_report=False, interval=DEFAULT_INTERVAL, cache=None,
+                   refresh_cache=False):
+    """Birden fazla hisse senedi için verileri paralel olarak çeker
+    
+    Args:
+        tickers: Hisse kodları listesi
+        days: Kaç günlük veri isteniyor (gün içi aralıklarda Yahoo sınırına kırpılır)
+        store: Opsiyonel PriceStore; verilirse yalnızca son kayıtlı bardan
+            sonraki kısım indirilir ve depoya eklenir (yalnızca günlük aralıkta)
+        batch: True ise hisseler BATCH_SIZE'lık gruplar halinde tek istekle
+            çekilir, toplu yanıtta eksik kalanlar tek tek indirilir
+        base_url: Yahoo sunucu adresi (test için yerel sunucu verilebilir)
+        fetcher: Eşzamanlılık, hız sınırı ve tekrar ayarlarını taşıyan AsyncFetcher
+        return_report: True ise (DataFrame, FetchReport) döndürülür
+        interval: Bar aralığı ("1d", "1h", "15m", "5m", "1m")
+        cache: Opsiyonel hisse bazında LRUCache (ör. series_cache); istenen
+            aralığı kapsayan kayıtlı seriler yeniden indirilmez, yalnızca
+            eksik hisseler indirilir
+        refresh_cache: True ise önbellekteki seriler kullanılmaz, tüm hisseler
+            indirilir ve önbellek yeni serilerle güncellenir
+    
+    Returns:
+        Tüm hisse senetlerinin fiyat verilerini içeren DataFrame
+        (return_report=True ise FetchReport ile birlikte)
+    """
+    fetched, report, intraday = _load_bars(
+        tickers, days, store, batch, base_url, fetcher, interval, cache, refresh_cache
+    )
+
+    # Paneli tek seferde oluştur
+    assembly_start = time.perf_counter()
+    with span("get_stock_data.assemble"):
+        all_data = assemble_panel(fetched, tickers, daily=not intraday)
+    report.assembly_seconds = time.perf_counter() - assembly_start
+    
+    if return_report:
+        return all_data, report
     return all_data
 
+def get_ohlc_data(tickers, days=40, base_url=YAHOO_BASE_URL, fetcher=None, return_report=False,
+                  interval=DEFAULT_INTERVAL, cache=None, refresh_cache=False):
+    """Hisselerin açılış, en yüksek, en düşük ve kapanış panellerini çeker
+    
+    Spark uç noktası yalnızca kapanış döndürdüğünden ve fiyat deposu yalnızca
+    kapanış sakladığından hisseler chart uç noktasından tek tek indirilir.
+    Önbellek kayıtları kapanış serilerinden ayrı tutulur.
+    
+    Args:
+        tickers: Hisse kodları listesi
+        days: Kaç günlük veri isteniyor (gün içi aralıklarda Yahoo sınırına kırpılır)
+        base_url: Yahoo sunucu adresi (test için yerel sunucu verilebilir)
+        fetcher: Eşzamanlılık, hız sınırı ve tekrar ayarlarını taşıyan AsyncFetcher
+        return_report: True ise (paneller, FetchReport) döndürülür
+        interval: Bar aralığı ("1d", "1h", "15m", "5m", "1m")
+        cache: Opsiyonel hisse bazında LRUCache (ör. series_cache)
+        refresh_cache: True ise önbellek atlanır ve tüm hisseler indirilir
+    
+    Returns:
+        "Open", "High", "Low", "Close" -> DataFrame sözlüğü
+        (return_report=True ise FetchReport ile birlikte)
+    """
+    fetched, report, intraday = _load_bars(
+        tickers, days, None, False, base_url, fetcher, interval, cache, refresh_cache, cache_tag="|ohlc"
+    )
+    
+    assembly_start = time.perf_counter()
+    with span("get_ohlc_data.assemble"):
+        panels = assemble_ohlc_panels(fetched, tickers, daily=not intraday)
+    report.assembly_seconds = time.perf_counter() - assembly_start
+    
+    if return_report:
+        return panels, report
+    return panels
+
 # Varyasyon katsayısı hesaplama
+@timed(payload=estimate_size)
 def calculate_volatility(data, window=20):
     """Varyasyon katsayısı (Oynaklık) hesaplar
     
     Args:
-        data: Fiyat verileri DataFrame
+        data: Fiyat verileri DataFrame veya CompactPanel
         window: Pencere boyutu (gün)
     
     Returns:
-        Varyasyon katsayısı DataFrame'i
+        Varyasyon katsayısı DataFrame'i (float32 girişte float32)
     """
-    cv_data = data.rolling(window=window).std() / data.rolling(window=window).mean()
-    return cv_data.dropna(how="all")
+    data = as_frame(data)
+    rolling = data.rolling(window=window)
+    cv_data = rolling.std() / rolling.mean()
+    cv_data = cv_data.dropna(how="all")
+    # pandas pencere hesaplarını float64 yapar; float32 panelde sonuç da float32 saklanır
+    if data.shape[1] and (data.dtypes == np.float32).all():
+        return cv_data.astype(np.float32)
+    return cv_data
+
+def select_top_n(series, n, ascending=False):
+    """Serideki en büyük (veya en küçük) n değeri kısmi seçimle bulur
+    
+    Tüm seriyi sıralamak yerine np.argpartition ile n eleman seçilir ve
+    yalnızca bunlar sıralanır; büyük evrenlerde maliyet O(hisse) kalır.
+    NaN değerler atlanır.
+    
+    Args:
+        series: Hisse kodu indeksli değer serisi
+        n: Seçilecek eleman sayısı
+        ascending: True ise en küçük değerler seçilir
+    
+    Returns:
+        Seçilen elemanları sıralı içeren seri
+    """
+    values = series.to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    n = min(n, len(valid))
+    if n <= 0:
+        return series.iloc[:0]
+    
+    keys = values[valid] if ascending else -values[valid]
+    if n < len(valid):
+        candidates = np.argpartition(keys, n - 1)[:n]
+    else:
+        candidates = np.arange(len(valid))
+    order = candidates[np.argsort(keys[candidates], kind="stable")]
+    return series.iloc[valid[order]]
+
+def select_top_bottom(series, k):
+    """Serinin en büyük ve en küçük değerlerinden toplam k tanesini seçer
+    
+    Seri k elemandan kısaysa tamamı azalan sırada döner. Büyük evrenlerde
+    bar grafiklerinin okunabilir ve hafif kalması için kullanılır.
+    
+    Args:
+        series: Hisse kodu indeksli değer serisi
+        k: Gösterilecek toplam eleman sayısı
+    
+    Returns:
+        Azalan sırada seçilmiş seri
+    """
+    if series.count() <= k:
+        return select_top_n(series, k)
+    top = select_top_n(series, k - k // 2)
+    bottom = select_top_n(series, k // 2, ascending=True)
+    return pd.concat([top, bottom.iloc[::-1]])
+
+def get_universe_tickers(universe):
+    """Evren adına göre hisse kodları listesini döndürür
+    
+    Args:
+        universe: UNIVERSES içindeki evren adı
+    
+    Returns:
+        Hisse kodları listesi
+    """
+    source = UNIVERSES[universe]
+    if isinstance(source, list):
+        return source
+    
+    # Dosyadan yüklenen evren: her satırda bir kod, '#' ile başlayanlar yorum
+    with open(source, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+@memoize
+def calculate_volatility_order(cv_data):
+    """Hisseleri ortalama oynaklığa göre azalan sırada döndürür
+    
+    Sonuç veri içeriğine göre önbelleğe alındığından aynı veri için
+    sıralama yalnızca bir kez yapılır.
+    
+    Args:
+        cv_data: Varyasyon katsayısı DataFrame'i
+    
+    Returns:
+        Sıralanmış hisse kodları indeksi
+    """
+    return cv_data.mean().sort_values(ascending=False).index
 
 @memoize
 def calculate_percent_change(data, periods=1, sort=False, ascending=False, multiply_by_100=True):
     """Veri çerçevesindeki yüzde değişimi hesaplar
     
     Args:
-        data: Veri çerçevesi
+        data: Veri çerçevesi veya CompactPanel
         periods: Karşılaştırma dönemi
         sort: Sonuçları sıralamak için
         ascending: Artan sıralama için True, azalan için False
@@ -89,7 +573,10 @@ def calculate_percent_change(data, periods=1, sort=False, ascending=False, multi
     Returns:
         Yüzde değişim serisi
     """
-    changes = data.pct_change(periods=periods).iloc[-1]
+    # Yalnızca son satır gerektiğinden tüm panelin pct_change kopyası oluşturulmaz
+    data = as_frame(data)
+    last = data.iloc[-1]
+    changes = (last / data.iloc[-1 - periods] - 1 if len(data) > periods else last * np.nan).rename(last.name)
     
     if multiply_by_100:
         changes = changes * 100
@@ -103,19 +590,13 @@ def calculate_drawdown(df, price_col='Close'):
     """Zirveden uzaklık (drawdown) hesaplar
     
     Args:
-        df: Fiyat serisini içeren DataFrame
+        df: Fiyat serisini içeren DataFrame veya CompactPanel
         price_col: Fiyat sütununun adı
         
     Returns:
         Peak ve Drawdown sütunları eklenmiş DataFrame
     """
-    # Geçici DataFrame oluştur
-    temp_df = df.copy()
-    
-    # Zirve fiyatları hesapla (kümülatif maksimum)
-    temp_df['Peak'] = temp_df[price_col].cummax()
-    
-    # Zirveden uzaklık (yüzde olarak)
-    temp_df['Drawdown'] = (temp_df[price_col] - temp_df['Peak']) / temp_df['Peak'] * 100
-    
-    return temp_df 
\ No newline at end of file
+    # assign mevcut sütunları kopyalamaz (copy-on-write); yalnızca yeni sütunlar ayrılır
+    prices = as_frame(df)[price_col]
+    peak = prices.cummax()
+    return as_frame(df).assign(Peak=peak, Drawdown=(prices - peak) / peak * 100)
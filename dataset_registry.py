@@ -0,0 +1,109 @@
+"""Oturumların kullandığı anlık görüntü sürümlerinin süreç genelindeki kaydı
+
+Veri oturumlarda kopyalanmaz: anlık görüntüler değişmezdir ve kayıtta
+(anahtar, sürüm) başına tek kopya tutulur. Oturumun session_state'inde
+yalnızca küçük bir DatasetHandle bulunur; handle kendi sürümünün
+Snapshot'ına çözülür ve o sürümü bellekte tutar. Sürüm başına handle sayısı
+tutulur; son handle bırakıldığında (oturum yeni sürüme geçtiğinde veya
+oturum kapanıp handle çöp toplandığında) sürüm kayıttan çıkar. Bellek
+böylece bağlı kullanıcı sayısıyla değil, kullanılan farklı sürüm sayısıyla artar.
+"""
+import threading
+import weakref
+import pandas as pd
+
+class DatasetHandle:
+    """Oturumun kullandığı anlık görüntü sürümüne başvuru (anahtar ve sürüm numarası)
+
+    Handle canlı olduğu sürece kayıt sürümü bellekte tutar. release()
+    çağrılmazsa handle çöp toplandığında sürüm kendiliğinden bırakılır.
+    """
+
+    __slots__ = ("key", "version", "_registry", "_finalizer", "__weakref__")
+
+    def __init__(self, registry, key, version):
+        self.key = key
+        self.version = version
+        self._registry = registry
+        # Geri çağrı handle'ın kendisine başvurmaz; aksi halde handle hiç toplanmaz
+        self._finalizer = weakref.finalize(self, registry._release, key, version)
+
+    @property
+    def snapshot(self):
+        """Handle'ın sabitlediği Snapshot (bırakılmışsa None)"""
+        return self._registry.resolve(self)
+
+    @property
+    def released(self):
+        """Handle'ın sürümü bırakıp bırakmadığı"""
+        return not self._finalizer.alive
+
+    def release(self):
+        """Sürümü bırakır; birden fazla çağrılabilir"""
+        self._finalizer()
+
+class DatasetRegistry:
+    """Sürüm başına handle sayısı tutulan, değişmez anlık görüntü kaydı"""
+
+    def __init__(self):
+        # (anahtar, sürüm) -> [Snapshot, handle sayısı]
+        self._pins = {}
+        # Çöp toplayıcı finalizer'ı kilit tutulurken aynı iş parçacığında çalıştırabilir
+        self._lock = threading.RLock()
+
+    def checkout(self, key, snapshot, handle=None):
+        """Oturumu anlık görüntünün sürümüne geçirir
+
+        Yeni sürüm sabitlenir, oturumun önceki handle'ı bırakılır.
+
+        Args:
+            key: Anlık görüntü anahtarı
+            snapshot: Oturumun bu çalıştırmada kullanacağı Snapshot
+            handle: Oturumun önceki DatasetHandle'ı (yoksa None)
+
+        Returns:
+            (handle, updated): Oturumda saklanacak handle ve aynı anahtarın
+            verisinin önceki çalıştırmadan bu yana yenilenip yenilenmediği
+        """
+        if (handle is not None and not handle.released
+                and handle.key == key and handle.version == snapshot.version):
+            return handle, False
+        with self._lock:
+            pin = self._pins.setdefault((key, snapshot.version), [snapshot, 0])
+            pin[1] += 1
+            new_handle = DatasetHandle(self, key, snapshot.version)
+        updated = handle is not None and handle.key == key and handle.version < snapshot.version
+        if handle is not None:
+            handle.release()
+        return new_handle, updated
+
+    def resolve(self, handle):
+        """Handle'ın sürümünün Snapshot'ı (sürüm bırakılmışsa None)"""
+        if handle.released:
+            return None
+        with self._lock:
+            pin = self._pins.get((handle.key, handle.version))
+        return pin[0] if pin is not None else None
+
+    def _release(self, key, version):
+        """Sürümün handle sayısını azaltır; sıfıra inince sürüm kayıttan çıkar"""
+        with self._lock:
+            pin = self._pins.get((key, version))
+            if pin is None:
+                return
+            pin[1] -= 1
+            if pin[1] <= 0:
+                del self._pins[(key, version)]
+
+    def report(self):
+        """Anahtar ve sürüm başına açık oturum sayısı
+
+        Returns:
+            Sürüm başına bir satır olan DataFrame
+        """
+        with self._lock:
+            pins = [(key, version, count) for (key, version), (_, count) in self._pins.items()]
+        rows = {}
+        for (tickers, days, interval), version, count in pins:
+            rows[f"{len(tickers)} hisse · {days} gün · {interval} · v{version}"] = {"oturum": count}
+        return pd.DataFrame.from_dict(rows, orient="index")
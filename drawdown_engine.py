@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from compact_panel import as_frame, float_values
+from instrumentation import timed
+from utils import memoize
+
+class DrawdownMatrix:
+    """Tüm hisseler için zirve, zirveden uzaklık, süre ve toparlanma matrisleri
+
+    Her matris (tarih × hisse) boyutlu NumPy dizisidir; tek hissenin grafiği
+    için gereken tablo yalnızca sütun seçimiyle elde edilir.
+
+    peak: O ana kadarki en yüksek fiyat
+    drawdown: Fiyatın zirveden yüzde uzaklığı (≤ 0)
+    duration: Son zirveden bu yana geçen bar sayısı (zirvedeyken 0)
+    recovery: Fiyatın o anki zirveye yeniden ulaşmasına kalan bar sayısı
+        (henüz ulaşmadıysa NaN)
+    """
+
+    def __init__(self, prices, peak, drawdown, duration, recovery, index, columns):
+        self.prices = prices
+        self.peak = peak
+        self.drawdown = drawdown
+        self.duration = duration
+        self.recovery = recovery
+        self.index = index
+        self.columns = columns
+        self._column_pos = {column: i for i, column in enumerate(columns)}
+        self._summary = None
+
+    @property
+    def nbytes(self):
+        """Matrislerin toplam bayt boyutu"""
+        return sum(arr.nbytes for arr in (self.prices, self.peak, self.drawdown, self.duration, self.recovery))
+
+    def frame(self, ticker):
+        """Hissenin Close, Peak, Drawdown, Duration ve Recovery sütunlu DataFrame'i
+
+        Sütunlar calculate_drawdown çıktısıyla aynı adlandırılır.
+        """
+        pos = self._column_pos[ticker]
+        return pd.DataFrame({
+            "Close": self.prices[:, pos],
+            "Peak": self.peak[:, pos],
+            "Drawdown": self.drawdown[:, pos],
+            "Duration": self.duration[:, pos],
+            "Recovery": self.recovery[:, pos]
+        }, index=self.index)
+
+    def summary(self):
+        """Hisse bazında özet tablo
+
+        Sütunlar: max_drawdown (%), max_drawdown_date, current_drawdown (%),
+        current_duration (bar), max_duration (bar), recovery_bars (en büyük
+        düşüşün dibinden zirveye dönüş süresi, toparlanmadıysa NaN)
+        """
+        if self._summary is None:
+            n_rows, n_cols = self.drawdown.shape
+            valid = ~np.isnan(self.drawdown)
+            has_data = valid.any(axis=0)
+            cols = np.arange(n_cols)
+
+            # Tamamen boş sütunlarda argmin 0 döner; bu sütunların sonuçları NaN yapılır
+            filled = np.where(valid, self.drawdown, np.inf)
+            trough = filled.argmin(axis=0)
+            last_valid = np.where(valid, np.arange(n_rows)[:, None], -1).max(axis=0)
+            last_row = np.maximum(last_valid, 0)
+
+            def masked(values):
+                return np.where(has_data, values, np.nan)
+
+            self._summary = pd.DataFrame({
+                "max_drawdown": masked(self.drawdown[trough, cols]),
+                "max_drawdown_date": pd.DatetimeIndex(self.index[trough]).where(has_data),
+                "current_drawdown": masked(self.drawdown[last_row, cols]),
+                "current_duration": masked(self.duration[last_row, cols]),
+                "max_duration": masked(np.nanmax(np.where(valid, self.duration, -np.inf), axis=0)),
+                "recovery_bars": masked(self.recovery[trough, cols])
+            }, index=self.columns)
+        return self._summary
+
+    def deepest(self, n, by="max_drawdown"):
+        """En derin düşüşteki n hisse (by: "max_drawdown" veya "current_drawdown")"""
+        return self.summary().dropna(subset=[by]).nsmallest(n, by)
+
+@timed
+@memoize
+def calculate_drawdown_matrix(data):
+    """Tüm hisselerin zirveden uzaklık matrislerini tek vektörel geçişte hesaplar
+
+    Eksik fiyatlar (NaN) zirveyi değiştirmez ve o hücrelerin değerleri NaN
+    olur. Sonuç fiyat panelinin içeriğine göre önbelleğe alınır; aynı anlık
+    görüntü için tekrar hesaplanmaz. float32 panellerde matrisler de float32
+    tutulur.
+
+    Args:
+        data: Fiyat verileri DataFrame veya CompactPanel (satırlar tarih, sütunlar hisse)
+
+    Returns:
+        DrawdownMatrix
+    """
+    prices = float_values(data)
+    dtype = prices.dtype
+    n_rows = len(prices)
+    valid = ~np.isnan(prices)
+    rows = np.arange(n_rows)[:, None]
+
+    # fmax NaN değerleri atlar; eksik fiyatlı hücrelerde zirve NaN gösterilir (cummax gibi)
+    running_peak = np.fmax.accumulate(prices, axis=0) if n_rows else prices.copy()
+    peak = np.where(valid, running_peak, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = (prices - peak) / peak * 100
+
+    # Fiyatın zirvede olduğu satırlar; süre son, toparlanma bir sonraki zirveye göre ölçülür
+    at_peak = valid & (prices >= peak)
+    last_peak = np.maximum.accumulate(np.where(at_peak, rows, -1), axis=0) if n_rows else rows
+    next_peak = (
+        np.minimum.accumulate(np.where(at_peak, rows, n_rows)[::-1], axis=0)[::-1]
+        if n_rows else rows
+    )
+
+    duration = np.where(valid & (last_peak >= 0), rows - last_peak, np.nan).astype(dtype, copy=False)
+    recovery = np.where(valid & (next_peak < n_rows), next_peak - rows, np.nan).astype(dtype, copy=False)
+
+    frame = as_frame(data)
+    return DrawdownMatrix(prices, peak, drawdown, duration, recovery, frame.index, frame.columns)
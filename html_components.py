@@ -1,7 +1,8 @@
 import streamlit as st
 import datetime
 from formatters import (
-    format_datetime
+    format_datetime,
+    format_duration
 )
 # HTML Bileşenleri
 class HtmlComponent:
@@ -45,10 +46,14 @@ class LastUpdateInfo(HtmlComponent):
     """Son güncelleme bilgisi bileşeni"""
     
     @staticmethod
-    def create(last_date, current_time=None):
-        """Son güncelleme bilgisini formatlayan fonksiyon"""
+    def create(last_date, current_time=None, age_seconds=None):
+        """Son güncelleme bilgisini formatlayan fonksiyon
+        
+        age_seconds verilirse gösterilen verinin yaşı da eklenir
+        """
         if current_time is None:
             current_time = datetime.datetime.now()
             
         update_time = format_datetime(current_time.replace(year=last_date.year, month=last_date.month, day=last_date.day))
-        return f'<div class="last-update">Son güncelleme: {update_time}</div>'
+        age_text = f' · Veri yaşı: {format_duration(age_seconds)}' if age_seconds is not None else ''
+        return f'<div class="last-update">Son güncelleme: {update_time}{age_text}</div>'
@@ -0,0 +1,252 @@
+"""Sıcak yollar için aşama bazında süre, önbellek ve yük boyutu ölçümü
+
+Fonksiyonlar @timed ile, kod blokları span() ile işaretlenir. Ölçüm
+kapalıyken sarmalayıcı yalnızca tek bir bayrak kontrolü yapar. Açıkken
+her çağrı kayıt defterine eklenir, istenirse JSON log satırı olarak
+yazılır; toplamlar Prometheus metin biçiminde dosyaya aktarılabilir.
+
+Ölçüm INSTRUMENTATION_ENABLED sabiti veya BIST_INSTRUMENTATION=1 ortam
+değişkeniyle açılır.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from constants import (
+    INSTRUMENTATION_ENABLED, METRICS_LOG_JSON, METRICS_PROM_FILE, METRICS_RECENT_CALLS
+)
+from utils import CACHE_REGISTRY
+
+logger = logging.getLogger("bist.metrics")
+
+_enabled = INSTRUMENTATION_ENABLED or os.environ.get("BIST_INSTRUMENTATION") == "1"
+_local = threading.local()
+
+@dataclass
+class StageStats:
+    """Bir aşamanın birikmiş ölçümleri"""
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    payload_bytes: int = 0
+    last_payload_bytes: int = 0
+
+class MetricsRegistry:
+    """Aşama adı -> StageStats kayıtlarını iş parçacığı güvenli tutar"""
+
+    def __init__(self, recent_calls=METRICS_RECENT_CALLS):
+        self._stages = {}
+        self._recent = deque(maxlen=recent_calls)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, error=False, cache_hit=None, payload_bytes=None):
+        """Tek bir çağrının ölçümünü ekler"""
+        event = {
+            "ts": round(time.time(), 3),
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "error": error,
+            "cache_hit": cache_hit,
+            "payload_bytes": payload_bytes
+        }
+        with self._lock:
+            stats = self._stages.setdefault(stage, StageStats())
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.last_seconds = seconds
+            if cache_hit is not None:
+                stats.cache_hits += int(cache_hit)
+                stats.cache_misses += int(not cache_hit)
+            if payload_bytes is not None:
+                stats.payload_bytes += payload_bytes
+                stats.last_payload_bytes = payload_bytes
+            self._recent.append(event)
+        if METRICS_LOG_JSON:
+            logger.info(json.dumps(event))
+
+    def snapshot(self):
+        """Aşama adı -> istatistik sözlüğü kopyası"""
+        with self._lock:
+            return {stage: asdict(stats) for stage, stats in self._stages.items()}
+
+    def recent(self):
+        """Son çağrıların olay listesi (eskiden yeniye)"""
+        with self._lock:
+            return list(self._recent)
+
+    def reset(self):
+        """Tüm ölçümleri siler"""
+        with self._lock:
+            self._stages.clear()
+            self._recent.clear()
+
+    def to_prometheus(self):
+        """Ölçümleri ve önbellek istatistiklerini Prometheus metin biçiminde döndürür"""
+        stage_metrics = [
+            ("bist_stage_calls_total", "counter", "Aşama çağrı sayısı", "calls"),
+            ("bist_stage_errors_total", "counter", "Hata ile biten çağrı sayısı", "errors"),
+            ("bist_stage_seconds_total", "counter", "Aşamada geçen toplam süre", "total_seconds"),
+            ("bist_stage_seconds_max", "gauge", "En uzun tek çağrı süresi", "max_seconds"),
+            ("bist_stage_seconds_last", "gauge", "Son çağrının süresi", "last_seconds"),
+            ("bist_stage_cache_hits_total", "counter", "Önbellekten dönen çağrılar", "cache_hits"),
+            ("bist_stage_cache_misses_total", "counter", "Önbellekte bulunamayan çağrılar", "cache_misses"),
+            ("bist_stage_payload_bytes_total", "counter", "Üretilen toplam yük", "payload_bytes"),
+            ("bist_stage_payload_bytes_last", "gauge", "Son çağrının yükü", "last_payload_bytes"),
+        ]
+        snapshot = self.snapshot()
+        lines = []
+        for metric, kind, help_text, field in stage_metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for stage, stats in sorted(snapshot.items()):
+                lines.append(f'{metric}{{stage="{_escape_label(stage)}"}} {stats[field]}')
+
+        cache_stats = {name: cache.stats() for name, cache in list(CACHE_REGISTRY.items())}
+        for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                            ("entries", "gauge"), ("bytes", "gauge")):
+            metric = f"bist_cache_{field}" + ("_total" if kind == "counter" else "")
+            lines.append(f"# HELP {metric} LRU önbelleği {field}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stats in sorted(cache_stats.items()):
+                lines.append(f'{metric}{{cache="{_escape_label(name)}"}} {stats[field]}')
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+registry = MetricsRegistry()
+
+def is_enabled():
+    """Ölçümün açık olup olmadığı"""
+    return _enabled
+
+def set_enabled(enabled):
+    """Ölçümü çalışma sırasında açar veya kapatır"""
+    global _enabled
+    _enabled = bool(enabled)
+    if _enabled and METRICS_LOG_JSON and not logger.handlers:
+        # Uygulama kendi log yapılandırmasını kurmadıysa satırları stderr'e yaz
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+class _Span:
+    """Bir kod bloğunu ölçer; iç içe çağrılar annotate() ile bilgi ekleyebilir"""
+
+    __slots__ = ("stage", "cache_hit", "payload_bytes", "_start")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.cache_hit = None
+        self.payload_bytes = None
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        _local.stack.pop()
+        registry.record(self.stage, seconds, exc_type is not None, self.cache_hit, self.payload_bytes)
+        return False
+
+class _NullSpan:
+    """Ölçüm kapalıyken kullanılan boş bağlam"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(stage):
+    """Kod bloğunu aşama adıyla ölçen bağlam yöneticisi
+
+    Kullanım:
+    with span("fetch_series.parse"):
+        ...
+    """
+    return _Span(stage) if _enabled else _NULL_SPAN
+
+def annotate(cache_hit=None, payload_bytes=None):
+    """Çalışmakta olan en içteki ölçüme önbellek ve yük bilgisi ekler"""
+    if not _enabled:
+        return
+    stack = getattr(_local, "stack", None)
+    if not stack:
+        return
+    current = stack[-1]
+    if cache_hit is not None:
+        current.cache_hit = cache_hit
+    if payload_bytes is not None:
+        current.payload_bytes = payload_bytes
+
+def timed(func=None, *, stage=None, payload=None):
+    """Fonksiyon çağrılarını ölçen dekoratör
+
+    Kullanım:
+    @timed
+    def f(...): ...
+
+    @timed(payload=estimate_size)
+    def g(...): ...
+
+    Args:
+        func: Ölçülecek fonksiyon
+        stage: Aşama adı, None ise fonksiyonun nitelikli adı
+        payload: Verilirse sonucun bayt boyutunu hesaplayan fonksiyon
+            (yalnızca ölçüm açıkken çağrılır)
+    """
+    if func is None:
+        return lambda f: timed(f, stage=stage, payload=payload)
+
+    name = stage or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _Span(name) as current:
+            result = func(*args, **kwargs)
+            if payload is not None and current.payload_bytes is None:
+                current.payload_bytes = payload(result)
+        return result
+    return wrapper
+
+def write_prometheus(path=METRICS_PROM_FILE):
+    """Ölçümleri Prometheus metin dosyasına yazar (node_exporter textfile biçimi)
+
+    Yarım yazılmış dosya okunmasın diye önce geçici dosyaya yazılır.
+    """
+    if not _enabled:
+        return
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(registry.to_prometheus())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Metrik dosyası yazılamadı: {e}")
+
+# Ortam değişkeniyle açıldıysa log ayarlarını da hazırla
+if _enabled:
+    set_enabled(True)
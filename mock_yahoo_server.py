@@ -0,0 +1,196 @@
+"""Yahoo Finance chart/spark uç noktalarını taklit eden yerel HTTP sunucusu
+
+İnternet bağlantısı olmadan veri katmanını denemek için sentetik fiyat
+serileri üretir. Tek başına çalıştırılabilir:
+
+    python mock_yahoo_server.py --port 8765
+
+ve ardından data_services fonksiyonlarına base_url="http://127.0.0.1:8765"
+verilerek kullanılabilir.
+"""
+import argparse
+import json
+import threading
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+DAY_SECONDS = 86400
+# BIST seans açılışı (UTC 07:00) civarında bar zaman damgası
+BAR_OFFSET_SECONDS = 7 * 3600
+# Seans süresi (07:00-15:00 UTC) ve gün içi aralıkların saniye karşılıkları
+SESSION_SECONDS = 8 * 3600
+INTERVAL_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+# Fiyat yolunun sabitlendiği gün (2024-01-01, epoch gün)
+ANCHOR_DAY = 19723
+
+def _uniform(seed, stream, keys):
+    """Tohum, akış ve anahtara (mutlak gün veya bar zamanı) bağlı [0, 1) değerler
+
+    splitmix64 karıştırıcısıyla her anahtar için bağımsız hesaplanır; bu
+    yüzden aynı gün veya bar, istenen aralıktan bağımsız olarak hep aynı
+    değeri alır.
+    """
+    with np.errstate(over="ignore"):
+        z = np.asarray(keys, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        z ^= np.uint64((seed << 8) | stream)
+        z += np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)) * 2.0 ** -53
+
+def _normal(seed, stream, keys):
+    """_uniform değerlerinden Box-Muller ile standart normal değerler"""
+    u1 = _uniform(seed, 2 * stream, keys)
+    u2 = _uniform(seed, 2 * stream + 1, keys)
+    return np.sqrt(-2 * np.log1p(-u1)) * np.cos(2 * np.pi * u2)
+
+def synthetic_chart(ticker, period1, period2, interval="1d"):
+    """Hisse koduna göre deterministik rastgele yürüyüş fiyatları üretir
+
+    Args:
+        ticker: Hisse kodu (rastgele tohum olarak kullanılır)
+        period1: Başlangıç zaman damgası
+        period2: Bitiş zaman damgası
+        interval: Bar aralığı; gün içi aralıklarda seans boyunca barlar üretilir
+
+    Returns:
+        Yahoo chart yanıtındaki "result" öğesi biçiminde sözlük
+    """
+    first_day = period1 // DAY_SECONDS
+    last_day = period2 // DAY_SECONDS
+    days = np.arange(first_day, last_day + 1)
+    # Hafta sonlarını atla (1 Ocak 1970 Perşembe)
+    days = days[(days + 3) % 7 < 5]
+    timestamps = days * DAY_SECONDS + BAR_OFFSET_SECONDS
+
+    # Tüm rastgele değerler mutlak gün/bar zamanına bağlıdır; böylece çakışan
+    # aralıklar aynı gün için aynı fiyatları verir
+    seed = zlib.crc32(ticker.encode())
+    base = 10 + 490 * _uniform(seed, 0, [0])[0]
+    # Yürüyüş sabit bir gün (ANCHOR_DAY) etrafında kurulur; fiyat o gün base'tir
+    drift = 0.02 * _normal(seed, 1, np.arange(int(max(last_day, ANCHOR_DAY)) + 1))
+    walk = np.cumsum(drift)
+    closes = base * np.exp(walk[days] - walk[ANCHOR_DAY])
+
+    step = INTERVAL_SECONDS.get(interval)
+    if step:
+        # Her günün kapanışına doğru seans içi rastgele yürüyüş
+        offsets = np.arange(0, SESSION_SECONDS, step)
+        timestamps = (timestamps[:, None] + offsets[None, :]).ravel()
+        noise = (0.002 * _normal(seed, 2, timestamps.reshape(len(days), len(offsets)))).cumsum(axis=1)
+        closes = (closes[:, None] * np.exp(noise - noise[:, -1:])).ravel()
+        in_range = (timestamps >= period1) & (timestamps < period2)
+        timestamps, closes = timestamps[in_range], closes[in_range]
+
+    opens = closes * (1 + 0.005 * _normal(seed, 3, timestamps))
+    highs = np.maximum(opens, closes) * (1 + np.abs(0.01 * _normal(seed, 4, timestamps)))
+    lows = np.minimum(opens, closes) * (1 - np.abs(0.01 * _normal(seed, 5, timestamps)))
+    volumes = (1e5 + (1e7 - 1e5) * _uniform(seed, 12, timestamps)).astype(np.int64)
+
+    return {
+        "meta": {"symbol": ticker, "currency": "TRY", "gmtoffset": 10800, "timezone": "TRT"},
+        "timestamp": timestamps.tolist(),
+        "indicators": {
+            "quote": [{
+                "open": np.round(opens, 2).tolist(),
+                "high": np.round(highs, 2).tolist(),
+                "low": np.round(lows, 2).tolist(),
+                "close": np.round(closes, 2).tolist(),
+                "volume": volumes.tolist()
+            }]
+        }
+    }
+
+class MockYahooHandler(BaseHTTPRequestHandler):
+    """chart ve spark isteklerini sentetik veriyle yanıtlar"""
+
+    # Spark yanıtından bilerek çıkarılacak hisseler (yedek yolu denemek için)
+    spark_missing = set()
+    # Hiç veri döndürülmeyecek hisseler
+    unknown = set()
+    # Her adres için ilk N isteğe 429 dön (hız sınırlamasını taklit eder)
+    throttle_first = 0
+    _request_counts = None
+    _counts_lock = threading.Lock()
+
+    def _is_throttled(self):
+        if not self.throttle_first:
+            return False
+        with self._counts_lock:
+            count = self._request_counts.get(self.path, 0) + 1
+            self._request_counts[self.path] = count
+        return count <= self.throttle_first
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        period1 = int(query.get("period1", ["0"])[0])
+        period2 = int(query.get("period2", ["0"])[0])
+        interval = query.get("interval", ["1d"])[0]
+
+        if self._is_throttled():
+            self._send_json(429, {"error": "Too Many Requests"})
+            return
+
+        if parsed.path.startswith("/v8/finance/chart/"):
+            ticker = parsed.path.rsplit("/", 1)[-1]
+            if ticker in self.unknown:
+                self._send_json(404, {"chart": {"result": None, "error": {"code": "Not Found"}}})
+                return
+            self._send_json(200, {"chart": {"result": [synthetic_chart(ticker, period1, period2, interval)], "error": None}})
+        elif parsed.path == "/v7/finance/spark":
+            symbols = [s for s in query.get("symbols", [""])[0].split(",") if s]
+            result = [
+                {"symbol": ticker, "response": [synthetic_chart(ticker, period1, period2, interval)]}
+                for ticker in symbols
+                if ticker not in self.spark_missing and ticker not in self.unknown
+            ]
+            self._send_json(200, {"spark": {"result": result, "error": None}})
+        else:
+            self._send_json(404, {"error": "unknown endpoint"})
+
+    def log_message(self, format, *args):
+        # Test çıktısını kirletmemek için istek loglarını bastır
+        pass
+
+def start_mock_server(port=0, spark_missing=(), unknown=(), throttle_first=0):
+    """Sunucuyu arka plan iş parçacığında başlatır
+
+    Args:
+        port: Dinlenecek port (0 ise boş bir port seçilir)
+        spark_missing: Spark yanıtından çıkarılacak hisse kodları
+        unknown: Hiç veri döndürülmeyecek hisse kodları
+        throttle_first: Her adres için 429 ile reddedilecek ilk istek sayısı
+
+    Returns:
+        Tuple: (sunucu nesnesi, base_url)
+    """
+    handler = type("ConfiguredMockYahooHandler", (MockYahooHandler,), {
+        "spark_missing": set(spark_missing),
+        "unknown": set(unknown),
+        "throttle_first": throttle_first,
+        "_request_counts": {}
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yerel Yahoo Finance taklit sunucusu")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), MockYahooHandler)
+    print(f"Sunucu çalışıyor: http://127.0.0.1:{args.port}")
+    server.serve_forever()
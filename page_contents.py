@@ -10,12 +10,22 @@ from visualizations_advanced import (
     plot_return_analysis,
     plot_volatility_vs_return,
     plot_sharpe_ratio,
-    plot_price_drawdown
+    plot_price_drawdown,
+    plot_deepest_drawdowns,
+    plot_correlation_heatmap,
+    plot_average_correlation,
+    plot_beta
 )
-from formatters import clean_ticker
-from data_services import calculate_percent_change
+from formatters import clean_ticker, clean_ticker_series
+from data_services import calculate_percent_change, select_top_n
+from drawdown_engine import calculate_drawdown_matrix
+from correlation_engine import calculate_correlation
 from utils import memoize, extract_page_title
 from html_components import LastUpdateInfo
+from constants import (
+    LAZY_TABS, VOLATILITY_ESTIMATORS, DEFAULT_ESTIMATOR, BENCHMARK_TICKER, CORRELATION_TOP_PAIRS
+)
+from instrumentation import timed
 import datetime
 
 # Önbelleğe alınmış fonksiyonlar
@@ -27,10 +37,16 @@ def get_daily_change(all_data):
 class TabManager:
     """Tab oluşturma ve yönetme işlemleri için yardımcı sınıf"""
     
-    def __init__(self, all_data, cv_data, window_size, top_n):
-        """Gerekli parametrelerle başlatıcı fonksiyon"""
+    def __init__(self, all_data, cv_data, window_size, top_n, estimator=DEFAULT_ESTIMATOR, benchmark=None):
+        """Gerekli parametrelerle başlatıcı fonksiyon
+        
+        cv_data, estimator ile seçilen yöntemin oynaklık değerleridir.
+        benchmark, beta hesabı için endeks (BENCHMARK_TICKER) fiyat serisidir.
+        """
         self.all_data = all_data
+        self.benchmark = benchmark
         self.cv_data = cv_data
+        self.estimator = estimator
         self.window_size = window_size
         self.top_n = top_n
         self.daily_change = get_daily_change(all_data)
@@ -44,18 +60,34 @@ class TabManager:
             {"id": 4, "name": "📈 Getiri Analizi", "handler": self.handle_return_analysis},
             {"id": 5, "name": "⚖️ Oynaklık vs Getiri", "handler": self.handle_volatility_vs_return},
             {"id": 6, "name": "📋 Risk-Getiri Analizi", "handler": self.handle_sharpe_ratio},
-            {"id": 7, "name": "🏔️ Zirveden Uzaklık", "handler": self.handle_price_drawdown}
+            {"id": 7, "name": "🏔️ Zirveden Uzaklık", "handler": self.handle_price_drawdown},
+            {"id": 8, "name": "🔗 Korelasyon", "handler": self.handle_correlation}
         ]
     
-    def create_tabs(self):
-        """Sekmeleri oluştur ve yönet"""
+    def create_tabs(self, lazy=LAZY_TABS):
+        """Sekmeleri oluştur ve yönet
+        
+        Args:
+            lazy: True ise yalnızca seçili sekmenin içeriği hesaplanır ve
+                gönderilir; diğer sekmeler seçildiklerinde oluşturulur
+        """
         tab_names = [tab["name"] for tab in self.tabs_config]
-        tabs = st.tabs(tab_names)
+        if lazy:
+            try:
+                # Seçili sekme değiştiğinde sayfa yeniden çalışır, tab.open aktif sekmeyi bildirir
+                tabs = st.tabs(tab_names, key="active_tab", on_change="rerun")
+            except TypeError:
+                # Sekme durumu takibini desteklemeyen eski Streamlit sürümleri
+                tabs = st.tabs(tab_names)
+        else:
+            tabs = st.tabs(tab_names)
         
         # Tab içeriklerini işle
         for tab_config in self.tabs_config:
-            tab_id = tab_config["id"]
-            with tabs[tab_id]:
+            tab = tabs[tab_config["id"]]
+            if lazy and getattr(tab, "open", True) is False:
+                continue
+            with tab:
                 tab_config["handler"]()
     
     def show_figure_with_info(self, fig, info_text):
@@ -65,43 +97,49 @@ class TabManager:
             st.markdown(info_text, unsafe_allow_html=True)
     
     # Tab içerik işleyicileri
+    @timed
     def handle_market_summary(self):
         """Piyasa Özeti Sekmesi işleyicisi"""
-        info_text0 = plot_market_summary(self.all_data, self.cv_data)
+        info_text0 = plot_market_summary(self.all_data, self.cv_data, estimator=self.estimator)
         with st.expander("ℹ️ Bilgi"):
             st.markdown(info_text0, unsafe_allow_html=True)
     
+    @timed
     def handle_volatile_stocks(self):
         """En Oynak Hisseler Sekmesi işleyicisi"""
-        fig1, info_text1 = plot_top_volatile_stocks(self.cv_data, top_n=self.top_n)
+        fig1, info_text1 = plot_top_volatile_stocks(self.cv_data, top_n=self.top_n, estimator=self.estimator)
         self.show_figure_with_info(fig1, info_text1)
         
         # Detaylı bilgi tablosu ekle
         st.markdown("#### En Oynak Hisseler Detayı", unsafe_allow_html=True)
         
         last_date = self.cv_data.index[-1]
-        top_stocks = self.cv_data.loc[last_date].sort_values(ascending=False).head(self.top_n)
+        top_stocks = select_top_n(self.cv_data.loc[last_date], self.top_n)
         
-        # Hisselerin detaylı bilgileri
+        # Hisselerin detaylı bilgileri - sütun bazında vektörel seçim
+        method = VOLATILITY_ESTIMATORS[self.estimator]
         stocks_detail = pd.DataFrame({
-            'Hisse': [clean_ticker(stock) for stock in top_stocks.index],
-            'Varyasyon Katsayısı': top_stocks.values.round(4),
-            'Son Fiyat': [self.all_data[stock].iloc[-1] for stock in top_stocks.index],
-            'Değişim (%)': [self.daily_change[stock] for stock in top_stocks.index]
+            'Hisse': clean_ticker_series(top_stocks.index),
+            method['axis_label']: top_stocks.values.round(method['precision']),
+            'Son Fiyat': self.all_data[top_stocks.index].iloc[-1].to_numpy(),
+            'Değişim (%)': self.daily_change.reindex(top_stocks.index).to_numpy()
         })
         
         st.dataframe(stocks_detail, use_container_width=True, hide_index=True)
     
+    @timed
     def handle_heatmap(self):
         """Isı Haritası Sekmesi işleyicisi"""
-        fig2, info_text2 = plot_volatility_heatmap(self.cv_data)
+        fig2, info_text2 = plot_volatility_heatmap(self.cv_data, estimator=self.estimator)
         self.show_figure_with_info(fig2, info_text2)
     
+    @timed
     def handle_last_day_volatility(self):
         """Son Gün Oynaklık Sekmesi işleyicisi"""
-        fig3, info_text3 = plot_last_day_volatility(self.cv_data, window=self.window_size)
+        fig3, info_text3 = plot_last_day_volatility(self.cv_data, window=self.window_size, estimator=self.estimator)
         self.show_figure_with_info(fig3, info_text3)
     
+    @timed
     def handle_return_analysis(self):
         """Getiri Analizi Sekmesi işleyicisi"""
         period_options = {"1 Hafta": 5, "2 Hafta": 10, "1 Ay": 20, "3 Ay": 60}
@@ -113,18 +151,36 @@ class TabManager:
         fig4, info_text4 = plot_return_analysis(self.all_data, periods=period_options[selected_period])
         self.show_figure_with_info(fig4, info_text4)
     
+    @timed
     def handle_volatility_vs_return(self):
         """Oynaklık vs Getiri Sekmesi işleyicisi"""
         fig5, info_text5 = plot_volatility_vs_return(self.cv_data, self.all_data, periods=self.window_size)
         self.show_figure_with_info(fig5, info_text5)
     
+    @timed
     def handle_sharpe_ratio(self):
         """Risk-Getiri Analizi Sekmesi işleyicisi"""
         fig6, info_text6 = plot_sharpe_ratio(self.cv_data, self.all_data, periods=self.window_size)
         self.show_figure_with_info(fig6, info_text6)
     
+    @timed
     def handle_price_drawdown(self):
         """Zirveden Uzaklık Sekmesi işleyicisi"""
+        # Evren genelinde en derin düşüşler (hisse grafiğiyle aynı matrislerden)
+        fig_deepest, info_text_deepest = plot_deepest_drawdowns(self.all_data, top_n=self.top_n)
+        self.show_figure_with_info(fig_deepest, info_text_deepest)
+        
+        deepest = calculate_drawdown_matrix(self.all_data).deepest(self.top_n)
+        deepest_detail = pd.DataFrame({
+            'Hisse': clean_ticker_series(deepest.index),
+            'En Büyük Düşüş (%)': deepest['max_drawdown'].round(2).to_numpy(),
+            'Tarih': deepest['max_drawdown_date'].dt.strftime('%d.%m.%Y').to_numpy(),
+            'Şu Anki Uzaklık (%)': deepest['current_drawdown'].round(2).to_numpy(),
+            'Zirveden Beri (Bar)': deepest['current_duration'].to_numpy(),
+            'Toparlanma (Bar)': deepest['recovery_bars'].to_numpy()
+        })
+        st.dataframe(deepest_detail, use_container_width=True, hide_index=True)
+        
         # Hisse seçimi
         selected_stock = st.selectbox(
             "Hisse Senedi", 
@@ -135,15 +191,58 @@ class TabManager:
         fig7, info_text7 = plot_price_drawdown(self.all_data, selected_stock)
         self.show_figure_with_info(fig7, info_text7)
 
-def show_market_overview(all_data, cv_data, window_size, top_n):
+    @timed
+    def handle_correlation(self):
+        """Korelasyon Sekmesi işleyicisi"""
+        fig8, info_text8 = plot_correlation_heatmap(self.all_data, self.window_size, self.benchmark)
+        self.show_figure_with_info(fig8, info_text8)
+        
+        fig9, info_text9 = plot_average_correlation(self.all_data, self.window_size, self.benchmark)
+        self.show_figure_with_info(fig9, info_text9)
+        
+        # En yüksek korelasyonlu hisse çiftleri (grafiklerle aynı matristen)
+        correlation = calculate_correlation(self.all_data, self.window_size, self.benchmark)
+        st.markdown("#### En Yüksek Korelasyonlu Hisse Çiftleri", unsafe_allow_html=True)
+        pairs = correlation.top_pairs(CORRELATION_TOP_PAIRS)
+        pairs_detail = pd.DataFrame({
+            'Hisse 1': clean_ticker_series(pairs['first']).to_numpy(),
+            'Hisse 2': clean_ticker_series(pairs['second']).to_numpy(),
+            'Korelasyon': pairs['correlation'].round(3).to_numpy()
+        })
+        st.dataframe(pairs_detail, use_container_width=True, hide_index=True)
+        
+        if not correlation.has_benchmark:
+            st.info(f"ℹ️ {clean_ticker(BENCHMARK_TICKER)} verisi alınamadığı için beta hesaplanamadı.")
+            return
+        
+        fig10, info_text10 = plot_beta(self.all_data, self.benchmark, self.window_size)
+        self.show_figure_with_info(fig10, info_text10)
+        
+        # Betası en yüksek hisseler
+        summary = correlation.summary().dropna(subset=['beta']).nlargest(self.top_n, 'beta')
+        beta_detail = pd.DataFrame({
+            'Hisse': clean_ticker_series(summary.index),
+            'Beta': summary['beta'].round(2).to_numpy(),
+            f'{clean_ticker(BENCHMARK_TICKER)} Korelasyonu': summary['market_corr'].round(3).to_numpy(),
+            'Ortalama Korelasyon': summary['mean_corr'].round(3).to_numpy()
+        })
+        st.dataframe(beta_detail, use_container_width=True, hide_index=True)
+
+def show_market_overview(all_data, cv_data, window_size, top_n, estimator=DEFAULT_ESTIMATOR, benchmark=None):
     """Piyasa genel görünümünü göster"""
     # Tab yöneticisini başlat ve tabları göster
-    tab_manager = TabManager(all_data, cv_data, window_size, top_n)
+    tab_manager = TabManager(all_data, cv_data, window_size, top_n, estimator, benchmark)
     tab_manager.create_tabs()
 
 # Ana içerik yönetimi
-def render_page(page, all_data, cv_data, window_size, top_n):
-    """Sayfayı oluştur ve görüntüle"""
+def render_page(page, all_data, cv_data, window_size, top_n, data_age=None, estimator=DEFAULT_ESTIMATOR,
+                benchmark=None):
+    """Sayfayı oluştur ve görüntüle
+    
+    data_age: Gösterilen anlık görüntünün yaşı (saniye), verilirse başlıkta gösterilir
+    estimator: cv_data'nın hesaplandığı oynaklık tahmin yöntemi
+    benchmark: Beta hesabı için endeks fiyat serisi (yoksa None)
+    """
     # Sayfa başlığı ve içerik
     page_title = extract_page_title(page)
     
@@ -151,10 +250,10 @@ def render_page(page, all_data, cv_data, window_size, top_n):
     if not all_data.empty:
         last_date = all_data.index[-1]
         current_time = datetime.datetime.now()
-        st.markdown(LastUpdateInfo.create(last_date, current_time), unsafe_allow_html=True)
+        st.markdown(LastUpdateInfo.create(last_date, current_time, data_age), unsafe_allow_html=True)
     
     # Ana sayfa başlığı
     st.markdown(f'<h1 class="main-header">{page_title}</h1>', unsafe_allow_html=True)
     
     # İçeriği göster
-    show_market_overview(all_data, cv_data, window_size, top_n) 
\ No newline at end of file
+    show_market_overview(all_data, cv_data, window_size, top_n, estimator, benchmark) 
\ No newline at end of file
@@ -0,0 +1,486 @@
+"""Fiyat verisini ve oynaklık küpünü arka planda yenileyen ön yükleyici
+
+Kullanıcı isteği ağ beklemez: her (hisseler, gün, bar aralığı) anahtarı için
+son başarılı anlık görüntü hemen döndürülür. Anlık görüntü eskimişse yine
+de sunulur ve yenilemesi arka plan iş parçacığına bırakılır
+(stale-while-revalidate). Yeni anlık görüntü tamamen hazırlandıktan sonra
+tek bir referans atamasıyla eskisinin yerine geçer.
+"""
+import threading
+import time
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from async_fetcher import FetchReport
+from constants import (
+    PREFETCH_JOBS, PREFETCH_REFRESH_SECONDS, PREFETCH_MAX_KEYS, PREFETCH_IDLE_SECONDS,
+    USE_BATCH_FETCH, YAHOO_BASE_URL, WINDOW_MIN, WINDOW_MAX, DEFAULT_WINDOW_SIZE, BENCHMARK_TICKER,
+    USE_COMPACT_PANELS
+)
+from compact_panel import CompactPanel
+from correlation_engine import calculate_correlation
+from data_services import get_stock_data, get_ohlc_data, get_universe_tickers
+from drawdown_engine import calculate_drawdown_matrix
+from instrumentation import span
+from volatility_engine import (
+    VolatilityCube, EwmaVolatility, OHLC_ESTIMATORS, calculate_volatility_cube, calculate_estimator_cubes
+)
+
+_version_lock = threading.Lock()
+_last_version = 0
+
+def next_version():
+    """Süreç içinde tekil ve artan anlık görüntü sürüm numarası
+
+    Sürüm oluşturulma zamanıdır (ns). Paylaşılan anlık görüntülerin sürümü
+    de yayımlanma zamanı olduğundan süreç içi ve paylaşılan sürümler aynı
+    ölçekte karşılaştırılabilir.
+    """
+    global _last_version
+    with _version_lock:
+        _last_version = max(time.time_ns(), _last_version + 1)
+        return _last_version
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Bir anahtar için fiyat paneli, oynaklık küpleri ve indirme raporu
+
+    estimator_cubes ve ohlc_report yalnızca OHLC tabanlı yöntemler
+    istendiyse doludur. EWMA kapanış fiyatlarından artımlı hesaplandığından
+    durumu anlık görüntüde değil Prefetcher'da tutulur. benchmark, beta
+    hesabı için endeks (BENCHMARK_TICKER) kapanışlarıdır; alınamazsa None.
+    panel doluysa data, panelin float32 tamponunu kopyalamadan kullanan
+    DataFrame görünümüdür. Süreçler arası paylaşımda (shared_snapshot)
+    panel ve küplerin dizileri salt okunur memmap'tir.
+    """
+    data: pd.DataFrame
+    vol_cube: VolatilityCube
+    report: FetchReport
+    created_at: float
+    version: int
+    estimator_cubes: dict = None
+    ohlc_report: FetchReport = None
+    benchmark: pd.Series = None
+    panel: CompactPanel = None
+
+    @property
+    def age_seconds(self):
+        """Anlık görüntünün oluşturulmasından bu yana geçen süre (saniye)"""
+        return time.time() - self.created_at
+
+    def memory(self):
+        """Bileşen bazında bellekte tutulan bayt miktarı"""
+        data_bytes = self.panel.nbytes if self.panel is not None else int(self.data.memory_usage().sum())
+        return {
+            "data": data_bytes,
+            "vol_cube": self.vol_cube.nbytes,
+            "estimator_cubes": sum(cube.nbytes for cube in (self.estimator_cubes or {}).values()),
+            "benchmark": int(self.benchmark.memory_usage()) if self.benchmark is not None else 0
+        }
+
+    def shared_bytes(self):
+        """Fiyat paneli ve küplerden süreçler arasında paylaşılan dosyalara eşlenen bayt miktarı"""
+        arrays = [self.panel.values if self.panel is not None else None, self.vol_cube.values]
+        arrays += [cube.values for cube in (self.estimator_cubes or {}).values()]
+        return sum(values.nbytes for values in arrays if isinstance(values, np.memmap))
+
+    def has_estimator(self, estimator):
+        """Yöntemin bu anlık görüntüde hesaplanıp hesaplanmadığı"""
+        return estimator not in OHLC_ESTIMATORS or (self.estimator_cubes is not None and estimator in self.estimator_cubes)
+
+    def volatility(self, estimator, window):
+        """Seçili yöntem ve pencere için oynaklık DataFrame'i"""
+        if estimator == "cv":
+            return self.vol_cube.get(window)
+        return self.estimator_cubes[estimator].get(window)
+
+def snapshot_key(tickers, days, interval):
+    """Hisse listesi, gün ve bar aralığından anlık görüntü anahtarı üretir"""
+    return tuple(tickers), int(days), interval
+
+def build_snapshot(tickers, days, interval, store=None, cache=None, refresh_cache=False,
+                   base_url=YAHOO_BASE_URL, fetcher=None, estimators=False, compact=USE_COMPACT_PANELS):
+    """Veriyi indirir, oynaklık küpünü, zirveden uzaklık ve korelasyon matrislerini hesaplar
+
+    Args:
+        tickers: Hisse kodları listesi
+        days: Kaç günlük veri isteniyor
+        interval: Bar aralığı
+        store: Opsiyonel PriceStore
+        cache: Opsiyonel hisse bazında LRUCache (ör. series_cache)
+        refresh_cache: True ise önbellek atlanıp tüm hisseler indirilir
+        base_url: Yahoo sunucu adresi
+        fetcher: Opsiyonel AsyncFetcher
+        estimators: True ise OHLC barları da indirilir ve aralık tabanlı
+            tahmin yöntemlerinin küpleri hesaplanır
+        compact: True ise fiyat paneli CompactPanel (float32) olarak tutulur;
+            oynaklık küpü ve zirveden uzaklık matrisleri de float32 olur
+
+    Returns:
+        Snapshot
+    """
+    data, report = get_stock_data(
+        list(tickers), days, store=store, batch=USE_BATCH_FETCH, base_url=base_url,
+        fetcher=fetcher, return_report=True, interval=interval,
+        cache=cache, refresh_cache=refresh_cache
+    )
+    panel = None
+    if compact:
+        # float64 panel bu noktadan sonra tutulmaz; hesaplar float32 görünüm üzerinden yapılır
+        panel = CompactPanel.from_frame(data)
+        data = panel.to_frame()
+    vol_cube = calculate_volatility_cube(data, range(WINDOW_MIN, WINDOW_MAX + 1))
+    # Endeks serisi hisse listesinden ayrı indirilir; oynaklık sıralamalarına karışmaz
+    benchmark_data = get_stock_data(
+        [BENCHMARK_TICKER], days, store=store, base_url=base_url, fetcher=fetcher,
+        interval=interval, cache=cache, refresh_cache=refresh_cache
+    )
+    benchmark = benchmark_data[BENCHMARK_TICKER] if BENCHMARK_TICKER in benchmark_data else None
+
+    # Zirveden uzaklık ve (varsayılan pencerede) korelasyon matrisleri içerik bazlı
+    # önbelleğe alınır; sekme açıldığında hazır olur
+    calculate_drawdown_matrix(data)
+    calculate_correlation(data, DEFAULT_WINDOW_SIZE, benchmark)
+
+    estimator_cubes, ohlc_report = None, None
+    if estimators:
+        ohlc, ohlc_report = get_ohlc_data(
+            list(tickers), days, base_url=base_url, fetcher=fetcher, return_report=True,
+            interval=interval, cache=cache, refresh_cache=refresh_cache
+        )
+        estimator_cubes = calculate_estimator_cubes(ohlc, range(WINDOW_MIN, WINDOW_MAX + 1))
+    return Snapshot(
+        data, vol_cube, report, time.time(), next_version(), estimator_cubes, ohlc_report, benchmark, panel
+    )
+
+class Prefetcher:
+    """Yapılandırılmış ve kullanıcıların istediği anahtarları arka planda yeniler
+
+    Yapılandırmadaki anahtarlar (PREFETCH_JOBS) her zaman tutulur. Kullanıcı
+    isteğiyle eklenen anahtarlar en fazla max_keys kadardır ve idle_seconds
+    boyunca istenmezse silinir. shared verilirse bir anahtarı aynı anda tek
+    süreç indirir; diğer süreçler yayımlanan anlık görüntüyü eşleyerek kullanır.
+    """
+
+    def __init__(self, jobs=PREFETCH_JOBS, store=None, cache=None,
+                 refresh_seconds=PREFETCH_REFRESH_SECONDS, max_keys=PREFETCH_MAX_KEYS,
+                 idle_seconds=PREFETCH_IDLE_SECONDS, base_url=YAHOO_BASE_URL, fetcher=None, shared=None):
+        """
+        Args:
+            jobs: (evren adı, gün, bar aralığı) listesi
+            store: Opsiyonel PriceStore
+            cache: Opsiyonel hisse bazında LRUCache; yenilenen seriler buraya da
+                yazılır, böylece özel listeler de ağ beklemeden yüklenir
+            refresh_seconds: Bu süreden eski anlık görüntüler yenilenir
+            max_keys: Kullanıcı isteğiyle eklenen en fazla anahtar sayısı
+            idle_seconds: İstenmeyen kullanıcı anahtarlarının silinme süresi
+            base_url: Yahoo sunucu adresi
+            fetcher: Opsiyonel AsyncFetcher
+            shared: Opsiyonel SharedSnapshotStore; anlık görüntüler süreçler
+                arasında memmap dosyalarıyla paylaşılır
+        """
+        self.store = store
+        self.cache = cache
+        self.refresh_seconds = refresh_seconds
+        self.max_keys = max_keys
+        self.idle_seconds = idle_seconds
+        self.base_url = base_url
+        self.fetcher = fetcher
+        self.shared = shared
+
+        self._pinned = {
+            snapshot_key(get_universe_tickers(universe), days, interval)
+            for universe, days, interval in jobs
+        }
+        self._snapshots = {}
+        self._last_access = {}
+        self._pending = set()
+        # OHLC tabanlı yöntemleri istenmiş anahtarlar; yenilemede onlar da hesaplanır
+        self._estimator_keys = set()
+        # (anahtar, λ) -> (EwmaVolatility, anlık görüntü sürümü, sonuç); yenilemeler
+        # arasında korunur, yeni anlık görüntüde yalnızca yeni barlar işlenir
+        self._ewma = {}
+        # (anahtar, λ) -> kilit; durum bu kilitle ilerletilir, _lock hesap boyunca tutulmaz
+        self._ewma_locks = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Arka plan iş parçacığını başlatır (ilk tur hemen çalışır)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="bist-prefetcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Arka plan iş parçacığını durdurur"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get(self, tickers, days, interval):
+        """Anahtarın son anlık görüntüsünü ağ beklemeden döndürür
+
+        Anlık görüntü eskimişse yine döndürülür ve arka planda yenilenmesi
+        istenir. Hiç anlık görüntü yoksa None döner; bu durumda load()
+        çağrılmalıdır.
+        """
+        key = snapshot_key(tickers, days, interval)
+        with self._lock:
+            self._touch(key)
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot.age_seconds >= self.refresh_seconds:
+                self._pending.add(key)
+                self._wake.set()
+        return snapshot
+
+    def load(self, tickers, days, interval, force=False, estimators=False):
+        """Anahtarın anlık görüntüsünü bu iş parçacığında oluşturup kaydeder
+
+        İlk kez istenen anahtarlar, ilk kez seçilen OHLC yöntemleri ve
+        kullanıcının elle yenilemesi içindir.
+
+        Args:
+            force: True ise önbellek atlanır ve tüm hisseler indirilir
+            estimators: True ise OHLC tabanlı yöntemler de hesaplanır ve
+                anahtarın sonraki yenilemelerinde de hesaplanmaya devam eder
+
+        Returns:
+            Snapshot
+        """
+        key = snapshot_key(tickers, days, interval)
+        with self._lock:
+            self._touch(key)
+            if estimators:
+                self._estimator_keys.add(key)
+            estimators = key in self._estimator_keys
+        # Elle yenilemede yalnızca bu istekten sonra yayımlanan anlık görüntü kabul edilir
+        snapshot = self._build(key, force, estimators, newer_than=time.time() if force else None)
+        self._swap(key, snapshot, keep_previous_on_empty=False)
+        return snapshot
+
+    def _build(self, key, refresh_cache, estimators, wait=True, newer_than=None):
+        """Anlık görüntüyü oluşturur; paylaşım açıksa önce yayımlanmış olanı kullanır
+
+        Args:
+            key: Anlık görüntü anahtarı
+            refresh_cache: True ise önbellek atlanıp tüm hisseler indirilir
+            estimators: True ise OHLC tabanlı yöntemler de hesaplanır
+            wait: False ise anahtar başka bir süreçte hesaplanırken beklenmez
+            newer_than: Verilirse yayımlanmış anlık görüntü yalnızca bu zamandan
+                sonra oluşturulduysa kullanılır; verilmezse eskimemiş olması yeterlidir
+
+        Returns:
+            Snapshot; anahtar başka bir süreçte hesaplanıyorsa (wait=False) None
+        """
+        if self.shared is None:
+            return build_snapshot(
+                *key, store=self.store, cache=self.cache, refresh_cache=refresh_cache,
+                base_url=self.base_url, fetcher=self.fetcher, estimators=estimators
+            )
+        with self.shared.building(key, wait) as acquired:
+            # Kilit beklenirken başka bir süreç aynı anahtarı yayımlamış olabilir
+            published = self.shared.read(key)
+            if published is not None and (not estimators or published.estimator_cubes is not None):
+                if newer_than is not None:
+                    fresh = published.created_at > newer_than
+                else:
+                    fresh = published.age_seconds < self.refresh_seconds
+                if fresh:
+                    return published
+            if not acquired:
+                return None
+            snapshot = build_snapshot(
+                *key, store=self.store, cache=self.cache, refresh_cache=refresh_cache,
+                base_url=self.base_url, fetcher=self.fetcher, estimators=estimators
+            )
+            if snapshot.data.empty:
+                return snapshot
+            try:
+                return self.shared.publish(key, snapshot)
+            except OSError as e:
+                print(f"Anlık görüntü paylaşılamadı, süreç içi kopya kullanılıyor: {e}")
+                return snapshot
+
+    def ewma_volatility(self, tickers, days, interval, snapshot, lam):
+        """Anahtarın anlık görüntüsü için EWMA oynaklığını döndürür
+
+        Durum ilk istekte tüm geçmişten vektörel olarak kurulur; sonraki
+        anlık görüntülerde yalnızca yeni (veya değişen son) barlar işlenir.
+        Aynı anlık görüntü için sonuç yeniden hesaplanmaz.
+
+        Args:
+            tickers, days, interval: Anlık görüntünün anahtarı
+            snapshot: get() veya load() ile alınan Snapshot
+            lam: Bozunma katsayısı λ
+
+        Returns:
+            Tarih × hisse yüzde oynaklık DataFrame'i
+        """
+        return self._advance_ewma(snapshot_key(tickers, days, interval), lam, snapshot)
+
+    def _advance_ewma(self, key, lam, snapshot):
+        """EWMA durumunu anlık görüntünün barlarına kadar ilerletir
+
+        Hesap yalnızca (anahtar, λ) kilidi altında yapılır; diğer anahtarların
+        istekleri ve get() beklemez. _lock yalnızca durum okunup yazılırken tutulur.
+        """
+        with self._lock:
+            state_lock = self._ewma_locks.setdefault((key, lam), threading.Lock())
+        with state_lock:
+            with self._lock:
+                state, version, result = self._ewma.get((key, lam), (None, None, None))
+            if version == snapshot.version:
+                return result
+            # Durum daha yeni bir anlık görüntüye ilerlemişse eski anlık görüntü için
+            # ayrı hesaplanır; paylaşılan durum geri sarılmaz
+            if version is not None and version > snapshot.version:
+                return EwmaVolatility(snapshot.data, lam).history.dropna(how="all")
+            # Hisse listesi değiştiyse (ör. veri gelmeyen hisse) durum yeniden kurulur
+            if state is None or not state.columns.equals(snapshot.data.columns):
+                state = EwmaVolatility(snapshot.data, lam)
+                result = state.history.dropna(how="all")
+            else:
+                result = state.extend(snapshot.data)
+            with self._lock:
+                # Silinmiş anahtarların durumu tutulmaz
+                if key in self._pinned or key in self._last_access:
+                    self._ewma[(key, lam)] = (state, snapshot.version, result)
+                else:
+                    self._ewma_locks.pop((key, lam), None)
+            return result
+
+    def keys(self):
+        """Takip edilen anahtarlar ve anlık görüntü yaşları"""
+        with self._lock:
+            return {
+                key: self._snapshots[key].age_seconds if key in self._snapshots else None
+                for key in self._pinned | set(self._last_access)
+            }
+
+    def memory_report(self):
+        """Anahtar bazında anlık görüntülerin ve EWMA durumlarının bellek kullanımı
+
+        Anlık görüntüler oturumlar arasında paylaşılır; bir oturumun kendine
+        ait verisi yalnızca session_state'tir. shared sütunu, toplamın süreçler
+        arasında paylaşılan memmap dosyalarına eşlenen kısmıdır.
+
+        Returns:
+            Anahtar başına bir satır ve bileşen başına bayt sütunları olan DataFrame
+        """
+        with self._lock:
+            snapshots = dict(self._snapshots)
+            ewma = {}
+            for (key, _), (state, _, result) in self._ewma.items():
+                history = state.history.to_numpy().nbytes + (result.to_numpy().nbytes if result is not None else 0)
+                ewma[key] = ewma.get(key, 0) + history
+        rows = {}
+        for key, snapshot in snapshots.items():
+            tickers, days, interval = key
+            row = {**snapshot.memory(), "ewma": ewma.get(key, 0)}
+            row["total"] = sum(row.values())
+            # Paylaşılan dosya sayfaları tüm süreçlerde tek kopyadır
+            row["shared"] = snapshot.shared_bytes()
+            rows[f"{len(tickers)} hisse · {days} gün · {interval}"] = row
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+    def _touch(self, key):
+        """Anahtarın son istenme zamanını günceller (kilit altında çağrılır)"""
+        if key in self._pinned:
+            return
+        self._last_access.pop(key, None)
+        self._last_access[key] = time.time()
+        # En uzun süredir istenmeyen kullanıcı anahtarları sınırın dışına düşer
+        while len(self._last_access) > self.max_keys:
+            oldest = next(iter(self._last_access))
+            self._forget(oldest)
+
+    def _forget(self, key):
+        """Kullanıcı anahtarını ve anlık görüntüsünü siler (kilit altında çağrılır)"""
+        del self._last_access[key]
+        self._snapshots.pop(key, None)
+        self._estimator_keys.discard(key)
+        if self.shared is not None:
+            self.shared.release(key)
+        for state_key in [state_key for state_key in self._ewma if state_key[0] == key]:
+            del self._ewma[state_key]
+            self._ewma_locks.pop(state_key, None)
+
+    def _swap(self, key, snapshot, keep_previous_on_empty=True):
+        """Yeni anlık görüntüyü tek atamayla yerleştirir
+
+        Başarısız bir yenileme (boş veri) son başarılı anlık görüntüyü
+        ezmez. Daha yeni bir anlık görüntü zaten varsa değişiklik yapılmaz.
+
+        Returns:
+            Anlık görüntünün yerleştirilip yerleştirilmediği
+        """
+        with self._lock:
+            if key not in self._pinned and key not in self._last_access:
+                return False
+            current = self._snapshots.get(key)
+            if current is not None and current.created_at > snapshot.created_at:
+                return False
+            if current is not None and keep_previous_on_empty and snapshot.data.empty:
+                print(f"Arka plan yenilemesinde veri alınamadı, eski veri korunuyor: {len(key[0])} hisse, {key[1]} gün, {key[2]}")
+                return False
+            self._snapshots[key] = snapshot
+            return True
+
+    def _due_keys(self):
+        """Yenilenmesi gereken anahtarlar; süresi dolan kullanıcı anahtarlarını siler"""
+        now = time.time()
+        with self._lock:
+            for key, last_access in list(self._last_access.items()):
+                if now - last_access > self.idle_seconds:
+                    self._forget(key)
+            due = set(self._pending)
+            self._pending.clear()
+            for key in self._pinned | set(self._last_access):
+                snapshot = self._snapshots.get(key)
+                # Kullanıcı anahtarlarının ilk anlık görüntüsünü istek sahibi oluşturur
+                if snapshot is None and key in self._pinned:
+                    due.add(key)
+                elif snapshot is not None and now - snapshot.created_at >= self.refresh_seconds:
+                    due.add(key)
+        # Yapılandırmadaki anahtarlar önce yenilenir
+        return sorted(due, key=lambda key: key not in self._pinned)
+
+    def refresh_due(self):
+        """Eskimiş tüm anahtarları yeniler
+
+        Returns:
+            Yenilenen anahtar sayısı
+        """
+        refreshed = 0
+        for key in self._due_keys():
+            if self._stop.is_set():
+                break
+            try:
+                with span("prefetcher.refresh"):
+                    snapshot = self._build(key, True, key in self._estimator_keys, wait=False)
+            except Exception as e:
+                print(f"Arka plan yenilemesi başarısız ({len(key[0])} hisse, {key[1]} gün, {key[2]}): {e}")
+                continue
+            # Anahtar başka bir süreçte hesaplanıyor; yayımlandığında sonraki turda eşlenir
+            if snapshot is None:
+                continue
+            if self._swap(key, snapshot):
+                refreshed += 1
+                # Kullanılan λ değerlerinin EWMA durumları yeni barlarla hemen ilerletilir
+                with self._lock:
+                    lams = [lam for state_key, lam in self._ewma if state_key == key]
+                for lam in lams:
+                    self._advance_ewma(key, lam, snapshot)
+        return refreshed
+
+    def _run(self):
+        """Arka plan döngüsü: eskiyen anahtarları yeniler, istek gelince uyanır"""
+        while not self._stop.is_set():
+            self.refresh_due()
+            self._wake.wait(min(self.refresh_seconds, 60))
+            self._wake.clear()
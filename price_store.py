@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import threading
+import pandas as pd
+from constants import PRICE_STORE_DIR
+
+class PriceStore:
+    """Hisse fiyatlarını disk üzerinde hisse başına Parquet dosyalarında saklar
+
+    Her hisse için saklanan ilk ve son bar zamanı ile verinin eksiksiz olduğu
+    başlangıç (istenen aralığın başı; ilk bar hafta sonu veya tatil nedeniyle
+    daha sonra olabilir) bir manifest dosyasında tutulur. Böylece yenileme
+    sırasında yalnızca son kayıtlı bardan sonraki kısım (delta) indirilip
+    mevcut verinin sonuna eklenir.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, root=PRICE_STORE_DIR):
+        """Depo klasörünü hazırlar ve manifest dosyasını yükler
+
+        Args:
+            root: Parquet dosyalarının saklanacağı klasör
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._manifest = self._load_manifest()
+
+    def _manifest_path(self):
+        return os.path.join(self.root, self.MANIFEST_FILE)
+
+    def _path(self, ticker):
+        """Hisse kodunu dosya sistemi için güvenli bir dosya adına çevirir"""
+        safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+        return os.path.join(self.root, f"{safe_name}.parquet")
+
+    def _load_manifest(self):
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Fiyat deposu manifesti okunamadı: {e}")
+            return {}
+
+    def _save_manifest(self):
+        # Yarım yazılmış manifest kalmaması için önce geçici dosyaya yaz
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def first_timestamp(self, ticker):
+        """Hisse için saklanan ilk barın zaman damgası (yoksa None)"""
+        entry = self._manifest.get(ticker)
+        return entry["first"] if entry else None
+
+    def covered_from(self, ticker):
+        """Deponun son bara kadar eksiksiz olduğu başlangıç zaman damgası (yoksa None)"""
+        entry = self._manifest.get(ticker)
+        if not entry:
+            return None
+        return entry.get("from", entry["first"])
+
+    def last_timestamp(self, ticker):
+        """Hisse için saklanan son barın zaman damgası (yoksa None)"""
+        entry = self._manifest.get(ticker)
+        return entry["last"] if entry else None
+
+    def delta_start(self, ticker, period1):
+        """Yenileme için istenmesi gereken başlangıç zaman damgasını döndürür
+
+        Depo istenen aralığın başını kapsıyorsa indirme son kayıtlı bardan
+        başlar. Son bar da tekrar istenir çünkü işlem günü içinde değişebilir.
+
+        Args:
+            ticker: Hisse kodu
+            period1: İstenen aralığın başlangıç zaman damgası
+
+        Returns:
+            İndirmenin başlayacağı zaman damgası
+        """
+        covered = self.covered_from(ticker)
+        last = self.last_timestamp(ticker)
+        if covered is None or last is None or covered > period1:
+            return period1
+        return max(period1, last)
+
+    def load(self, ticker):
+        """Hisse için saklanan fiyat serisini okur
+
+        Returns:
+            Fiyat serisi veya kayıt yoksa None
+        """
+        path = self._path(ticker)
+        if ticker not in self._manifest or not os.path.exists(path):
+            return None
+        try:
+            series = pd.read_parquet(path)[ticker]
+        except Exception as e:
+            print(f"{ticker} deposu okunamadı: {e}")
+            return None
+        return series
+
+    def append(self, ticker, series, start=None):
+        """Yeni barları mevcut kayıtla birleştirir ve diske yazar
+
+        Çakışan tarihlerde yeni gelen değer geçerli sayılır.
+
+        Args:
+            ticker: Hisse kodu
+            series: Yeni indirilen fiyat serisi
+            start: İndirmenin istendiği başlangıç zaman damgası; verilirse
+                depo bu zamandan itibaren eksiksiz sayılır
+
+        Returns:
+            Birleştirilmiş tam fiyat serisi
+        """
+        with self._lock:
+            stored = self.load(ticker)
+            if stored is not None:
+                merged = pd.concat([stored[~stored.index.isin(series.index)], series]).sort_index()
+            else:
+                merged = series.sort_index()
+            merged.name = ticker
+
+            if merged.empty:
+                return merged
+
+            tmp_path = self._path(ticker) + ".tmp"
+            merged.to_frame().to_parquet(tmp_path)
+            os.replace(tmp_path, self._path(ticker))
+
+            first = int(merged.index[0].timestamp())
+            covered = first
+            if start is not None:
+                previous_from = self.covered_from(ticker)
+                previous_last = self.last_timestamp(ticker)
+                # İstek kayıtlı son bardan sonra başladıysa arada boşluk olabilir;
+                # eksiksiz kısım isteğin başından başlar
+                if previous_from is not None and start <= previous_last:
+                    covered = min(previous_from, start)
+                else:
+                    covered = start
+            self._manifest[ticker] = {
+                "first": first,
+                "from": covered,
+                "last": int(merged.index[-1].timestamp())
+            }
+            self._save_manifest()
+            return merged
@@ -0,0 +1,278 @@
+"""Anlık görüntülerin süreçler arasında bellek eşlemeli (memmap) dosyalarla paylaşılması
+
+Aynı makinede birden fazla Streamlit süreci çalıştığında her anahtarın
+anlık görüntüsü (fiyat paneli, oynaklık küpleri, endeks serisi) bir kez
+hesaplanıp ham NumPy (.npy) dosyaları olarak yazılır. Süreçler bu dosyaları
+salt okunur eşler; sayfalar işletim sisteminin sayfa önbelleğinde tek kopya
+olarak tutulduğundan bellek kullanımı süreç sayısıyla artmaz.
+
+Klasör düzeni (anahtar başına):
+    <kök>/<anahtar özeti>/manifest.json   Geçerli sürümün adı ve üst verisi
+    <kök>/<anahtar özeti>/<sürüm>/*.npy   Sürümün dizileri
+    <kök>/<anahtar özeti>/build.lock      Aynı anahtarı tek sürecin hesaplaması için kilit
+
+Yeni sürüm önce kendi klasörüne yazılır, ardından manifest os.replace ile
+tek adımda değiştirilir; okuyucular yarım yazılmış bir sürüm görmez. Sürüm
+adı v<yayımlanma zamanı (ns)>-<pid> biçimindedir; eşlenen Snapshot'ın sürüm
+numarası bu zamandır, böylece tüm süreçler aynı veri için aynı sürümü görür.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from async_fetcher import FetchReport
+from compact_panel import CompactPanel, ticker_codes, encode_dates, decode_dates
+from constants import (
+    USE_SHARED_SNAPSHOTS, SHARED_SNAPSHOT_DIR, SHARED_SNAPSHOT_KEEP_VERSIONS, BENCHMARK_TICKER
+)
+from prefetcher import Snapshot, next_version
+from volatility_engine import VolatilityCube, calculate_volatility_cube
+
+try:
+    import fcntl
+except ImportError:  # Windows: dosya kilidi yok, her süreç kendi hesapladığını yayımlar
+    fcntl = None
+
+_enabled = USE_SHARED_SNAPSHOTS or os.environ.get("BIST_SHARED_SNAPSHOTS") == "1"
+
+def is_enabled():
+    """Paylaşımlı anlık görüntülerin açık olup olmadığı"""
+    return _enabled
+
+def version_number(name):
+    """Sürüm klasörü adından (v<ns>-<pid>) sürüm numarası; biçim dışıysa None"""
+    if not name.startswith("v"):
+        return None
+    try:
+        return int(name[1:].split("-")[0])
+    except ValueError:
+        return None
+
+class SharedSnapshotStore:
+    """Anlık görüntüleri diske yazar ve salt okunur bellek eşlemeli olarak okur
+
+    Eşlenen anlık görüntüde fiyat paneli, oynaklık küpleri ve endeks serisi
+    dosya sayfalarını kopyalamadan kullanır. Gün içi verilerde önceden
+    hesaplanmamış (istendikçe hesaplanan) küpler yazılmaz: CV küpü eşlenen
+    fiyatlardan yeniden kurulur, OHLC küpleri ise paylaşılmaz.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    LOCK_FILE = "build.lock"
+
+    def __init__(self, root=SHARED_SNAPSHOT_DIR, keep_versions=SHARED_SNAPSHOT_KEEP_VERSIONS):
+        """
+        Args:
+            root: Paylaşılan dosyaların klasörü (tüm süreçlerde aynı olmalı)
+            keep_versions: Anahtar başına diskte tutulan en fazla sürüm; eski
+                sürümü okumakta olan süreçler için geçerli sürümden fazlası tutulur
+        """
+        self.root = root
+        self.keep_versions = max(int(keep_versions), 2)
+        os.makedirs(self.root, exist_ok=True)
+        # Anahtar -> (sürüm adı, eşlenmiş Snapshot); aynı sürüm yeniden eşlenmez
+        self._mapped = {}
+        self._lock = threading.Lock()
+
+    def _key_dir(self, key):
+        """Anahtarın klasörü (hisse listesi uzun olabileceğinden özeti kullanılır)"""
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, digest)
+
+    def _manifest_path(self, key):
+        return os.path.join(self._key_dir(key), self.MANIFEST_FILE)
+
+    def _load_manifest(self, key):
+        path = self._manifest_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Paylaşımlı anlık görüntü manifesti okunamadı: {e}")
+            return None
+
+    @contextlib.contextmanager
+    def building(self, key, wait=True):
+        """Anahtarı hesaplama kilidi; aynı anda tek süreç indirir ve hesaplar
+
+        Args:
+            key: Anlık görüntü anahtarı
+            wait: False ise kilit başka süreçteyse beklenmez
+
+        Yields:
+            Kilidin alınıp alınmadığı
+        """
+        if fcntl is None:
+            yield True
+            return
+        folder = self._key_dir(key)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, self.LOCK_FILE), "a+") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read(self, key):
+        """Anahtarın yayımlanmış son anlık görüntüsünü eşler
+
+        Returns:
+            Snapshot veya yayımlanmış sürüm yoksa None
+        """
+        manifest = self._load_manifest(key)
+        if manifest is None:
+            return None
+        with self._lock:
+            version, snapshot = self._mapped.get(key, (None, None))
+            if version == manifest["version"]:
+                return snapshot
+            try:
+                snapshot = self._map(key, manifest)
+            except (OSError, ValueError, KeyError) as e:
+                # Sürüm okunurken budanmış olabilir; bir sonraki okumada yenisi eşlenir
+                print(f"Paylaşımlı anlık görüntü okunamadı ({manifest['version']}): {e}")
+                return None
+            self._mapped[key] = (manifest["version"], snapshot)
+            return snapshot
+
+    def _map(self, key, manifest):
+        """Manifestteki sürümün dizilerini salt okunur eşleyip Snapshot oluşturur"""
+        folder = os.path.join(self._key_dir(key), manifest["version"])
+
+        def load(name):
+            return np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")
+
+        panel = CompactPanel(
+            load("prices"), ticker_codes(manifest["tickers"]), load("dates"), manifest["intraday"]
+        )
+        data = panel.to_frame()
+        windows = manifest["windows"]
+        if manifest["cv"]:
+            vol_cube = VolatilityCube(load("cv"), windows, data.index, data.columns)
+        else:
+            vol_cube = calculate_volatility_cube(data, windows)
+
+        estimator_cubes = None
+        if manifest["estimators"]:
+            ohlc_index = decode_dates(load("ohlc_dates"), manifest["ohlc_intraday"])
+            ohlc_columns = pd.Index(manifest["ohlc_tickers"])
+            estimator_cubes = {
+                estimator: VolatilityCube(load(estimator), windows, ohlc_index, ohlc_columns)
+                for estimator in manifest["estimators"]
+            }
+
+        benchmark = None
+        if manifest["benchmark_intraday"] is not None:
+            benchmark = pd.Series(
+                load("benchmark"), index=decode_dates(load("benchmark_dates"), manifest["benchmark_intraday"]),
+                name=BENCHMARK_TICKER, copy=False
+            )
+
+        ohlc_report = manifest["ohlc_report"]
+        return Snapshot(
+            data, vol_cube, FetchReport.from_dict(manifest["report"]), manifest["created_at"],
+            version_number(manifest["version"]),
+            estimator_cubes, FetchReport.from_dict(ohlc_report) if ohlc_report is not None else None,
+            benchmark, panel
+        )
+
+    def publish(self, key, snapshot):
+        """Anlık görüntüyü yeni bir sürüm olarak yazar ve manifesti değiştirir
+
+        Returns:
+            Yazılan sürümün eşlenmiş Snapshot'ı; böylece yayımlayan süreç de
+            kendi kopyasını bırakıp paylaşılan sayfaları kullanır
+        """
+        key_dir = self._key_dir(key)
+        # Süreç içi sürümlerle aynı ölçekte ve onlardan yeni bir numara
+        version = f"v{next_version()}-{os.getpid()}"
+        folder = os.path.join(key_dir, version)
+        tmp_folder = folder + ".tmp"
+        os.makedirs(tmp_folder, exist_ok=True)
+
+        def save(name, values):
+            np.save(os.path.join(tmp_folder, f"{name}.npy"), values)
+
+        panel = snapshot.panel
+        if panel is None:
+            panel = CompactPanel.from_frame(snapshot.data, dtype=np.float64)
+        save("prices", panel.values)
+        save("dates", panel.dates)
+        cv = snapshot.vol_cube.values is not None
+        if cv:
+            save("cv", snapshot.vol_cube.values)
+
+        # İstendikçe hesaplanan OHLC küpleri OHLC barları olmadan yeniden kurulamaz
+        estimators, ohlc_tickers, ohlc_intraday = [], None, None
+        cubes = snapshot.estimator_cubes or {}
+        if cubes and all(cube.values is not None for cube in cubes.values()):
+            first = next(iter(cubes.values()))
+            ohlc_dates, ohlc_intraday = encode_dates(first.index)
+            save("ohlc_dates", ohlc_dates)
+            ohlc_tickers = list(first.columns)
+            for estimator, cube in cubes.items():
+                save(estimator, cube.values)
+                estimators.append(estimator)
+
+        benchmark_intraday = None
+        if snapshot.benchmark is not None:
+            benchmark_dates, benchmark_intraday = encode_dates(snapshot.benchmark.index)
+            save("benchmark", snapshot.benchmark.to_numpy())
+            save("benchmark_dates", benchmark_dates)
+
+        os.replace(tmp_folder, folder)
+        manifest = {
+            "version": version,
+            "created_at": snapshot.created_at,
+            "tickers": list(panel.columns),
+            "intraday": panel.intraday,
+            "windows": list(snapshot.vol_cube.windows),
+            "cv": cv,
+            "estimators": estimators,
+            "ohlc_tickers": ohlc_tickers,
+            "ohlc_intraday": ohlc_intraday,
+            "benchmark_intraday": benchmark_intraday,
+            "report": snapshot.report.to_dict(),
+            "ohlc_report": snapshot.ohlc_report.to_dict() if snapshot.ohlc_report is not None else None
+        }
+        # Yarım yazılmış manifest kalmaması için önce geçici dosyaya yaz
+        tmp_path = self._manifest_path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path(key))
+        self._prune(key_dir, version)
+
+        with self._lock:
+            mapped = self._map(key, manifest)
+            self._mapped[key] = (version, mapped)
+        return mapped
+
+    def _prune(self, key_dir, current):
+        """Geçerli sürüm dışında en yeni keep_versions - 1 sürümü tutar
+
+        Silinen dosyaları eşlemiş süreçler POSIX'te okumaya devam eder;
+        Windows'ta eşlenmiş dosya silinemezse bir sonraki yayımlamaya kalır.
+        """
+        # Biçim dışı adlar (ör. elle oluşturulmuş klasörler) ve yarım yazılmış sürümler atlanır
+        versions = sorted(
+            (version_number(name), name) for name in os.listdir(key_dir)
+            if name != current and not name.endswith(".tmp") and version_number(name) is not None
+        )
+        for _, name in versions[:max(len(versions) - (self.keep_versions - 1), 0)]:
+            shutil.rmtree(os.path.join(key_dir, name), ignore_errors=True)
+
+    def release(self, key):
+        """Anahtarın eşlenmiş anlık görüntüsünü bırakır (dosyalar diskte kalır)"""
+        with self._lock:
+            self._mapped.pop(key, None)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modüller depo kökünde düz olarak bulunur
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
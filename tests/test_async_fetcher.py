@@ -0,0 +1,38 @@
+import pytest
+from async_fetcher import AsyncFetcher
+from data_services import chart_url
+from mock_yahoo_server import start_mock_server
+
+@pytest.mark.parametrize("retry_after, expected", [
+    ("3", 3.0), ("3600", 5.0), ("-5", 0.0)
+])
+def test_retry_after_is_clamped(retry_after, expected):
+    fetcher = AsyncFetcher(backoff_base=0.1, backoff_max=5)
+    assert fetcher._backoff_delay(1, retry_after) == expected
+
+@pytest.mark.parametrize("retry_after", ["nan", "inf", "Wed, 21 Oct 2026 07:28:00 GMT"])
+def test_invalid_retry_after_uses_backoff(retry_after):
+    fetcher = AsyncFetcher(backoff_base=0.1, backoff_max=5)
+    assert 0.05 <= fetcher._backoff_delay(1, retry_after) <= 0.15
+
+def test_backoff_is_capped():
+    fetcher = AsyncFetcher(backoff_base=1, backoff_max=2)
+    assert fetcher._backoff_delay(10) == 2
+
+def test_throttled_requests_are_retried():
+    server, url = start_mock_server(throttle_first=2)
+    try:
+        fetcher = AsyncFetcher(rate_limit=None, max_retries=3, backoff_base=0.01)
+        responses = fetcher.run([("AKBNK.IS", chart_url("AKBNK.IS", 0, 30 * 86400, url))])
+        json_data, outcome = responses["AKBNK.IS"]
+        assert json_data is not None
+        assert outcome.status == "retried" and outcome.attempts == 3
+
+        # Tekrar sayısı 429'ları aşmaya yetmezse hata olarak raporlanır
+        fetcher = AsyncFetcher(rate_limit=None, max_retries=1, backoff_base=0.01)
+        responses = fetcher.run([("GARAN.IS", chart_url("GARAN.IS", 0, 30 * 86400, url))])
+        json_data, outcome = responses["GARAN.IS"]
+        assert json_data is None
+        assert outcome.status == "failed" and outcome.error == "HTTP 429"
+    finally:
+        server.shutdown()
@@ -0,0 +1,73 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from chart_decoder import BarSeries, decode_chart
+
+GMTOFFSET = 10800
+
+def _payload(n_bars=300, step=86400, seed=0):
+    """Rastgele null değerli ve tamamen boş barlı chart yanıtı"""
+    rng = np.random.default_rng(seed)
+    timestamps = 1704090600 + step * np.arange(n_bars)
+    closes = 100 * np.exp(rng.normal(0, 0.02, n_bars).cumsum())
+    quote = {
+        "open": closes * 0.99, "high": closes * 1.01, "low": closes * 0.98, "close": closes,
+        "volume": rng.integers(1000, 100000, n_bars).astype(float)
+    }
+    quote = {field: values.tolist() for field, values in quote.items()}
+    for position in rng.choice(n_bars, n_bars // 10, replace=False):
+        quote["close"][position] = None
+    for position in rng.choice(n_bars, n_bars // 20, replace=False):
+        for values in quote.values():
+            values[position] = None
+    result = {"meta": {"gmtoffset": GMTOFFSET}, "timestamp": timestamps.tolist(), "indicators": {"quote": [quote]}}
+    return json.dumps({"chart": {"result": [result], "error": None}})
+
+def _reference(payload, daily=True):
+    """json ve pandas ile öğe bazında çözülen OHLCV çerçevesi (boş barlar atılmış)"""
+    result = json.loads(payload)["chart"]["result"][0]
+    index = pd.to_datetime(pd.Series(result["timestamp"]) + GMTOFFSET, unit="s")
+    if daily:
+        index = index.dt.normalize()
+    quote = result["indicators"]["quote"][0]
+    frame = pd.DataFrame(
+        {field.capitalize(): pd.to_numeric(pd.Series(quote[field], dtype=object)) for field in quote}
+    ).set_axis(pd.DatetimeIndex(index))
+    return frame.dropna(how="all", subset=["Open", "High", "Low", "Close"])
+
+def test_daily_decode_matches_reference():
+    payload = _payload()
+    bars = decode_chart(payload.encode(), "A.IS")
+    expected = _reference(payload)
+    pd.testing.assert_frame_equal(bars.to_frame(), expected, check_index_type=False, check_freq=False)
+    pd.testing.assert_series_equal(
+        bars.to_series(), expected["Close"].rename("A.IS"), check_index_type=False, check_freq=False
+    )
+
+def test_intraday_decode_matches_reference():
+    payload = _payload(step=3600, seed=1)
+    bars = decode_chart(payload, "A.IS", price_dtype=np.float32)
+    assert bars.closes.dtype == np.float32
+    expected = _reference(payload, daily=False)
+    actual = bars.to_frame(daily=False)
+    pd.testing.assert_index_equal(actual.index, expected.index, exact=False)
+    np.testing.assert_allclose(actual.to_numpy(dtype=float), expected.to_numpy(), rtol=1e-6, equal_nan=True)
+
+def test_concat_keeps_last_bar():
+    payload = _payload(n_bars=50)
+    bars = decode_chart(payload, "A.IS")
+    revised = BarSeries(
+        "A.IS", bars.timestamps[-5:], bars.closes[-5:] + 1, bars.opens[-5:], bars.highs[-5:],
+        bars.lows[-5:], bars.volumes[-5:]
+    )
+    combined = BarSeries.concat([bars, revised])
+    expected = pd.concat([bars.to_series(), revised.to_series()])
+    expected = expected[~expected.index.duplicated(keep="last")].sort_index()
+    pd.testing.assert_series_equal(combined.to_series(), expected)
+
+def test_length_mismatch_raises():
+    result = json.loads(_payload(n_bars=10))
+    result["chart"]["result"][0]["indicators"]["quote"][0]["close"].pop()
+    with pytest.raises(ValueError):
+        decode_chart(json.dumps(result), "A.IS")
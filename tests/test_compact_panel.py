@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from compact_panel import CompactPanel, decode_dates, encode_dates
+from data_services import calculate_drawdown, calculate_percent_change, calculate_volatility
+from utils import fingerprint
+
+def _panel(freq="B", n_rows=120, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01 10:00" if freq == "h" else "2024-01-01", periods=n_rows, freq=freq)
+    prices = 100 * np.exp(rng.normal(0, 0.02, (n_rows, 5)).cumsum(axis=0))
+    prices[rng.random(prices.shape) < 0.05] = np.nan
+    return pd.DataFrame(prices, index=index, columns=[f"T{i}.IS" for i in range(5)])
+
+@pytest.mark.parametrize("freq", ["B", "h"])
+def test_round_trip_matches_float32_frame(freq):
+    data = _panel(freq)
+    panel = CompactPanel.from_frame(data)
+    frame = panel.to_frame()
+    pd.testing.assert_frame_equal(frame, data.astype(np.float32), check_freq=False, check_index_type=False)
+    assert panel.intraday == (freq == "h")
+    assert panel.dates.dtype == (np.int64 if freq == "h" else np.int32)
+    # DataFrame görünümü değer tamponunu kopyalamaz
+    assert np.shares_memory(frame.to_numpy(), panel.values)
+    dates, intraday = encode_dates(data.index)
+    pd.testing.assert_index_equal(decode_dates(dates, intraday), data.index, exact=False, check_exact=True)
+
+def test_compute_functions_match_float64_reference():
+    data = _panel(seed=1)
+    panel = CompactPanel.from_frame(data)
+
+    volatility = calculate_volatility(panel, 20)
+    assert (volatility.dtypes == np.float32).all()
+    rolling = data.rolling(20)
+    expected = (rolling.std() / rolling.mean()).dropna(how="all")
+    np.testing.assert_allclose(volatility, expected, rtol=1e-4, equal_nan=True)
+
+    ticker = data.columns[0]
+    drawdown = calculate_drawdown(panel, price_col=ticker)
+    peak = data[ticker].cummax()
+    expected_drawdown = (data[ticker] - peak) / peak * 100
+    np.testing.assert_allclose(drawdown["Drawdown"], expected_drawdown, rtol=1e-4, atol=1e-4, equal_nan=True)
+
+    change = calculate_percent_change(panel)
+    np.testing.assert_allclose(change, data.pct_change(fill_method=None).iloc[-1] * 100, rtol=1e-4, equal_nan=True)
+
+def test_fingerprint_follows_content():
+    data = _panel(seed=2)
+    changed = data.copy()
+    changed.iloc[60, 1] += 1.0
+    panel = CompactPanel.from_frame(data)
+    assert fingerprint(panel) == fingerprint(CompactPanel.from_frame(data.copy()))
+    assert fingerprint(panel) != fingerprint(CompactPanel.from_frame(changed))
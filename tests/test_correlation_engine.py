@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from correlation_engine import RollingCorrelation, calculate_correlation, log_returns
+
+WINDOW = 15
+
+def _panel(n_days=120, n_tickers=6, seed=0):
+    """Ortak piyasa etkenli, dağınık eksik değerli fiyat paneli ve endeks"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=n_days)
+    market = rng.normal(0, 0.01, n_days)
+    returns = market[:, None] * rng.uniform(0.5, 1.5, n_tickers) + rng.normal(0, 0.01, (n_days, n_tickers))
+    prices = 100 * np.exp(returns.cumsum(axis=0))
+    prices[rng.random(prices.shape) < 0.01] = np.nan
+    benchmark = pd.Series(1000 * np.exp(market.cumsum()), index=index)
+    benchmark.iloc[rng.choice(n_days, 3, replace=False)] = np.nan
+    return pd.DataFrame(prices, index=index, columns=[f"T{i}.IS" for i in range(n_tickers)]), benchmark
+
+def _returns(prices):
+    return pd.DataFrame(log_returns(prices.to_numpy()), index=prices.index, columns=prices.columns)
+
+def _pairwise_reference(data, min_periods):
+    """pandas rolling().corr(): tarih başına (hisse × hisse) MultiIndex çerçeve"""
+    return _returns(data).rolling(WINDOW, min_periods=min_periods).corr()
+
+@pytest.mark.parametrize("min_periods", [None, 8])
+def test_correlation_matches_pandas(min_periods):
+    data, benchmark = _panel()
+    result = calculate_correlation(data, WINDOW, benchmark, min_periods=min_periods)
+    reference = _pairwise_reference(data, WINDOW if min_periods is None else min_periods)
+
+    np.testing.assert_allclose(result.latest, reference.loc[data.index[-1]], rtol=1e-9, atol=1e-12, equal_nan=True)
+    # Tarih başına köşegen dışı ortalama korelasyon
+    off_diagonal = reference.where(~np.tile(np.eye(data.shape[1], dtype=bool), (len(data), 1)))
+    expected_average = off_diagonal.stack().groupby(level=0).mean()
+    average = result.average_series()
+    np.testing.assert_allclose(average, expected_average.reindex(average.index), rtol=1e-9)
+    assert set(expected_average.dropna().index) == set(average.index)
+
+def test_beta_matches_pandas():
+    data, benchmark = _panel(seed=1)
+    result = calculate_correlation(data, WINDOW, benchmark)
+    returns = _returns(data)
+    market = pd.Series(log_returns(benchmark.to_numpy()[:, None])[:, 0], index=data.index)
+    for position, ticker in enumerate(data.columns):
+        # Beta yalnızca hisse ve endeksin ikisinin de getirisi olan barlardan hesaplanır
+        joint = market.where(returns[ticker].notna())
+        stock = returns[ticker].where(market.notna())
+        expected_beta = stock.rolling(WINDOW).cov(joint) / joint.rolling(WINDOW).var()
+        expected_corr = stock.rolling(WINDOW).corr(joint)
+        np.testing.assert_allclose(result.beta[:, position], expected_beta, rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(result.market_corr[:, position], expected_corr, rtol=1e-9, equal_nan=True)
+
+def test_incremental_updates_match_pandas():
+    data, _ = _panel(n_days=80, seed=2)
+    returns = _returns(data)
+    reference = _pairwise_reference(data, WINDOW)
+    engine = RollingCorrelation(data.shape[1], WINDOW, reseed_interval=7)
+    # Tek bar ve çok barlı adımlar karışık verilir
+    position = 0
+    for step in [1, 3, 1, WINDOW, 2, 5] * 4:
+        if position >= len(data):
+            break
+        engine.update(returns.iloc[position:position + step].to_numpy())
+        position = min(position + step, len(data))
+        expected = reference.loc[data.index[position - 1]]
+        np.testing.assert_allclose(engine.correlation(), expected, rtol=1e-8, atol=1e-10, equal_nan=True)
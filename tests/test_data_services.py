@@ -0,0 +1,66 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import data_services
+from async_fetcher import AsyncFetcher
+from data_services import fetch_series, get_stock_data
+from mock_yahoo_server import start_mock_server
+from price_store import PriceStore
+
+TICKERS = ["AKBNK.IS", "GARAN.IS", "THYAO.IS", "SISE.IS"]
+
+@pytest.fixture(scope="module")
+def mock_server():
+    server, url = start_mock_server(spark_missing={"THYAO.IS"}, unknown={"XXX.IS"})
+    yield url
+    server.shutdown()
+
+def _fetch(url, tickers, batch):
+    period2 = int(time.time())
+    starts = {ticker: period2 - 60 * 86400 for ticker in tickers}
+    return fetch_series(tickers, starts, period2, batch=batch, base_url=url,
+                        fetcher=AsyncFetcher(rate_limit=None, backoff_base=0.01))
+
+def _assert_same_bars(left, right):
+    assert left.keys() == right.keys()
+    for ticker in left:
+        np.testing.assert_array_equal(left[ticker].timestamps, right[ticker].timestamps)
+        np.testing.assert_array_equal(left[ticker].closes, right[ticker].closes)
+
+def test_batch_matches_per_ticker(mock_server):
+    batch, batch_report = _fetch(mock_server, TICKERS, batch=True)
+    single, _ = _fetch(mock_server, TICKERS, batch=False)
+    _assert_same_bars(batch, single)
+    assert batch_report.failed() == []
+
+def test_spark_missing_falls_back_to_chart(mock_server):
+    fetched, report = _fetch(mock_server, TICKERS, batch=True)
+    # Spark yanıtında hiç bulunmadığından yalnızca hisse başına yoldan gelebilir
+    single, _ = _fetch(mock_server, ["THYAO.IS"], batch=False)
+    _assert_same_bars({"THYAO.IS": fetched["THYAO.IS"]}, single)
+    assert report.outcomes["THYAO.IS"].status == "ok"
+
+def test_unknown_ticker_reported_failed(mock_server):
+    fetched, report = _fetch(mock_server, TICKERS + ["XXX.IS"], batch=True)
+    assert "XXX.IS" not in fetched
+    assert report.failed() == ["XXX.IS"]
+    assert set(fetched) == set(TICKERS)
+
+def test_store_delta_matches_full_download(mock_server, tmp_path, monkeypatch):
+    requested = []
+
+    def recording_fetch(tickers, start_periods, *args, **kwargs):
+        requested.append(dict(start_periods))
+        return fetch_series(tickers, start_periods, *args, **kwargs)
+
+    monkeypatch.setattr(data_services, "fetch_series", recording_fetch)
+    store = PriceStore(str(tmp_path))
+    fetcher = AsyncFetcher(rate_limit=None, backoff_base=0.01)
+    full = get_stock_data(TICKERS, 90, base_url=mock_server, fetcher=fetcher)
+    for _ in range(2):
+        stored = get_stock_data(TICKERS, 90, store=store, base_url=mock_server, fetcher=fetcher)
+        pd.testing.assert_frame_equal(stored, full)
+    # İkinci yenilemede yalnızca son kayıtlı bardan sonrası istenir
+    assert requested[-1] == {ticker: store.last_timestamp(ticker) for ticker in TICKERS}
+    assert all(start < requested[-1][ticker] for ticker, start in requested[-2].items())
@@ -0,0 +1,46 @@
+import gc
+import time
+import weakref
+import pandas as pd
+from async_fetcher import FetchReport
+from dataset_registry import DatasetRegistry
+from prefetcher import Snapshot, next_version
+
+KEY = (("A.IS", "B.IS"), 40, "1d")
+
+def _snapshot():
+    data = pd.DataFrame({"A.IS": [1.0, 2.0], "B.IS": [3.0, 4.0]})
+    return Snapshot(data, None, FetchReport(), time.time(), next_version())
+
+def test_handle_resolves_to_pinned_snapshot():
+    registry = DatasetRegistry()
+    first, second = _snapshot(), _snapshot()
+    handle_a, updated = registry.checkout(KEY, first)
+    assert not updated and handle_a.snapshot is first
+    handle_b, _ = registry.checkout(KEY, first)
+    assert registry.checkout(KEY, first, handle_b) == (handle_b, False)
+    assert registry.report()["oturum"].tolist() == [2]
+
+    # Bir oturum yeni sürüme geçse de diğeri eski sürümü kullanmaya devam eder
+    handle_b, updated = registry.checkout(KEY, second, handle_b)
+    assert updated and handle_b.snapshot is second
+    assert handle_a.snapshot is first
+    assert sorted(registry.report()["oturum"].tolist()) == [1, 1]
+
+def test_version_released_with_last_handle():
+    registry = DatasetRegistry()
+    snapshot = _snapshot()
+    alive = weakref.ref(snapshot)
+    explicit, _ = registry.checkout(KEY, snapshot)
+    collected, _ = registry.checkout(KEY, snapshot)
+    del snapshot
+
+    explicit.release()
+    explicit.release()
+    assert explicit.snapshot is None
+    assert collected.snapshot is alive()
+    # Oturum kapanıp handle toplandığında sürüm de bırakılır
+    del collected
+    gc.collect()
+    assert registry.report().empty
+    assert alive() is None
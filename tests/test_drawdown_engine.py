@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from compact_panel import CompactPanel
+from data_services import calculate_drawdown
+from drawdown_engine import calculate_drawdown_matrix
+
+def _panel(n_days=150, n_tickers=5, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=n_days)
+    prices = 100 * np.exp(rng.normal(0, 0.02, (n_days, n_tickers)).cumsum(axis=0))
+    prices[rng.random(prices.shape) < 0.05] = np.nan
+    prices[:10, 0] = np.nan
+    return pd.DataFrame(prices, index=index, columns=[f"T{i}.IS" for i in range(n_tickers)])
+
+def _bars_reference(close):
+    """Son zirveden bu yana ve bir sonraki zirveye kalan bar sayısı (pandas ffill/bfill)"""
+    positions = pd.Series(np.arange(len(close)), index=close.index, dtype=float)
+    at_peak = close.notna() & (close >= close.cummax())
+    duration = (positions - positions.where(at_peak).ffill()).where(close.notna())
+    recovery = (positions.where(at_peak).bfill() - positions).where(close.notna())
+    return duration, recovery
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_matrix_matches_per_ticker_drawdown(compact):
+    data = _panel()
+    matrix = calculate_drawdown_matrix(CompactPanel.from_frame(data, dtype=np.float64) if compact else data)
+    for ticker in data.columns:
+        actual = matrix.frame(ticker)
+        expected = calculate_drawdown(data[[ticker]], price_col=ticker)
+        np.testing.assert_allclose(actual["Close"], expected[ticker], equal_nan=True)
+        np.testing.assert_allclose(actual["Peak"], expected["Peak"], equal_nan=True)
+        np.testing.assert_allclose(actual["Drawdown"], expected["Drawdown"], rtol=1e-9, equal_nan=True)
+        duration, recovery = _bars_reference(data[ticker])
+        np.testing.assert_array_equal(actual["Duration"], duration)
+        np.testing.assert_array_equal(actual["Recovery"], recovery)
+
+def test_summary_matches_pandas():
+    data = _panel(seed=1)
+    data["EMPTY.IS"] = np.nan
+    matrix = calculate_drawdown_matrix(data)
+    summary = matrix.summary()
+    drawdown = pd.DataFrame(matrix.drawdown, index=data.index, columns=data.columns)
+    np.testing.assert_allclose(summary["max_drawdown"], drawdown.min(), equal_nan=True)
+    pd.testing.assert_series_equal(
+        summary["max_drawdown_date"].iloc[:-1], drawdown.iloc[:, :-1].idxmin(), check_names=False
+    )
+    last = drawdown.apply(lambda column: column.dropna().iloc[-1] if column.notna().any() else np.nan)
+    np.testing.assert_allclose(summary["current_drawdown"], last, equal_nan=True)
+    assert list(matrix.deepest(3).index) == list(drawdown.min().nsmallest(3).index)
@@ -0,0 +1,41 @@
+import time
+import numpy as np
+import pandas as pd
+import prefetcher
+from async_fetcher import FetchReport
+from prefetcher import Prefetcher, Snapshot, next_version
+
+TICKERS = ["A.IS", "B.IS", "C.IS"]
+
+def _snapshot(n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=n_days)
+    prices = 100 * np.exp(rng.normal(0, 0.02, (n_days, len(TICKERS))).cumsum(axis=0))
+    data = pd.DataFrame(prices, index=index, columns=TICKERS)
+    return Snapshot(data, None, FetchReport(), time.time(), next_version())
+
+def test_ewma_computed_outside_prefetcher_lock(monkeypatch):
+    manager = Prefetcher(jobs=[])
+    held = []
+
+    class CheckedEwma(prefetcher.EwmaVolatility):
+        def __init__(self, *args, **kwargs):
+            held.append(manager._lock.locked())
+            super().__init__(*args, **kwargs)
+
+        def extend(self, data):
+            held.append(manager._lock.locked())
+            return super().extend(data)
+
+    monkeypatch.setattr(prefetcher, "EwmaVolatility", CheckedEwma)
+    with manager._lock:
+        manager._touch(prefetcher.snapshot_key(TICKERS, 60, "1d"))
+    first = _snapshot(60)
+    result = manager.ewma_volatility(TICKERS, 60, "1d", first, 0.94)
+    assert manager.ewma_volatility(TICKERS, 60, "1d", first, 0.94) is result
+
+    second = _snapshot(61)
+    extended = manager.ewma_volatility(TICKERS, 60, "1d", second, 0.94)
+    expected = prefetcher.EwmaVolatility(second.data, 0.94).history.dropna(how="all")
+    np.testing.assert_allclose(extended.to_numpy(), expected.to_numpy(), equal_nan=True)
+    assert held and not any(held)
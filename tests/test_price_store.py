@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from price_store import PriceStore
+
+TICKER = "AKBNK.IS"
+
+def _series(n_days=120, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=n_days)
+    return pd.Series(100 * np.exp(rng.normal(0, 0.02, n_days).cumsum()), index=index, name=TICKER)
+
+def _reference(parts):
+    """Parçaların birleşimi; aynı tarihte sonra gelen değer geçerli"""
+    merged = pd.concat(parts)
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+def test_appended_deltas_match_full_series(tmp_path):
+    full = _series()
+    store = PriceStore(str(tmp_path))
+    parts = [full.iloc[:60]]
+    store.append(TICKER, parts[0])
+    rng = np.random.default_rng(1)
+    for end in range(65, len(full) + 1, 5):
+        # Delta son kayıtlı bardan başlar; o bar gün içinde değişmiş olabilir
+        start = full.index.get_loc(pd.Timestamp(store.last_timestamp(TICKER), unit="s"))
+        delta = full.iloc[start:end].copy()
+        delta.iloc[0] *= 1 + rng.normal(0, 0.01)
+        parts.append(delta)
+        merged = store.append(TICKER, delta)
+        pd.testing.assert_series_equal(merged, _reference(parts), check_freq=False)
+
+    # Yeniden açılan depo aynı seriyi ve manifesti okur
+    reopened = PriceStore(str(tmp_path))
+    pd.testing.assert_series_equal(reopened.load(TICKER), _reference(parts), check_freq=False, check_index_type=False)
+    assert reopened.last_timestamp(TICKER) == int(full.index[-1].timestamp())
+
+def test_delta_start(tmp_path):
+    store = PriceStore(str(tmp_path))
+    full = _series()
+    first, last = int(full.index[0].timestamp()), int(full.index[-1].timestamp())
+    assert store.delta_start(TICKER, first) == first
+    store.append(TICKER, full)
+    assert store.delta_start(TICKER, first) == last
+    # Depo istenen aralığın başını kapsamıyorsa tüm aralık indirilir
+    assert store.delta_start(TICKER, first - 86400) == first - 86400
+
+def test_delta_start_when_range_starts_on_non_trading_day(tmp_path):
+    store = PriceStore(str(tmp_path))
+    full = _series()
+    # İstenen aralık ilk bardan önceki hafta sonunda başlar
+    period1 = int((full.index[0] - pd.Timedelta(days=2)).timestamp())
+    store.append(TICKER, full.iloc[:60], start=period1)
+    assert store.delta_start(TICKER, period1) == store.last_timestamp(TICKER)
+    # Delta sonrası da eksiksiz başlangıç korunur
+    store.append(TICKER, full.iloc[59:], start=store.last_timestamp(TICKER))
+    assert store.delta_start(TICKER, period1) == int(full.index[-1].timestamp())
+
+    # Son kayıtlı bardan sonra başlayan istek arada boşluk bırakır
+    later = int((full.index[-1] + pd.Timedelta(days=30)).timestamp())
+    gap = _series(n_days=5).set_axis(pd.bdate_range(full.index[-1] + pd.Timedelta(days=31), periods=5))
+    store.append(TICKER, gap, start=later)
+    assert store.covered_from(TICKER) == later
+    assert store.delta_start(TICKER, period1) == period1
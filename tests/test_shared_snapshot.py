@@ -0,0 +1,70 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from async_fetcher import FetchReport
+from prefetcher import Snapshot, next_version
+from shared_snapshot import SharedSnapshotStore
+from volatility_engine import calculate_volatility_cube
+
+KEY = (("A.IS", "B.IS", "C.IS"), 60, "1d")
+WINDOWS = [5, 10]
+
+def _snapshot(seed):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=60)
+    prices = 100 * np.exp(rng.normal(0, 0.02, (60, 3)).cumsum(axis=0))
+    data = pd.DataFrame(prices, index=index, columns=list(KEY[0]))
+    benchmark = pd.Series(prices.mean(axis=1), index=index, name="XU100.IS")
+    return Snapshot(
+        data, calculate_volatility_cube(data, WINDOWS), FetchReport(), time.time(), next_version(),
+        benchmark=benchmark
+    )
+
+def _assert_same(mapped, source):
+    pd.testing.assert_frame_equal(mapped.data, source.data, check_freq=False, check_index_type=False)
+    for window in WINDOWS:
+        pd.testing.assert_frame_equal(
+            mapped.vol_cube.get(window), source.vol_cube.get(window), check_freq=False, check_index_type=False
+        )
+    np.testing.assert_array_equal(mapped.benchmark.to_numpy(), source.benchmark.to_numpy())
+
+def _assert_mapped(snapshot):
+    for values in (snapshot.panel.values, snapshot.vol_cube.values):
+        assert isinstance(values, np.memmap)
+        assert not values.flags.writeable
+    # DataFrame görünümü dosya sayfalarını kopyalamadan kullanır
+    assert np.shares_memory(snapshot.data.to_numpy(), snapshot.panel.values)
+
+def test_publish_and_read_versions(tmp_path):
+    writer = SharedSnapshotStore(root=str(tmp_path))
+    first, second = _snapshot(0), _snapshot(1)
+    published_first = writer.publish(KEY, first)
+    _assert_same(published_first, first)
+    _assert_mapped(published_first)
+    published_second = writer.publish(KEY, second)
+    assert published_second.version > published_first.version
+
+    # Başka bir süreç aynı sürümü aynı numarayla ve değerlerle görür
+    reader = SharedSnapshotStore(root=str(tmp_path))
+    mapped = reader.read(KEY)
+    assert mapped.version == published_second.version
+    assert reader.read(KEY) is mapped
+    _assert_same(mapped, second)
+    _assert_mapped(mapped)
+    # Eski sürümü eşlemiş olan görünüm değişmez
+    _assert_same(published_first, first)
+
+def test_prune_keeps_latest_versions_and_skips_foreign_names(tmp_path):
+    store = SharedSnapshotStore(root=str(tmp_path), keep_versions=2)
+    for seed in range(4):
+        store.publish(KEY, _snapshot(seed))
+    key_dir = store._key_dir(KEY)
+    os.makedirs(os.path.join(key_dir, "vfoo"))
+    store.publish(KEY, _snapshot(4))
+
+    names = sorted(os.listdir(key_dir))
+    versions = [name for name in names if name.startswith("v") and name != "vfoo"]
+    assert len(versions) == 2
+    assert "vfoo" in names
+    _assert_same(store.read(KEY), _snapshot(4))
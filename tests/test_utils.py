@@ -0,0 +1,70 @@
+import itertools
+import numpy as np
+import pandas as pd
+import utils
+from data_services import calculate_percent_change
+from utils import LRUCache, fingerprint
+
+def _frame(n_days=200, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=n_days)
+    return pd.DataFrame(rng.normal(100, 5, (n_days, 4)), index=index, columns=["A", "B", "C", "D"])
+
+def _variants():
+    base = _frame()
+    middle = base.copy()
+    # repr yalnızca baş ve sonu gösterdiğinden bu değişiklik str() anahtarında görünmez
+    middle.iloc[100, 2] += 1.0
+    assert str(middle) == str(base)
+    with_nan = base.copy()
+    with_nan.iloc[50, 0] = np.nan
+    return {
+        "base": base,
+        "copy": base.copy(),
+        "middle": middle,
+        "nan": with_nan,
+        "nan_copy": with_nan.copy(),
+        "float32": base.astype(np.float32),
+        "renamed": base.rename(columns={"D": "E"}),
+        "shifted_index": base.set_axis(base.index + pd.Timedelta(days=1)),
+        "fortran": pd.DataFrame(np.asfortranarray(base.to_numpy()), index=base.index, columns=base.columns),
+    }
+
+def test_fingerprint_agrees_with_frame_equals():
+    variants = _variants()
+    for (name_a, a), (name_b, b) in itertools.combinations(variants.items(), 2):
+        assert (fingerprint(a) == fingerprint(b)) == a.equals(b), (name_a, name_b)
+
+def test_memoized_percent_change_matches_pandas():
+    calculate_percent_change.cache_clear()
+    before = calculate_percent_change.cache_stats()
+    for name, data in _variants().items():
+        expected = data.pct_change(fill_method=None).iloc[-1] * 100
+        for _ in range(2):
+            pd.testing.assert_series_equal(calculate_percent_change(data), expected, check_dtype=False, obj=name)
+    stats = calculate_percent_change.cache_stats()
+    assert stats["hits"] - before["hits"] >= len(_variants())
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=300)
+    for key in "abc":
+        cache.put(key, key, size=100)
+    assert cache.get("a") == (True, "a")
+    cache.put("d", "d", size=100)
+    assert cache.get("b") == (False, None)
+    assert [cache.get(key)[0] for key in "acd"] == [True, True, True]
+    # Bütçeden büyük değer eklenmez ve diğer kayıtları çıkarmaz
+    cache.put("big", "big", size=1000)
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (3, 300, 1)
+
+def test_lru_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_bytes=1000, ttl=10)
+    cache.put("a", 1, size=10)
+    now[0] += 5
+    assert cache.get("a") == (True, 1)
+    now[0] += 10
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["expirations"] == 1
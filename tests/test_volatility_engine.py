@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_services import calculate_volatility
+from volatility_engine import (
+    StreamingVolatility, EwmaVolatility, OHLC_ESTIMATORS, calculate_volatility_cube, calculate_estimator_cubes
+)
+
+WINDOW = 10
+
+def _panel(n_days=120, n_tickers=6, seed=0):
+    """Dağınık eksik değerli rastgele yürüyüş fiyat paneli"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=n_days)
+    prices = 100 * np.exp(rng.normal(0, 0.02, (n_days, n_tickers)).cumsum(axis=0))
+    prices[rng.random(prices.shape) < 0.05] = np.nan
+    return pd.DataFrame(prices, index=index, columns=[f"T{i}.IS" for i in range(n_tickers)])
+
+def _expected(data):
+    return calculate_volatility(data, WINDOW).reindex(data.index)
+
+def _assert_matches(actual, expected):
+    assert actual.isna().equals(expected.isna())
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9, equal_nan=True)
+
+@pytest.mark.parametrize("reseed_interval", [1000, 7])
+def test_update_matches_batch(reseed_interval):
+    data = _panel()
+    seed = 40
+    engine = StreamingVolatility(data.iloc[:seed], WINDOW, reseed_interval=reseed_interval)
+    expected = _expected(data)
+    _assert_matches(engine.current(), expected.iloc[seed - 1])
+    for date, row in data.iloc[seed:].iterrows():
+        _assert_matches(engine.update(row), expected.loc[date])
+
+def test_replace_last_matches_batch():
+    data = _panel(seed=1)
+    engine = StreamingVolatility(data.iloc[:30], WINDOW, reseed_interval=5)
+    rng = np.random.default_rng(2)
+    for position in range(30, len(data)):
+        date = data.index[position]
+        # Gün içinde bugünün barı birkaç kez değişir, son değer kalıcıdır
+        for _ in range(3):
+            tick = data.iloc[position] * (1 + rng.normal(0, 0.01, data.shape[1]))
+            engine.update(tick, replace_last=engine.last_index == date)
+            data.iloc[position] = tick
+        _assert_matches(engine.current(), _expected(data.iloc[:position + 1]).loc[date])
+
+# max_cells küçükse pencereler istendikçe hesaplanır
+@pytest.mark.parametrize("max_cells", [None, 10])
+def test_cube_matches_rolling_cv(max_cells):
+    data = _panel(seed=5)
+    windows = [5, WINDOW, 20]
+    kwargs = {} if max_cells is None else {"max_cells": max_cells}
+    cube = calculate_volatility_cube(data, windows, **kwargs)
+    for window in windows:
+        expected = calculate_volatility(data, window)
+        actual = cube.get(window)
+        pd.testing.assert_index_equal(actual.index, expected.index)
+        _assert_matches(actual, expected)
+
+def _ewma_reference(data, lam, min_periods):
+    """pandas ewm ile tüm geçmişten EWMA oynaklığı (son geçerli kapanışa göre getiri)"""
+    log_close = np.log(data)
+    returns = log_close - log_close.ffill().shift(1)
+    var = (returns ** 2).ewm(alpha=1 - lam, adjust=False, ignore_na=True).mean()
+    enough = returns.notna().cumsum() >= min_periods
+    return (np.sqrt(var) * 100).where(data.notna() & enough)
+
+@pytest.mark.parametrize("lam", [0.94, 0.97])
+def test_ewma_extend_matches_full_history(lam):
+    data = _panel(n_days=160, seed=3)
+    engine = EwmaVolatility(data.iloc[:60], lam, min_periods=WINDOW)
+    rng = np.random.default_rng(4)
+    # Kayan 60 barlık pencere; her adımda son bar gün içinde bir kez değişir
+    for end in range(61, len(data) + 1, 3):
+        window = data.iloc[end - 60:end].copy()
+        engine.extend(window)
+        window.iloc[-1] = window.iloc[-1] * (1 + rng.normal(0, 0.01, data.shape[1]))
+        actual = engine.extend(window)
+        full = pd.concat([data.iloc[:end - 1], window.iloc[-1:]])
+        expected = _ewma_reference(full, lam, WINDOW).reindex(window.index).dropna(how="all")
+        pd.testing.assert_index_equal(actual.index, expected.index)
+        _assert_matches(actual, expected)
+
+def _ohlc(data, seed=6):
+    """Kapanış panelinden eksik değerli açılış/en yüksek/en düşük panelleri"""
+    rng = np.random.default_rng(seed)
+    close = data.to_numpy()
+    opens = np.vstack([close[:1], close[:-1]]) * np.exp(rng.normal(0, 0.005, close.shape))
+    highs = np.fmax(opens, close) * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))
+    lows = np.fmin(opens, close) * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))
+    return {
+        name: pd.DataFrame(values, index=data.index, columns=data.columns)
+        for name, values in (("Open", opens), ("High", highs), ("Low", lows), ("Close", close))
+    }
+
+def _estimator_reference(ohlc, estimator, window):
+    """pandas rolling ile bar başına yüzde oynaklık"""
+    log_open, log_high, log_low, log_close = (np.log(ohlc[name]) for name in ("Open", "High", "Low", "Close"))
+    open_close = log_close - log_open
+    high_low = log_high - log_low
+    up, down = log_high - log_open, log_low - log_open
+    rogers_satchell = up * (up - open_close) + down * (down - open_close)
+    if estimator == "close_to_close":
+        variance = (log_close - log_close.shift(1)).rolling(window).var()
+    elif estimator == "parkinson":
+        variance = (high_low ** 2 / (4 * np.log(2))).rolling(window).mean()
+    elif estimator == "garman_klass":
+        variance = (0.5 * high_low ** 2 - (2 * np.log(2) - 1) * open_close ** 2).rolling(window).mean()
+    elif estimator == "rogers_satchell":
+        variance = rogers_satchell.rolling(window).mean()
+    else:
+        k = 0.34 / (1.34 + (window + 1) / (window - 1))
+        variance = (
+            (log_open - log_close.shift(1)).rolling(window).var()
+            + k * open_close.rolling(window).var()
+            + (1 - k) * rogers_satchell.rolling(window).mean()
+        )
+    return (np.sqrt(variance.clip(lower=0)) * 100).dropna(how="all")
+
+@pytest.mark.parametrize("estimator", OHLC_ESTIMATORS)
+def test_estimator_cubes_match_rolling(estimator):
+    ohlc = _ohlc(_panel(seed=7))
+    windows = [5, WINDOW]
+    cubes = calculate_estimator_cubes(ohlc, windows)
+    for window in windows:
+        expected = _estimator_reference(ohlc, estimator, window)
+        actual = cubes[estimator].get(window)
+        pd.testing.assert_index_equal(actual.index, expected.index)
+        _assert_matches(actual, expected)
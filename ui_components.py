@@ -1,7 +1,16 @@
 import streamlit as st
 import os
-from constants import DEFAULT_TICKERS
+import pandas as pd
+from constants import (
+    DEFAULT_TICKERS, DEFAULT_WINDOW_SIZE, WINDOW_MIN, WINDOW_MAX,
+    UNIVERSES, DEFAULT_UNIVERSE, INTERVAL_LIMITS, DEFAULT_INTERVAL,
+    VOLATILITY_ESTIMATORS, DEFAULT_ESTIMATOR, EWMA_LAMBDA, EWMA_LAMBDA_OPTIONS
+)
+from data_services import get_universe_tickers
 from html_components import HtmlComponent
+from utils import CACHE_REGISTRY, estimate_size
+from volatility_engine import ewma_half_life
+import instrumentation
 
 # CSS Stilleri
 def load_css():
@@ -88,7 +97,7 @@ def create_sidebar(default_tickers=None):
         default_tickers: Varsayılan hisse kodları listesi, None ise constants.DEFAULT_TICKERS kullanılır
         
     Returns:
-        Tuple: (data_days, window_size, top_n, selected_tickers, refresh_btn, page)
+        Tuple: (data_days, window_size, top_n, selected_tickers, refresh_btn, page, interval, estimator, ewma_lambda)
     """
     if default_tickers is None:
         default_tickers = DEFAULT_TICKERS
@@ -108,7 +117,38 @@ def create_sidebar(default_tickers=None):
     with col1:
         data_days = st.slider("Veri Günü", 30, 180, 40, key="data_days")
     with col2:
-        window_size = st.slider("Pencere (Gün)", 10, 30, 20, key="window_size")
+        window_size = st.slider("Pencere (Bar)", WINDOW_MIN, WINDOW_MAX, DEFAULT_WINDOW_SIZE, key="window_size")
+
+    # Gün içi aralıklarda veri günü Yahoo'nun izin verdiği geçmişe kırpılır
+    intervals = list(INTERVAL_LIMITS.keys())
+    interval = st.sidebar.selectbox(
+        "Bar Aralığı",
+        options=intervals,
+        index=intervals.index(DEFAULT_INTERVAL),
+        format_func=lambda key: INTERVAL_LIMITS[key]["label"],
+        key="interval"
+    )
+
+    # Aralık tabanlı yöntemler OHLC barlarından hesaplanır
+    estimators = list(VOLATILITY_ESTIMATORS.keys())
+    estimator = st.sidebar.selectbox(
+        "Oynaklık Yöntemi",
+        options=estimators,
+        index=estimators.index(DEFAULT_ESTIMATOR),
+        format_func=lambda key: VOLATILITY_ESTIMATORS[key]["label"],
+        key="estimator"
+    )
+
+    # EWMA pencere kullanmaz; hafıza λ (yarı ömür) ile ayarlanır
+    ewma_lambda = EWMA_LAMBDA
+    if estimator == "ewma":
+        ewma_lambda = st.sidebar.select_slider(
+            "EWMA λ",
+            options=EWMA_LAMBDA_OPTIONS,
+            value=EWMA_LAMBDA,
+            format_func=lambda lam: f"{lam:.2f} (yarı ömür {ewma_half_life(lam):.1f} bar)",
+            key="ewma_lambda"
+        )
 
     top_n = st.sidebar.slider("Gösterilecek Hisse", 3, 10, 5, key="top_n")
     
@@ -116,11 +156,19 @@ def create_sidebar(default_tickers=None):
     st.sidebar.markdown('<hr class="sidebar-divider">', unsafe_allow_html=True)
     st.sidebar.markdown('<p class="sidebar-subtitle">Hisse Seçimi</p>', unsafe_allow_html=True)
 
-    # Hisse seçimi
-    use_default = st.sidebar.checkbox("BIST-30 Hisseleri", value=True)
+    # Hisse seçimi: hazır evrenlerden biri veya özel liste
+    custom_option = "Özel Liste"
+    universe = st.sidebar.selectbox(
+        "Hisse Evreni",
+        options=list(UNIVERSES.keys()) + [custom_option],
+        index=list(UNIVERSES.keys()).index(DEFAULT_UNIVERSE),
+        key="universe"
+    )
 
-    if use_default:
+    if universe == DEFAULT_UNIVERSE:
         selected_tickers = default_tickers
+    elif universe != custom_option:
+        selected_tickers = get_universe_tickers(universe)
     else:
         custom_tickers = st.sidebar.text_area(
             "Özel hisse kodları",
@@ -147,4 +195,55 @@ def create_sidebar(default_tickers=None):
     </div>
     """, unsafe_allow_html=True)
     
-    return data_days, window_size, top_n, selected_tickers, refresh_btn, page 
\ No newline at end of file
+    return data_days, window_size, top_n, selected_tickers, refresh_btn, page, interval, estimator, ewma_lambda
+
+# Performans paneli
+def create_debug_panel(prefetcher=None, registry=None):
+    """Ölçüm açıksa kenar çubuğunda aşama bazında süre, önbellek ve bellek tablolarını gösterir
+    
+    Args:
+        prefetcher: Verilirse anlık görüntülerin bellek kullanımı da gösterilir
+        registry: Verilirse sürüm başına oturum sayıları da gösterilir (DatasetRegistry)
+    """
+    if not instrumentation.is_enabled():
+        return
+    
+    with st.sidebar.expander("🛠️ Performans", expanded=False):
+        snapshot = instrumentation.registry.snapshot()
+        if snapshot:
+            stages = pd.DataFrame.from_dict(snapshot, orient="index")
+            stages["ort. ms"] = stages["total_seconds"] / stages["calls"] * 1000
+            stages["maks. ms"] = stages["max_seconds"] * 1000
+            stages["son ms"] = stages["last_seconds"] * 1000
+            lookups = stages["cache_hits"] + stages["cache_misses"]
+            stages["isabet"] = (stages["cache_hits"].astype(str) + "/" + lookups.astype(str)).where(lookups > 0, "")
+            stages["son KB"] = stages["last_payload_bytes"] / 1024
+            stages = stages.sort_values("total_seconds", ascending=False)
+            st.dataframe(
+                stages[["calls", "ort. ms", "maks. ms", "son ms", "isabet", "son KB"]].round(1).rename(columns={"calls": "çağrı"}),
+                use_container_width=True
+            )
+        else:
+            st.caption("Henüz ölçüm yok")
+        
+        caches = pd.DataFrame.from_dict(
+            {name: cache.stats() for name, cache in CACHE_REGISTRY.items()}, orient="index"
+        )
+        if not caches.empty:
+            caches["MB"] = caches["bytes"] / 2**20
+            st.dataframe(caches[["entries", "hits", "misses", "evictions", "MB"]].round(2), use_container_width=True)
+        
+        # Anlık görüntüler tüm oturumlarca paylaşılır; oturuma özgü veri yalnızca session_state'tir
+        if prefetcher is not None:
+            memory = prefetcher.memory_report()
+            if not memory.empty:
+                st.dataframe((memory / 2**20).round(2).add_suffix(" MB"), use_container_width=True)
+        if registry is not None:
+            versions = registry.report()
+            if not versions.empty:
+                st.dataframe(versions, use_container_width=True)
+        session_bytes = sum(estimate_size(value) for value in st.session_state.to_dict().values())
+        st.caption(f"Bu oturumun session_state boyutu: {session_bytes / 1024:.1f} KB")
+        
+        if st.button("Ölçümleri Sıfırla", key="reset_metrics"):
+            instrumentation.registry.reset()
@@ -1,28 +1,231 @@
 import functools
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from constants import MEMO_CACHE_MAX_BYTES, MEMO_CACHE_TTL
+
+# İsimle erişilebilen tüm LRU önbellekleri (istatistik raporları için)
+CACHE_REGISTRY = {}
+
+def _hash_array(hasher, arr):
+    """NumPy dizisinin içeriğini özet fonksiyonuna ekler"""
+    arr = np.asarray(arr)
+    hasher.update(str(arr.dtype).encode())
+    hasher.update(str(arr.shape).encode())
+    if arr.dtype == object:
+        # Nesne dizileri (ör. metin) için pandas'ın değer bazlı özetini kullan
+        hasher.update(pd.util.hash_array(arr.ravel()).tobytes())
+    elif arr.flags.f_contiguous and not arr.flags.c_contiguous:
+        # DataFrame blokları genellikle sütun öncelikli; kopya almadan oku
+        hasher.update(b"F")
+        hasher.update(arr.T.view(np.uint8).data)
+    else:
+        hasher.update(np.ascontiguousarray(arr).view(np.uint8).data)
+
+def _update_fingerprint(hasher, obj):
+    if isinstance(obj, pd.DataFrame):
+        hasher.update(b"DataFrame")
+        _hash_array(hasher, obj.index.values)
+        hasher.update(repr(list(obj.columns)).encode())
+        if obj.shape[1] and obj.dtypes.nunique() == 1 and obj.dtypes.iloc[0] != object:
+            # Tek tipli çerçevede değerler tek bir tampondan okunur
+            _hash_array(hasher, obj.to_numpy())
+        else:
+            for column in range(obj.shape[1]):
+                _hash_array(hasher, obj.iloc[:, column].values)
+    elif isinstance(obj, pd.Series):
+        hasher.update(b"Series")
+        hasher.update(repr(obj.name).encode())
+        _hash_array(hasher, obj.index.values)
+        _hash_array(hasher, obj.values)
+    elif isinstance(obj, pd.Index):
+        hasher.update(b"Index")
+        _hash_array(hasher, obj.values)
+    elif isinstance(obj, np.ndarray):
+        _hash_array(hasher, obj)
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(f"{type(obj).__name__}:{len(obj)}".encode())
+        for item in obj:
+            _update_fingerprint(hasher, item)
+    elif isinstance(obj, dict):
+        hasher.update(f"dict:{len(obj)}".encode())
+        for key in sorted(obj, key=repr):
+            hasher.update(repr(key).encode())
+            _update_fingerprint(hasher, obj[key])
+    elif hasattr(obj, "fingerprint_parts"):
+        # Dizi tabanlı nesneler (ör. CompactPanel) özetlenecek dizilerini kendisi bildirir
+        hasher.update(type(obj).__name__.encode())
+        _update_fingerprint(hasher, obj.fingerprint_parts())
+    else:
+        hasher.update(f"{type(obj).__name__}:{obj!r}".encode())
+
+def fingerprint(obj):
+    """Nesnenin içeriğine dayalı kısa bir özet anahtarı üretir
+
+    DataFrame ve Serilerde şekil, veri tipleri, indeks ve değer tamponları
+    özetlenir; böylece repr'leri aynı görünen farklı veriler çakışmaz.
+
+    Args:
+        obj: DataFrame, Seri, NumPy dizisi, liste/sözlük veya basit değer
+
+    Returns:
+        Onaltılık özet metni
+    """
+    hasher = hashlib.sha1(usedforsecurity=False)
+    _update_fingerprint(hasher, obj)
+    return hasher.hexdigest()
+
+def estimate_size(obj):
+    """Nesnenin bellekte kapladığı yaklaşık bayt miktarı"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(getattr(obj, "nbytes", None), int):
+        # Dizi tabanlı nesneler (ör. BarSeries) kendi boyutunu bildirir
+        return sys.getsizeof(obj) + obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_size(item) for item in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+class LRUCache:
+    """Bayt bütçesiyle sınırlı, opsiyonel TTL'li ve iş parçacığı güvenli LRU önbellek
+
+    Bütçe aşıldığında en uzun süredir kullanılmayan kayıtlar çıkarılır.
+    İsabet, ıskalama, çıkarma ve süre dolumu sayıları stats() ile alınabilir.
+    """
+
+    def __init__(self, max_bytes=MEMO_CACHE_MAX_BYTES, ttl=MEMO_CACHE_TTL, name=None):
+        """
+        Args:
+            max_bytes: Önbellekteki değerlerin toplam bayt sınırı
+            ttl: Kayıtların geçerlilik süresi (saniye), None ise süresiz
+            name: Verilirse önbellek CACHE_REGISTRY'ye bu isimle kaydedilir
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if name is not None:
+            CACHE_REGISTRY[name] = self
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def get(self, key):
+        """Anahtarın değerini döndürür
+
+        Returns:
+            Tuple: (bulundu mu, değer)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value, size=None):
+        """Değeri önbelleğe ekler ve bütçeyi aşan eski kayıtları çıkarır
+
+        Args:
+            key: Önbellek anahtarı
+            value: Saklanacak değer
+            size: Değerin bayt boyutu, None ise tahmin edilir
+        """
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # Bütçeden büyük tek bir değer önbelleği boşaltmasın
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, time.monotonic())
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Tüm kayıtları siler (istatistikler korunur)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Önbellek istatistikleri sözlüğü"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
 
 # Önbelleğe alma dekoratörü
-def memoize(func):
+def memoize(func=None, *, max_bytes=MEMO_CACHE_MAX_BYTES, ttl=MEMO_CACHE_TTL):
     """Fonksiyon sonuçlarını önbelleğe alır
     
     Fonksiyon sonuçlarını tekrar hesaplamamak için bir önbellek mekanizması sağlar.
-    Aynı parametrelerle tekrar çağrıldığında, hesaplama yapmak yerine önbellekteki sonucu döndürür.
+    Anahtar, parametrelerin içerik özetinden (fingerprint) üretilir; önbellek
+    bayt bütçesini aşınca en eski kullanılan sonuçlar çıkarılır.
+    
+    Kullanım:
+    @memoize
+    def f(...): ...
+    
+    @memoize(max_bytes=32 * 1024 * 1024, ttl=600)
+    def g(...): ...
     
     Args:
         func: Önbelleğe alınacak fonksiyon
+        max_bytes: Önbelleğin bayt sınırı
+        ttl: Sonuçların geçerlilik süresi (saniye), None ise süresiz
         
     Returns:
-        Önbelleğe alınmış fonksiyon
+        Önbelleğe alınmış fonksiyon; istatistikler wrapper.cache_stats() ile alınır
     """
-    cache = {}
+    if func is None:
+        return lambda f: memoize(f, max_bytes=max_bytes, ttl=ttl)
+    
+    cache = LRUCache(max_bytes=max_bytes, ttl=ttl, name=f"{func.__module__}.{func.__qualname__}")
     
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Her parametre dönüştürülebilir olmalı
-        key = str(args) + str(sorted(kwargs.items()))
-        if key not in cache:
-            cache[key] = func(*args, **kwargs)
-        return cache[key]
+        key = fingerprint((args, kwargs))
+        hit, value = cache.get(key)
+        if not hit:
+            value = func(*args, **kwargs)
+            cache.put(key, value)
+        return value
     
+    wrapper.cache = cache
+    wrapper.cache_stats = cache.stats
+    wrapper.cache_clear = cache.clear
     return wrapper
 
 def extract_page_title(page_name):
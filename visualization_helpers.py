@@ -1,9 +1,20 @@
+import functools
+import inspect
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.io as pio
 from constants import (
-    PLOT_BGCOLOR, PAPER_BGCOLOR, GRID_COLOR
+    PLOT_BGCOLOR, PAPER_BGCOLOR, GRID_COLOR,
+    FIGURE_CACHE_MAX_BYTES, DATA_CACHE_TTL, BAR_CHART_MAX_BARS, LINE_WEBGL_MIN_POINTS
 )
 from formatters import format_date, clean_ticker_series
+from utils import LRUCache, fingerprint
+from instrumentation import annotate
+from data_services import select_top_n, select_top_bottom
+
+# Tüm oturumlarca paylaşılan figür önbelleği (JSON olarak saklanır)
+figure_cache = LRUCache(max_bytes=FIGURE_CACHE_MAX_BYTES, ttl=DATA_CACHE_TTL, name="figures")
 
 def set_figure_template(fig):
     """Grafiklere tutarlı tema uygular"""
@@ -56,6 +67,7 @@ def apply_figure_template(func):
         info_text = ...
         return fig, info_text
     """
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         result = func(*args, **kwargs)
         if isinstance(result, tuple) and len(result) >= 1:
@@ -67,6 +79,45 @@ def apply_figure_template(func):
         return result
     return wrapper
 
+def cache_figure(func):
+    """
+    Grafik fonksiyonları için süreç genelinde paylaşılan önbellek dekoratörü.
+    Anahtar; fonksiyon adı ile veri ve parametrelerin (top_n, periods, window,
+    ticker vb.) içerik özetinden oluşur. Figür JSON olarak saklandığından
+    oturumlar aynı nesneyi paylaşmaz, her isabette yeni bir figür döner.
+    
+    Kullanım:
+    @cache_figure
+    @apply_figure_template
+    def herhangi_bir_grafik_fonksiyonu(parametreler):
+        ...
+        return fig, info_text
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    signature = inspect.signature(func)
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Konumsal ve isimli çağrılar aynı anahtarı üretsin
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = f"{name}:{fingerprint(bound.arguments)}"
+        hit, value = figure_cache.get(key)
+        if hit:
+            fig_json, rest = value
+            annotate(cache_hit=True, payload_bytes=len(fig_json))
+            return (pio.from_json(fig_json),) + rest
+        
+        result = func(*args, **kwargs)
+        fig_json = result[0].to_json()
+        annotate(cache_hit=False, payload_bytes=len(fig_json))
+        figure_cache.put(key, (fig_json, result[1:]), size=len(fig_json) + sum(len(str(r)) for r in result[1:]))
+        return result
+    
+    # Önbelleği atlayan çağrılar için (ör. performans ölçümü)
+    wrapper.uncached = func
+    return wrapper
+
 class PlotHelpers:
     """Görselleştirme işlemlerinde tekrar eden ortak fonksiyonları sağlar"""
     
@@ -143,6 +194,67 @@ class PlotHelpers:
         )
         return fig
     
+    @staticmethod
+    def limit_bars(data, max_bars=BAR_CHART_MAX_BARS):
+        """Bar grafiği için en yüksek ve en düşük değerli hisseleri seçer
+        
+        Hisse sayısı max_bars'ı aşmıyorsa tüm hisseler azalan sırada döner.
+        
+        Args:
+            data: Hisse kodu indeksli değer serisi
+            max_bars: Gösterilecek en fazla bar sayısı
+            
+        Returns:
+            Tuple: (seçilmiş seri, bilgi metnine eklenecek not veya boş metin)
+        """
+        selected = select_top_bottom(data, max_bars)
+        total = data.count()
+        if total <= max_bars:
+            return selected, ""
+        note = (
+            f"<br><br>Toplam {total} hisseden en yüksek {max_bars - max_bars // 2} ve "
+            f"en düşük {max_bars // 2} değere sahip olanlar gösterilmektedir."
+        )
+        return selected, note
+    
+    @staticmethod
+    def block_mean(values, row_block=1, col_block=1):
+        """2 boyutlu diziyi blok ortalamalarıyla küçültür
+        
+        NaN değerler ortalamaya katılmaz; tamamı NaN olan bloklar NaN kalır.
+        
+        Args:
+            values: (satır × sütun) NumPy dizisi
+            row_block: Bir blokta birleştirilecek satır sayısı
+            col_block: Bir blokta birleştirilecek sütun sayısı
+            
+        Returns:
+            (ceil(satır/row_block) × ceil(sütun/col_block)) boyutlu dizi
+        """
+        n_rows, n_cols = values.shape
+        out_rows = -(-n_rows // row_block)
+        out_cols = -(-n_cols // col_block)
+        
+        # Blok boyutunun katlarına NaN ile tamamla
+        padded = np.full((out_rows * row_block, out_cols * col_block), np.nan)
+        padded[:n_rows, :n_cols] = values
+        blocks = padded.reshape(out_rows, row_block, out_cols, col_block)
+        
+        valid = ~np.isnan(blocks)
+        sums = np.where(valid, blocks, 0.0).sum(axis=(1, 3))
+        counts = valid.sum(axis=(1, 3))
+        return np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+    
+    @staticmethod
+    def is_intraday(index):
+        """Tarih indeksinin gün içi barlardan oluşup oluşmadığı"""
+        return isinstance(index, pd.DatetimeIndex) and len(index) > 0 and not index.normalize().equals(index)
+    
+    @staticmethod
+    def date_label_format(index):
+        """Eksen ve hover etiketleri için tarih biçimi (gün içi veride saat eklenir)"""
+        return '%d.%m %H:%M' if PlotHelpers.is_intraday(index) else '%d.%m.%Y'
+    
     @staticmethod
     def get_date_range_title(first_date, last_date, base_title):
         """Tarih aralığı içeren başlık metni oluşturur
@@ -174,17 +286,17 @@ class PlotHelpers:
         # Eğer DataFrame ise önce seri haline getir
         if isinstance(data, pd.DataFrame):
             if sort_by == 'value':
-                data = data.iloc[-1].sort_values(ascending=ascending)
+                data = data.iloc[-1]
             elif sort_by is not None:
                 data = data.sort_values(by=sort_by, ascending=ascending).iloc[-1]
             else:
                 data = data.iloc[-1]
-        else:  # Seri ise direkt devam et
-            if sort_by == 'value':
-                data = data.sort_values(ascending=ascending)
         
-        # En üst N veriyi al
-        if top_n is not None:
+        if sort_by == 'value':
+            # Kısmi seçim: yalnızca gösterilecek N eleman sıralanır
+            data = select_top_n(data, top_n if top_n is not None else len(data), ascending=ascending)
+        elif top_n is not None:
+            # En üst N veriyi al
             data = data.iloc[:top_n]
         
         # Hisse kodlarını temizle
@@ -223,6 +335,10 @@ class PlotHelpers:
         color_sequence = color_sequence or COLOR_SCALE
         line_width = line_width or LINE_WIDTH
         
+        # Gün içi verilerde nokta sayısı çok arttığından WebGL ile çiz
+        render_mode = "webgl" if df.size > LINE_WEBGL_MIN_POINTS else "auto"
+        date_format = PlotHelpers.date_label_format(df.index)
+        
         # Çizgi grafiği oluştur
         fig = px.line(
             df,
@@ -230,13 +346,14 @@ class PlotHelpers:
             y=df.columns,
             title=title,
             color_discrete_sequence=color_sequence,
-            labels={"value": y_label, "variable": "Hisse", "x": x_label}
+            labels={"value": y_label, "variable": "Hisse", "x": x_label},
+            render_mode=render_mode
         )
         
         # Standart özellikler
         fig.update_traces(
             line=dict(width=line_width),
-            hovertemplate=f'<b>%{{y:.{hover_precision}f}}</b><br>%{{x|%d.%m.%Y}}<extra>%{{fullData.name}}</extra>'
+            hovertemplate=f'<b>%{{y:.{hover_precision}f}}</b><br>%{{x|{date_format}}}<extra>%{{fullData.name}}</extra>'
         )
         
         return fig 
\ No newline at end of file
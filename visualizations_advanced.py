@@ -7,17 +7,26 @@ from constants import (
     RETURN_COLOR_SCALE, HEATMAP_COLOR_SCALE,
     TEXT_FONT_SIZE, HOVER_TEXT_COLOR, 
     LINE_WIDTH, GRAPH_HEIGHT,
-    BAR_TEXT_FORMAT, PERCENTAGE_FORMAT
+    BAR_TEXT_FORMAT, PERCENTAGE_FORMAT, SCATTER_MAX_LABELS,
+    HEATMAP_HEIGHT, BENCHMARK_TICKER, CORRELATION_HEATMAP_MAX_TICKERS
 )
 from formatters import format_date, clean_ticker, clean_ticker_series
-from visualization_helpers import apply_figure_template, PlotHelpers
-from data_services import calculate_percent_change, calculate_drawdown
+from visualization_helpers import apply_figure_template, cache_figure, PlotHelpers
+from instrumentation import timed
+from data_services import calculate_percent_change
+from drawdown_engine import calculate_drawdown_matrix
+from correlation_engine import calculate_correlation
 
+@timed
+@cache_figure
 @apply_figure_template
 def plot_return_analysis(all_data, periods=20):
     """Getiri analizi (20 günlük getiri)"""
     # Hisse getirilerini hesapla
-    momentum = calculate_percent_change(all_data, periods=periods, sort=True, multiply_by_100=False)
+    momentum = calculate_percent_change(all_data, periods=periods, multiply_by_100=False)
+    
+    # Büyük evrenlerde yalnızca en çok yükselen/düşen hisseler gösterilir
+    momentum, bars_note = PlotHelpers.limit_bars(momentum)
     
     first_date = all_data.index[-periods]
     last_date = all_data.index[-1]
@@ -26,7 +35,7 @@ def plot_return_analysis(all_data, periods=20):
         f"ℹ️ **Getiri Analizi:** Her hissenin son {periods} günlük yüzde değişimini gösterir. "
         f"Formül: (Son Fiyat - {periods} Gün Önceki Fiyat) / {periods} Gün Önceki Fiyat × 100. "
         f"Yeşil pozitif, kırmızı negatif getiriyi gösterir."
-    )
+    ) + bars_note
     
     # Hisse kodlarını temizle ve verileri hazırla
     hisseler, degerler = PlotHelpers.prepare_stock_data(momentum)
@@ -51,6 +60,8 @@ def plot_return_analysis(all_data, periods=20):
     
     return fig, info_text
 
+@timed
+@cache_figure
 @apply_figure_template
 def plot_volatility_vs_return(cv_data, all_data, periods=20):
     """Oynaklık ve getiri ilişkisi için scatter plot"""
@@ -76,11 +87,12 @@ def plot_volatility_vs_return(cv_data, all_data, periods=20):
     df['Hisse'] = clean_ticker_series(df.index)
     
     # Renk skalası - theme_constants'tan al
+    # Çok sayıda noktada etiketler okunmaz hale gelir, yalnızca hover'da gösterilir
     fig = px.scatter(
         df, 
         x='Oynaklık', 
         y='Getiri (%)',
-        text='Hisse',
+        text='Hisse' if len(df) <= SCATTER_MAX_LABELS else None,
         title=f"Oynaklık vs Getiri - {format_date(first_date)} ile {format_date(last_date)} arası",
         color='Getiri (%)',
         size=abs(df['Getiri (%)']).clip(1, 20),  # Değişim miktarına göre boyutlandır
@@ -110,6 +122,8 @@ def plot_volatility_vs_return(cv_data, all_data, periods=20):
     
     return fig, info_text
 
+@timed
+@cache_figure
 @apply_figure_template
 def plot_sharpe_ratio(cv_data, all_data, periods=20):
     """Sharpe benzeri oran (Getiri / Oynaklık)"""
@@ -121,7 +135,7 @@ def plot_sharpe_ratio(cv_data, all_data, periods=20):
     returns_last_n = calculate_percent_change(all_data, periods=periods, multiply_by_100=False)
     
     # Sharpe benzeri oran
-    sharpe_like = (returns_last_n / cv_last).sort_values(ascending=False)
+    sharpe_like, bars_note = PlotHelpers.limit_bars(returns_last_n / cv_last)
     
     first_date = all_data.index[-periods]
     
@@ -129,7 +143,7 @@ def plot_sharpe_ratio(cv_data, all_data, periods=20):
         f"ℹ️ **Risk-Getiri Oranı:** Her hissenin son {periods} günlük getirisinin, "
         f"oynaklığına bölünmesiyle elde edilir. Bu oran, birim risk başına elde edilen getiriyi gösterir. "
         f"Yüksek değerler, risk göz önüne alındığında daha iyi performans gösterenleri belirtir."
-    )
+    ) + bars_note
     
     # Hisse kodlarını temizle ve verileri hazırla
     hisseler, degerler = PlotHelpers.prepare_stock_data(sharpe_like)
@@ -154,16 +168,14 @@ def plot_sharpe_ratio(cv_data, all_data, periods=20):
     
     return fig, info_text
 
+@timed
+@cache_figure
 @apply_figure_template
 def plot_price_drawdown(stock_data, ticker):
     """Hisse fiyatı ve zirveden uzaklık grafiğini oluşturur"""
     
-    # Veri hazırlama
-    df = stock_data[[ticker]].copy()
-    df.columns = ['Close']  # Sütun adını standartlaştır
-    
-    # Zirveden uzaklık hesapla - DrawdownHelper kullanarak
-    df = calculate_drawdown(df)
+    # Tüm evrenin matrisleri anlık görüntü başına bir kez hesaplanır; burada yalnızca sütun seçilir
+    df = calculate_drawdown_matrix(stock_data).frame(ticker)
     
     first_date = df.index[0]
     last_date = df.index[-1]
@@ -225,16 +237,156 @@ def plot_price_drawdown(stock_data, ticker):
         height=GRAPH_HEIGHT
     )
     
-    # En büyük düşüş miktarı
-    max_drawdown = df['Drawdown'].min()
-    max_drawdown_date = format_date(df.loc[df['Drawdown'].idxmin()].name)
+    # En büyük düşüş miktarı ve dipten zirveye dönüş süresi
+    trough = df['Drawdown'].idxmin()
+    max_drawdown = df.at[trough, 'Drawdown']
+    max_drawdown_date = format_date(trough)
+    recovery = df.at[trough, 'Recovery']
+    recovery_text = "henüz toparlanmadı" if pd.isna(recovery) else f"{int(recovery)} barda toparlandı"
     
     # Bilgi metni
     info_text = (
         f"ℹ️ **Zirveden Uzaklık Analizi:** Üstteki grafik hisse fiyatını ve şimdiye kadarki zirve noktaları gösterir. "
         f"Alttaki grafik, o anki fiyatın zirveden yüzde olarak ne kadar uzakta olduğunu gösterir. "
         f"<br><br>**{clean_ticker_name}** için bu periyotta en büyük düşüş: "
-        f"**%{max_drawdown:.2f}** ({max_drawdown_date} tarihinde)"
+        f"**%{max_drawdown:.2f}** ({max_drawdown_date} tarihinde, {recovery_text})"
+    )
+    
+    return fig, info_text 
+
+@timed
+@cache_figure
+@apply_figure_template
+def plot_deepest_drawdowns(stock_data, top_n=10):
+    """Evrendeki en derin düşüşlerin (zirveden en büyük uzaklık) sıralaması"""
+    deepest = calculate_drawdown_matrix(stock_data).deepest(top_n)
+    
+    first_date = stock_data.index[0]
+    last_date = stock_data.index[-1]
+    
+    info_text = (
+        f"ℹ️ **En Derin Düşüşler:** Periyot boyunca zirvesinden en fazla düşen {len(deepest)} hisseyi gösterir. "
+        f"Formül: (Fiyat - O Ana Kadarki Zirve) / Zirve × 100 değerinin en düşüğü. "
+        f"Tabloda düşüşün tarihi, şu anki uzaklık ve dipten zirveye dönüş süresi yer alır."
+    )
+    
+    # Hisse kodlarını temizle ve verileri hazırla
+    hisseler, degerler = PlotHelpers.prepare_stock_data(deepest['max_drawdown'])
+    
+    title = PlotHelpers.get_date_range_title(
+        first_date, last_date, "En Derin Düşüşler"
+    )
+    
+    fig = PlotHelpers.create_bar_chart(
+        x_data=hisseler,
+        y_data=degerler,
+        title=title,
+        y_label='En Büyük Düşüş (%)',
+        color_scale=RETURN_COLOR_SCALE,
+        text_format=PERCENTAGE_FORMAT
+    )
+    
+    return fig, info_text
+
+@timed
+@cache_figure
+@apply_figure_template
+def plot_correlation_heatmap(stock_data, window=20, benchmark=None, max_tickers=CORRELATION_HEATMAP_MAX_TICKERS):
+    """Son penceredeki hisseler arası korelasyon ısı haritası"""
+    correlation = calculate_correlation(stock_data, window, benchmark)
+    # Büyük evrenlerde diğer hisselerle en çok birlikte hareket edenler gösterilir
+    tickers = correlation.central(max_tickers)
+    matrix = correlation.frame(tickers)
+    clean_labels = [clean_ticker(ticker) for ticker in tickers]
+    
+    first_date = stock_data.index[max(0, len(stock_data.index) - window)]
+    last_date = stock_data.index[-1]
+    
+    info_text = (
+        f"ℹ️ **Korelasyon Matrisi:** Her kare, iki hissenin son {window} barlık logaritmik "
+        f"getirileri arasındaki korelasyonu gösterir (1: birlikte, -1: ters yönde hareket). "
+        f"Hisseler diğer hisselerle ortalama korelasyonlarına göre sıralanmıştır."
+    )
+    if len(correlation.columns) > len(tickers):
+        info_text += (
+            f"<br><br>Toplam {len(correlation.columns)} hisseden ortalama korelasyonu en yüksek "
+            f"{len(tickers)} hisse gösterilmektedir."
+        )
+    
+    title = PlotHelpers.get_date_range_title(
+        first_date, last_date, "Korelasyon Matrisi"
+    )
+    
+    fig = px.imshow(
+        matrix.to_numpy(),
+        x=clean_labels,
+        y=clean_labels,
+        color_continuous_scale="RdBu_r",
+        zmin=-1,
+        zmax=1,
+        labels=dict(x="Hisse", y="Hisse", color="Korelasyon"),
+        title=title,
+        aspect="auto"
+    )
+    fig.update_traces(hovertemplate='%{x} - %{y}: %{z:.2f}<extra></extra>')
+    fig.update_layout(height=HEATMAP_HEIGHT)
+    
+    return fig, info_text
+
+@timed
+@cache_figure
+@apply_figure_template
+def plot_average_correlation(stock_data, window=20, benchmark=None):
+    """Hisse çiftlerinin ortalama korelasyonunun zaman içindeki değişimi"""
+    average = calculate_correlation(stock_data, window, benchmark).average_series()
+    
+    info_text = (
+        f"ℹ️ **Ortalama Korelasyon:** Her tarihte, tüm hisse çiftlerinin son {window} barlık "
+        f"getiri korelasyonlarının ortalamasını gösterir. Yükselen değerler hisselerin piyasayla "
+        f"birlikte hareket ettiğini (ör. sert düşüşlerde), düşen değerler hisse bazlı ayrışmayı ifade eder."
+    )
+    
+    title = PlotHelpers.get_date_range_title(
+        stock_data.index[0], stock_data.index[-1], "Ortalama Korelasyon"
+    )
+    fig = PlotHelpers.create_line_chart(
+        average.to_frame(), title, y_label='Ortalama Korelasyon', hover_precision=3
+    )
+    fig.update_layout(showlegend=False)
+    
+    return fig, info_text
+
+@timed
+@cache_figure
+@apply_figure_template
+def plot_beta(stock_data, benchmark, window=20):
+    """Hisselerin endekse (XU100) göre son penceredeki betası"""
+    summary = calculate_correlation(stock_data, window, benchmark).summary()
+    
+    # Büyük evrenlerde yalnızca en yüksek/en düşük betalı hisseler gösterilir
+    beta, bars_note = PlotHelpers.limit_bars(summary['beta'].dropna())
+    benchmark_name = clean_ticker(BENCHMARK_TICKER)
+    
+    info_text = (
+        f"ℹ️ **Beta:** Hissenin son {window} barlık getirisinin {benchmark_name} getirisine duyarlılığıdır. "
+        f"Formül: Kov(Hisse, {benchmark_name}) / Var({benchmark_name}). 1'den büyük beta endeksten "
+        f"daha sert, 0 ile 1 arası daha sakin hareketi; negatif beta ters yönlü hareketi gösterir."
+    ) + bars_note
+    
+    hisseler, degerler = PlotHelpers.prepare_stock_data(beta)
+    
+    title = f"{format_date(stock_data.index[-1])} İtibarıyla {window} Barlık {benchmark_name} Betası"
+    
+    fig = PlotHelpers.create_bar_chart(
+        x_data=hisseler,
+        y_data=degerler,
+        title=title,
+        y_label='Beta',
+        color_scale=RETURN_COLOR_SCALE,
+        text_format=BAR_TEXT_FORMAT
     )
     
-    return fig, info_text 
\ No newline at end of file
+    # Endeksle aynı duyarlılık (beta = 1) çizgisi
+    fig.add_hline(y=1, line=dict(color="#aaaaaa", width=1, dash="dot"))
+    
+    return fig, info_text
@@ -2,7 +2,9 @@ import plotly.express as px
 from constants import (
     COLOR_SCALE, UP_COLOR, DOWN_COLOR, NEUTRAL_COLOR, 
     HEATMAP_COLOR_SCALE, TEXT_FONT_SIZE, HOVER_TEXT_COLOR,
-    LINE_WIDTH, GRAPH_HEIGHT, HEATMAP_HEIGHT
+    LINE_WIDTH, GRAPH_HEIGHT, HEATMAP_HEIGHT,
+    HEATMAP_MAX_CELLS, HEATMAP_MAX_ROWS,
+    VOLATILITY_ESTIMATORS, DEFAULT_ESTIMATOR
 )
 from formatters import (
     format_date,
@@ -11,8 +13,9 @@ from formatters import (
     clean_ticker,
     clean_ticker_series
 )
-from visualization_helpers import apply_figure_template, PlotHelpers
-from data_services import calculate_percent_change
+from visualization_helpers import apply_figure_template, cache_figure, PlotHelpers
+from instrumentation import timed
+from data_services import calculate_percent_change, calculate_volatility_order, select_top_n
 from ui_components import (
     ProgressBar,
     MetricCard
@@ -21,23 +24,30 @@ from html_components import (
     StyledDataFrame
 )
 import streamlit as st
+import numpy as np
 import pandas as pd
 
+@timed
+@cache_figure
 @apply_figure_template
-def plot_top_volatile_stocks(cv_data, top_n=5):
-    """En oynak hisseleri plotly ile çizdir"""
+def plot_top_volatile_stocks(cv_data, top_n=5, estimator=DEFAULT_ESTIMATOR):
+    """En oynak hisseleri plotly ile çizdir
+    
+    cv_data varyasyon katsayısı veya estimator ile belirtilen yöntemin oynaklık değerleridir.
+    """
+    method = VOLATILITY_ESTIMATORS[estimator]
     last_date = cv_data.index[-1]
     first_date = cv_data.index[0]
     
     # Son tarih için en oynak hisseleri bulalım
-    top_stocks = cv_data.loc[last_date].sort_values(ascending=False).head(top_n)
+    top_stocks = select_top_n(cv_data.loc[last_date], top_n)
     
     # Seçilen hisselerin zaman serileri
     df_plot = cv_data[top_stocks.index]
     
     info_text = (
-        "ℹ️ **Varyasyon Katsayısı:** Fiyatların standart sapmasının ortalamaya bölünmesiyle "
-        "hesaplanır. Yüksek değerler daha oynak hisseleri gösterir."
+        f"ℹ️ **{method['label']}:** {method['description']} "
+        "Yüksek değerler daha oynak hisseleri gösterir."
     )
     
     # Başlık oluştur
@@ -49,31 +59,60 @@ def plot_top_volatile_stocks(cv_data, top_n=5):
     fig = PlotHelpers.create_line_chart(
         df=df_plot,
         title=title,
-        y_label="Varyasyon Katsayısı",
-        hover_precision=4
+        y_label=method["axis_label"],
+        hover_precision=method["precision"]
     )
     
     return fig, info_text
 
+@timed
+@cache_figure
 @apply_figure_template
-def plot_volatility_heatmap(cv_data):
-    """Oynaklık ısı haritasını plotly ile çizdir"""
-    # Hisselerin ortalama oynaklığını hesapla ve sırala
-    avg_volatility = cv_data.mean().sort_values(ascending=False)
-    # Sıralanmış hisseleri kullanarak veriyi yeniden düzenle
-    sorted_cv_data = cv_data[avg_volatility.index]
+def plot_volatility_heatmap(cv_data, max_cells=HEATMAP_MAX_CELLS, group_rows=True, estimator=DEFAULT_ESTIMATOR):
+    """Oynaklık ısı haritasını plotly ile çizdir
+    
+    Hücre sayısı max_cells'i aşarsa veri sunucu tarafında küçültülür: tarihler
+    ardışık dönemlere bölünüp ortalanır, hisse sayısı HEATMAP_MAX_ROWS'u
+    aşarsa (group_rows=True) sıralı komşu hisseler gruplanır.
+    """
+    method = VOLATILITY_ESTIMATORS[estimator]
+    # Hisselerin ortalama oynaklığına göre sıralama (veriyle birlikte önbellekte)
+    sorted_columns = calculate_volatility_order(cv_data)
+    values = cv_data[sorted_columns].to_numpy(dtype=float).T
+    n_stocks, n_dates = values.shape
     
     first_date = cv_data.index[0]
     last_date = cv_data.index[-1]
     
+    # Hücre bütçesine göre satır grubu ve zaman dilimi boyutları
+    row_block = -(-n_stocks // HEATMAP_MAX_ROWS) if group_rows else 1
+    n_rows = -(-n_stocks // row_block)
+    col_block = -(-n_dates // max(1, max_cells // n_rows))
+    z = PlotHelpers.block_mean(values, row_block, col_block).astype(np.float32)
+    intraday = PlotHelpers.is_intraday(cv_data.index)
+    
     info_text = (
-        "ℹ️ **Isı Haritası:** Her kare, ilgili tarihteki hissenin oynaklık değerini (varyasyon katsayısı) "
+        f"ℹ️ **Isı Haritası:** Her kare, ilgili tarihteki hissenin oynaklık değerini ({method['label'].lower()}) "
         "gösterir. Koyu renkler daha yüksek oynaklığı ifade eder. Hisseler ortalama oynaklık değerine "
         "göre yukarıdan aşağıya doğru sıralanmıştır."
     )
+    if col_block > 1 or row_block > 1:
+        info_text += (
+            f" Grafiği hafif tutmak için her kare {col_block} {'barın' if intraday else 'günün'}"
+            + (f" ve {row_block} hissenin" if row_block > 1 else "")
+            + " ortalamasını gösterir."
+        )
     
     # Hisse kodlarını kısalt (IS uzantısını kaldır) - clean_ticker kullanarak
-    clean_labels = [clean_ticker(label) for label in sorted_cv_data.columns]
+    clean_labels = [clean_ticker(label) for label in sorted_columns]
+    if row_block > 1:
+        clean_labels = [
+            f"{clean_labels[i]}–{clean_labels[min(i + row_block, n_stocks) - 1]}"
+            for i in range(0, n_stocks, row_block)
+        ]
+    
+    # Her zaman diliminin başlangıç tarihi
+    date_labels = list(cv_data.index[::col_block].strftime(PlotHelpers.date_label_format(cv_data.index)))
     
     # Başlık oluştur - PlotHelpers kullanarak
     title = PlotHelpers.get_date_range_title(
@@ -82,24 +121,27 @@ def plot_volatility_heatmap(cv_data):
     
     # Transpose eden heatmap (Sıralanmış hisseleri kullan)
     fig = px.imshow(
-        sorted_cv_data.T,
+        z,
+        x=date_labels,
+        y=clean_labels,
         color_continuous_scale=HEATMAP_COLOR_SCALE,
-        labels=dict(x="Tarih", y="Hisseler", color="Varyasyon Katsayısı"),
+        labels=dict(x="Tarih", y="Hisseler", color=method["axis_label"]),
         title=title,
-        y=clean_labels
+        aspect="auto"
     )
     
+    tick_step = max(1, len(date_labels) // 8)
     fig.update_layout(
         height=HEATMAP_HEIGHT,
         xaxis=dict(
             tickmode='array',
-            tickvals=list(range(0, len(sorted_cv_data.index), max(1, len(sorted_cv_data.index)//8))),
-            ticktext=[dt.strftime('%d.%m.%Y') for dt in sorted_cv_data.index[::max(1, len(sorted_cv_data.index)//8)]]
+            tickvals=date_labels[::tick_step],
+            ticktext=date_labels[::tick_step]
         ),
         coloraxis=dict(
             colorbar=dict(
                 title=dict(
-                    text="Varyasyon<br>Katsayısı",
+                    text=method["axis_label"].replace(" ", "<br>", 1),
                     side="right"
                 ),
                 ticks="outside"
@@ -109,41 +151,49 @@ def plot_volatility_heatmap(cv_data):
     
     return fig, info_text
 
+@timed
+@cache_figure
 @apply_figure_template
-def plot_last_day_volatility(cv_data, window=20):
+def plot_last_day_volatility(cv_data, window=20, estimator=DEFAULT_ESTIMATOR):
     """Son gün oynaklık için bar grafiği"""
+    method = VOLATILITY_ESTIMATORS[estimator]
     last_date = cv_data.index[-1]
-    cv_last = cv_data.loc[last_date].sort_values(ascending=False)
+    # Büyük evrenlerde yalnızca en yüksek/en düşük değerli hisseler gösterilir
+    cv_last, bars_note = PlotHelpers.limit_bars(cv_data.loc[last_date])
     
+    # Pencere kullanmayan yöntemlerde (EWMA) başlıkta pencere belirtilmez
+    windowed = method.get("windowed", True)
+    period = f"son {window} günlük " if windowed else ""
     info_text = (
-        f"ℹ️ **Son Gün Oynaklık:** Son tarih için her hissenin son {window} günlük "
-        f"oynaklık değerlerini gösterir. Değer, ilgili dönemdeki fiyatların standart sapmasının "
-        f"ortalamaya bölünmesiyle hesaplanır."
-    )
+        f"ℹ️ **Son Gün Oynaklık:** Son tarih için her hissenin {period}"
+        f"oynaklık değerlerini gösterir. {method['label']}: {method['description']}"
+    ) + bars_note
     
     # Hisse kodlarını temizle ve verileri hazırla
     hisseler, degerler = PlotHelpers.prepare_stock_data(cv_last)
     
     # Bar grafiği oluştur - PlotHelpers kullanarak
-    title = f"{format_date(last_date)} İtibarıyla {window} Günlük Varyasyon Katsayıları"
+    title = f"{format_date(last_date)} İtibarıyla {f'{window} Günlük ' if windowed else ''}{method['axis_label']}"
     
     fig = PlotHelpers.create_bar_chart(
         x_data=hisseler,
         y_data=degerler,
         title=title,
-        y_label='Varyasyon Katsayısı',
+        y_label=method["axis_label"],
         color_scale=HEATMAP_COLOR_SCALE,
-        precision=4
+        precision=method["precision"]
     )
     
     return fig, info_text
 
-def plot_market_summary(all_data, cv_data):
+@timed
+def plot_market_summary(all_data, cv_data, estimator=DEFAULT_ESTIMATOR):
     """Piyasa özeti sekmesi için tüm içeriği oluşturur
     
     Args:
         all_data: Hisse senedi fiyat verileri DataFrame
-        cv_data: Varyasyon katsayısı DataFrame
+        cv_data: Varyasyon katsayısı (veya seçili yöntemin oynaklık) DataFrame
+        estimator: Oynaklık tahmin yöntemi
     
     Returns:
         info_text: Piyasa özetine dair bilgi metni
@@ -211,6 +261,7 @@ def plot_market_summary(all_data, cv_data):
         )
     
     # En oynak hisse
+    method = VOLATILITY_ESTIMATORS[estimator]
     with metric_cols[3]:
         max_vol = cv_data.iloc[-1].max()
         max_vol_stock = clean_ticker(cv_data.iloc[-1].idxmax())
@@ -218,7 +269,7 @@ def plot_market_summary(all_data, cv_data):
             MetricCard.create(
                 "En Oynak Hisse", 
                 max_vol_stock, 
-                f"Varyasyon: {max_vol:.4f}", 
+                f"{method['label']}: {max_vol:.{method['precision']}f}", 
                 is_percentage=False
             ), 
             unsafe_allow_html=True
@@ -230,8 +281,8 @@ def plot_market_summary(all_data, cv_data):
     col1, col2 = st.columns(2)
     
     # Yüzde değişim - zaten hesaplanmış olan daily_change'i kullan
-    top_gainers = daily_change.sort_values(ascending=False).head(5)
-    top_losers = daily_change.sort_values().head(5)
+    top_gainers = select_top_n(daily_change, 5)
+    top_losers = select_top_n(daily_change, 5, ascending=True)
     
     with col1:
         # Doğrudan clean_ticker_series kullanarak
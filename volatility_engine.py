@@ -0,0 +1,468 @@
+import functools
+import numpy as np
+import pandas as pd
+from constants import STREAMING_RESEED_INTERVAL, VOLATILITY_CUBE_MAX_CELLS, EWMA_LAMBDA, EWMA_MIN_PERIODS
+from compact_panel import as_frame, float_values
+from instrumentation import timed
+
+class StreamingVolatility:
+    """Kayan pencere varyasyon katsayısını yeni bar başına O(hisse) maliyetle günceller
+
+    Son `window` satır halka tamponda tutulur; her hisse için pencere içindeki
+    toplam ve kareler toplamı yeni bar eklenirken artırılıp çıkan bar kadar
+    azaltılır. Sayısal kararlılık için değerler hisse başına bir referans
+    fiyattan farkı olarak biriktirilir ve toplamlar belirli aralıklarla
+    tampondan yeniden hesaplanır.
+
+    Sonuçlar calculate_volatility ile aynıdır: pencerede eksik (NaN) değer
+    olan hisseler için NaN döner.
+    """
+
+    def __init__(self, history, window=20, reseed_interval=STREAMING_RESEED_INTERVAL):
+        """Motoru geçmiş fiyat verisiyle başlatır
+
+        Args:
+            history: Fiyat verileri DataFrame (satırlar tarih, sütunlar hisse)
+            window: Pencere boyutu (bar)
+            reseed_interval: Toplamların tampondan yeniden hesaplanma sıklığı (bar)
+        """
+        self.window = window
+        self.columns = history.columns
+        self.reseed_interval = reseed_interval
+        n = len(self.columns)
+
+        self._buffer = np.full((window, n), np.nan)
+        self._pos = 0
+        self._sum = np.zeros(n)
+        self._sumsq = np.zeros(n)
+        # Henüz dolmamış satırlar da eksik sayılır
+        self._nan_count = np.full(n, window)
+        self._updates = 0
+        self.last_index = None
+
+        # Referans fiyat: her hissenin ilk geçerli değeri
+        values = history.to_numpy(dtype=float)
+        self._shift = np.full(n, np.nan)
+        if len(values):
+            valid = ~np.isnan(values)
+            has_value = valid.any(axis=0)
+            first_rows = valid.argmax(axis=0)
+            self._shift[has_value] = values[first_rows[has_value], np.flatnonzero(has_value)]
+
+        # Yalnızca son pencere kadar satır durum için yeterlidir
+        for row in values[-window:]:
+            self._push(row)
+        self._reseed()
+        if len(history.index):
+            self.last_index = history.index[-1]
+
+    def _as_array(self, new_row):
+        """Seri, sözlük veya diziyi sütun sırasına göre float dizisine çevirir"""
+        if isinstance(new_row, pd.Series):
+            return new_row.reindex(self.columns).to_numpy(dtype=float)
+        if isinstance(new_row, dict):
+            return np.array([new_row.get(col, np.nan) for col in self.columns], dtype=float)
+        return np.asarray(new_row, dtype=float)
+
+    def _add(self, row, sign):
+        valid = ~np.isnan(row)
+        # İlk kez değer gelen hisselerin referansını belirle
+        unset = valid & np.isnan(self._shift)
+        self._shift[unset] = row[unset]
+        shifted = np.where(valid, row - self._shift, 0.0)
+        self._sum += sign * shifted
+        self._sumsq += sign * shifted * shifted
+        self._nan_count -= sign * valid
+
+    def _push(self, row):
+        """Tampona yeni satır ekler, en eski satırı pencereden çıkarır"""
+        self._add(self._buffer[self._pos], -1)
+        self._add(row, 1)
+        self._buffer[self._pos] = row
+        self._pos = (self._pos + 1) % self.window
+
+    def _reseed(self):
+        """Biriken yuvarlama hatasını temizlemek için toplamları tampondan hesaplar
+
+        Referans fiyat da pencere ortalamasına taşınır; fiyat ilk referanstan
+        uzaklaştıkça kareler toplamındaki sayı kaybı böylece sınırlı kalır.
+        """
+        valid = ~np.isnan(self._buffer)
+        counts = valid.sum(axis=0)
+        has_value = counts > 0
+        window_mean = np.where(valid, self._buffer, 0.0).sum(axis=0)[has_value] / counts[has_value]
+        self._shift[has_value] = window_mean
+        shifted = np.where(valid, self._buffer - self._shift, 0.0)
+        self._sum = shifted.sum(axis=0)
+        self._sumsq = (shifted * shifted).sum(axis=0)
+        self._nan_count = self.window - counts
+
+    def update(self, new_row, replace_last=False):
+        """Yeni bar ekler ve güncel varyasyon katsayılarını döndürür
+
+        Args:
+            new_row: Hisse kodu indeksli Seri (adı tarih olabilir), sözlük veya dizi
+            replace_last: True ise yeni bar eklenmez, son bar güncellenir
+                (ör. gün içi fiyat değiştikçe bugünün barı)
+
+        Returns:
+            Hisse bazında varyasyon katsayısı serisi
+        """
+        row = self._as_array(new_row)
+        if replace_last:
+            last_pos = (self._pos - 1) % self.window
+            self._add(self._buffer[last_pos], -1)
+            self._add(row, 1)
+            self._buffer[last_pos] = row
+        else:
+            self._push(row)
+
+        self._updates += 1
+        if self._updates % self.reseed_interval == 0:
+            self._reseed()
+
+        if isinstance(new_row, pd.Series) and new_row.name is not None:
+            self.last_index = new_row.name
+        return self.current()
+
+    def current(self):
+        """Son bar itibarıyla varyasyon katsayısı serisi"""
+        n = self.window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self._shift + self._sum / n
+            var = (self._sumsq - self._sum * self._sum / n) / (n - 1)
+            cv = np.sqrt(np.maximum(var, 0.0)) / mean
+        cv[self._nan_count > 0] = np.nan
+        return pd.Series(cv, index=self.columns, name=self.last_index)
+
+def ewma_half_life(lam):
+    """λ değerine karşılık gelen yarı ömür (bar)"""
+    return np.log(0.5) / np.log(lam)
+
+class EwmaVolatility:
+    """RiskMetrics EWMA oynaklığı; yeni bar başına hisse başına O(1) güncellenir
+
+    Hisse başına yalnızca varyans durumu, son geçerli log kapanış ve getiri
+    sayısı tutulur: σ²ₜ = λ·σ²ₜ₋₁ + (1 - λ)·rₜ². İlk varyans ilk getirinin
+    karesidir. Eksik fiyatlı barlarda durum değişmez, sonraki getiri son
+    geçerli kapanışa göre hesaplanır. Değerler bar başına yüzde standart
+    sapmadır; min_periods getiri birikmeden NaN döner.
+    """
+
+    def __init__(self, history, lam=EWMA_LAMBDA, min_periods=EWMA_MIN_PERIODS):
+        """Motoru geçmiş fiyat verisiyle vektörel olarak başlatır
+
+        Args:
+            history: Fiyat verileri DataFrame (satırlar tarih, sütunlar hisse)
+            lam: Bozunma katsayısı λ (0 < λ < 1)
+            min_periods: Değer gösterilmesi için gereken en az getiri sayısı
+        """
+        self.lam = lam
+        self.min_periods = min_periods
+        self.columns = history.columns
+        n = len(self.columns)
+
+        log_close = np.log(history.to_numpy(dtype=float))
+        valid = ~np.isnan(log_close)
+        prev_close = pd.DataFrame(log_close).ffill().shift(1).to_numpy()
+        returns = log_close - prev_close
+        has_return = ~np.isnan(returns)
+
+        # adjust=False özyinelemeli formülle aynıdır; ignore_na eksik barlarda durumu korur
+        var = pd.DataFrame(returns * returns).ewm(alpha=1 - lam, adjust=False, ignore_na=True).mean().to_numpy()
+        counts = has_return.cumsum(axis=0)
+
+        last_close = pd.DataFrame(log_close).ffill().to_numpy()
+        # Son barın öncesindeki durum da tutulur; böylece son bar yeniden hesaplanabilir
+        states = [(np.full(n, np.nan), np.full(n, np.nan), np.zeros(n, dtype=int))] + [
+            (var[i].copy(), last_close[i].copy(), counts[i].copy()) for i in range(max(len(var) - 2, 0), len(var))
+        ]
+        self._var, self._last_close, self._count = states[-1]
+        self._previous = states[-2] if len(states) > 1 else None
+        self.last_index = history.index[-1] if len(history.index) else None
+        self.history = pd.DataFrame(
+            self._output(var, valid, counts), index=history.index, columns=self.columns
+        )
+
+    def _output(self, var, valid, counts):
+        """Varyans durumundan gösterilecek yüzde oynaklık değerleri"""
+        sigma = np.sqrt(var) * 100
+        return np.where(valid & (counts >= self.min_periods), sigma, np.nan)
+
+    def _as_array(self, new_row):
+        """Seri, sözlük veya diziyi sütun sırasına göre float dizisine çevirir"""
+        if isinstance(new_row, pd.Series):
+            return new_row.reindex(self.columns).to_numpy(dtype=float)
+        if isinstance(new_row, dict):
+            return np.array([new_row.get(col, np.nan) for col in self.columns], dtype=float)
+        return np.asarray(new_row, dtype=float)
+
+    def update(self, new_row, replace_last=False):
+        """Yeni bar ekler ve güncel EWMA oynaklığını döndürür
+
+        Args:
+            new_row: Hisse kodu indeksli Seri (adı tarih olabilir), sözlük veya dizi
+            replace_last: True ise son bar bu değerlerle yeniden hesaplanır
+                (ör. gün içi fiyat değiştikçe bugünün barı)
+
+        Returns:
+            Hisse bazında yüzde oynaklık serisi
+        """
+        if replace_last and self._previous is not None:
+            self._var, self._last_close, self._count = self._previous
+        self._previous = (self._var.copy(), self._last_close.copy(), self._count.copy())
+
+        log_close = np.log(self._as_array(new_row))
+        valid = ~np.isnan(log_close)
+        returns = log_close - self._last_close
+        has_return = ~np.isnan(returns)
+
+        squared = returns * returns
+        self._var = np.where(
+            has_return,
+            np.where(np.isnan(self._var), squared, self.lam * self._var + (1 - self.lam) * squared),
+            self._var
+        )
+        self._count = self._count + has_return
+        self._last_close = np.where(valid, log_close, self._last_close)
+
+        if isinstance(new_row, pd.Series) and new_row.name is not None:
+            self.last_index = new_row.name
+        return pd.Series(
+            self._output(self._var, valid, self._count), index=self.columns, name=self.last_index
+        )
+
+    def extend(self, data):
+        """Fiyat panelindeki yeni barları işler ve oynaklık geçmişini data'nın aralığına göre döndürür
+
+        Yalnızca last_index'ten sonraki barlar işlenir; son bar değişmişse
+        (ör. bugünün barı) yeniden hesaplanır. Geçmiş data'nın ilk tarihinden
+        öncesi atılarak sınırlı tutulur.
+
+        Args:
+            data: Başlangıçtaki sütunları içeren fiyat verileri DataFrame
+
+        Returns:
+            Tarih × hisse yüzde oynaklık DataFrame'i (tamamen boş satırlar hariç)
+        """
+        if self.last_index is not None and len(data.index):
+            new_rows = data.loc[data.index >= self.last_index]
+            rows = []
+            for index, row in new_rows.iterrows():
+                rows.append(self.update(row, replace_last=index == self.last_index))
+            if rows:
+                updated = pd.DataFrame(rows)
+                self.history = pd.concat([self.history.drop(updated.index, errors="ignore"), updated])
+        if len(data.index):
+            self.history = self.history.loc[self.history.index >= data.index[0]]
+        return self.history.reindex(data.index).dropna(how="all")
+
+class VolatilityCube:
+    """Birden fazla pencere boyutu için oynaklık değerleri
+
+    Değerler (pencere × tarih × hisse) boyutlu tek bir dizide tutulur; bir
+    pencereye ait DataFrame yalnızca indeksleme ile elde edilir. Gün içi
+    verilerde bu dizi çok büyüyeceğinden values verilmeyebilir; bu durumda
+    yalnızca kümülatif toplamları kullanan compute fonksiyonu saklanır ve
+    her pencere ilk istendiğinde hesaplanır.
+    """
+
+    def __init__(self, values, windows, index, columns, compute=None):
+        self.values = values
+        self.windows = list(windows)
+        self.index = index
+        self.columns = columns
+        self._compute = compute
+        self._window_pos = {window: i for i, window in enumerate(self.windows)}
+        self._frames = {}
+
+    @property
+    def nbytes(self):
+        """Küp ve önbelleğe alınmış pencere çerçevelerinin bayt boyutu
+
+        Önceden hesaplanmış küpte çerçeveler küpün görünümleri olabildiğinden
+        yalnızca küp sayılır.
+        """
+        if self.values is not None:
+            return self.values.nbytes
+        return sum(frame.to_numpy().nbytes for frame in self._frames.values())
+
+    def get(self, window):
+        """Pencere boyutuna ait oynaklık DataFrame'i
+
+        calculate_volatility(data, window) ile aynı biçimde döner.
+        """
+        if window not in self._window_pos:
+            raise KeyError(f"{window} barlık pencere önceden hesaplanmadı: {self.windows}")
+        if window not in self._frames:
+            if self.values is not None:
+                window_values = self.values[self._window_pos[window]]
+            else:
+                window_values = self._compute(np.asarray([window]))[0]
+            frame = pd.DataFrame(window_values, index=self.index, columns=self.columns)
+            self._frames[window] = frame.dropna(how="all")
+        return self._frames[window]
+
+def _cumulative_sums(values):
+    """Pencere hesapları için ortalamadan kaydırılmış kümülatif toplamlar"""
+    valid = ~np.isnan(values)
+    # Sayısal kararlılık için değerleri hisse ortalamasından fark olarak topla
+    counts = valid.sum(axis=0)
+    shift = np.divide(
+        np.where(valid, values, 0.0).sum(axis=0), counts,
+        out=np.zeros(values.shape[1]), where=counts > 0
+    )
+    shifted = np.where(valid, values - shift, 0.0)
+
+    zero_row = np.zeros((1, values.shape[1]))
+    cum_sum = np.concatenate([zero_row, shifted.cumsum(axis=0)])
+    cum_sumsq = np.concatenate([zero_row, (shifted * shifted).cumsum(axis=0)])
+    cum_count = np.concatenate([zero_row, valid.cumsum(axis=0)])
+    return cum_sum, cum_sumsq, cum_count, shift
+
+def _window_moments(cum_sum, cum_sumsq, cum_count, shift, windows, variance=True):
+    """Kümülatif toplamlardan (pencere × tarih × hisse) ortalama ve örneklem varyansı
+
+    Pencere dolmamışsa veya pencerede eksik değer varsa iki sonuç da NaN olur.
+    variance=False ise varyans hesaplanmaz ve None döner.
+    """
+    n_rows = len(cum_sum) - 1
+    # (pencere × tarih) boyutlu üst ve alt sınır indeksleri
+    upper = np.arange(1, n_rows + 1)[None, :]
+    lower = np.clip(upper - windows[:, None], 0, None)
+    full = (upper - windows[:, None]) >= 0
+
+    window_sum = cum_sum[upper] - cum_sum[lower]
+    window_count = cum_count[upper] - cum_count[lower]
+
+    n = windows[:, None, None].astype(float)
+    invalid = (window_count < n) | ~full[:, :, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = shift + window_sum / n
+        mean[invalid] = np.nan
+        if not variance:
+            return mean, None
+        window_sumsq = cum_sumsq[upper] - cum_sumsq[lower]
+        var = np.maximum((window_sumsq - window_sum * window_sum / n) / (n - 1), 0.0)
+    var[invalid] = np.nan
+    return mean, var
+
+def _windowed_cv(cum_sum, cum_sumsq, cum_count, shift, windows, dtype=np.float64):
+    """Kümülatif toplamlardan (pencere × tarih × hisse) varyasyon katsayıları
+
+    Hesap float64 yapılır, sonuç dtype tipinde döner.
+    """
+    mean, var = _window_moments(cum_sum, cum_sumsq, cum_count, shift, windows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (np.sqrt(var) / mean).astype(dtype, copy=False)
+
+@timed
+def calculate_volatility_cube(data, windows, max_cells=VOLATILITY_CUBE_MAX_CELLS):
+    """Tüm pencere boyutları için varyasyon katsayısını tek geçişte hesaplar
+
+    Toplam, kareler toplamı ve geçerli değer sayısının kümülatif toplamları bir
+    kez hesaplanır; her pencerenin değerleri bu dizilerin farkından vektörel
+    olarak elde edilir.
+
+    Args:
+        data: Fiyat verileri DataFrame veya CompactPanel
+        windows: Pencere boyutları (bar)
+        max_cells: Önceden hesaplanacak en fazla hücre (pencere × tarih × hisse);
+            aşılırsa pencereler istendikçe hesaplanır
+
+    Returns:
+        VolatilityCube (float32 panelde değerler float32 saklanır)
+    """
+    windows = np.asarray(list(windows))
+    prices = float_values(data)
+    # Kümülatif toplamlar hassasiyet için her zaman float64 tutulur
+    cumulative = _cumulative_sums(prices.astype(float, copy=False))
+    frame = as_frame(data)
+
+    compute = functools.partial(_windowed_cv, *cumulative, dtype=prices.dtype)
+    if len(windows) * prices.size > max_cells:
+        return VolatilityCube(None, windows.tolist(), frame.index, frame.columns, compute)
+    return VolatilityCube(compute(windows), windows.tolist(), frame.index, frame.columns)
+
+# Tahmin yöntemleri ve kullandıkları bar başına terimler
+ESTIMATOR_TERMS = {
+    "close_to_close": ("close_close",),
+    "parkinson": ("parkinson",),
+    "garman_klass": ("garman_klass",),
+    "rogers_satchell": ("rogers_satchell",),
+    "yang_zhang": ("overnight", "open_close", "rogers_satchell")
+}
+OHLC_ESTIMATORS = tuple(ESTIMATOR_TERMS)
+
+def _ohlc_terms(opens, highs, lows, closes):
+    """Tahmin yöntemlerinin bar başına logaritmik terimleri (tarih × hisse)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_open, log_high, log_low, log_close = (np.log(values) for values in (opens, highs, lows, closes))
+    prev_close = np.full_like(log_close, np.nan)
+    prev_close[1:] = log_close[:-1]
+
+    open_close = log_close - log_open
+    up = log_high - log_open
+    down = log_low - log_open
+    high_low = log_high - log_low
+    return {
+        "close_close": log_close - prev_close,
+        "overnight": log_open - prev_close,
+        "open_close": open_close,
+        "parkinson": high_low * high_low / (4 * np.log(2)),
+        "garman_klass": 0.5 * high_low * high_low - (2 * np.log(2) - 1) * open_close * open_close,
+        "rogers_satchell": up * (up - open_close) + down * (down - open_close)
+    }
+
+def _estimator_windows(cumulative, estimator, windows):
+    """Bir tahmin yöntemi için (pencere × tarih × hisse) bar başına oynaklık (%)"""
+    if estimator == "close_to_close":
+        _, variance = _window_moments(*cumulative["close_close"], windows)
+    elif estimator == "yang_zhang":
+        n = windows[:, None, None].astype(float)
+        k = 0.34 / (1.34 + (n + 1) / (n - 1))
+        _, overnight_var = _window_moments(*cumulative["overnight"], windows)
+        _, open_close_var = _window_moments(*cumulative["open_close"], windows)
+        rs_mean, _ = _window_moments(*cumulative["rogers_satchell"], windows, variance=False)
+        variance = overnight_var + k * open_close_var + (1 - k) * rs_mean
+    else:
+        # Aralık tabanlı yöntemlerde varyans bar başına terimlerin ortalamasıdır
+        variance, _ = _window_moments(*cumulative[estimator], windows, variance=False)
+    return np.sqrt(np.maximum(variance, 0.0)) * 100
+
+@timed
+def calculate_estimator_cubes(ohlc, windows, estimators=OHLC_ESTIMATORS, max_cells=VOLATILITY_CUBE_MAX_CELLS):
+    """OHLC panellerinden birden fazla oynaklık tahmin yöntemini tek geçişte hesaplar
+
+    Bar başına logaritmik terimler ve kümülatif toplamları bir kez
+    hesaplanır; her yöntemin her penceresi bu toplamların farkından vektörel
+    olarak elde edilir. Değerler bar başına yüzde standart sapmadır.
+
+    Args:
+        ohlc: "Open", "High", "Low", "Close" -> DataFrame sözlüğü (get_ohlc_data çıktısı)
+        windows: Pencere boyutları (bar)
+        estimators: Hesaplanacak yöntemler (OHLC_ESTIMATORS'tan)
+        max_cells: Yöntem başına önceden hesaplanacak en fazla hücre;
+            aşılırsa pencereler istendikçe hesaplanır
+
+    Returns:
+        Yöntem adı -> VolatilityCube sözlüğü
+    """
+    windows = np.asarray(list(windows))
+    close = ohlc["Close"]
+    arrays = [
+        ohlc[name].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float)
+        for name in ("Open", "High", "Low", "Close")
+    ]
+    terms = _ohlc_terms(*arrays)
+    needed = {term for estimator in estimators for term in ESTIMATOR_TERMS[estimator]}
+    cumulative = {term: _cumulative_sums(terms[term]) for term in needed}
+
+    cubes = {}
+    for estimator in estimators:
+        compute = functools.partial(_estimator_windows, cumulative, estimator)
+        if len(windows) * close.size > max_cells:
+            cubes[estimator] = VolatilityCube(None, windows.tolist(), close.index, close.columns, compute)
+        else:
+            cubes[estimator] = VolatilityCube(compute(windows), windows.tolist(), close.index, close.columns)
+    return cubes